@@ -0,0 +1,59 @@
+# backend/alembic/env.py
+
+import os
+import sys
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Las migraciones son SQL explícito (el esquema nació en app/db/init.sql), sin autogenerate
+target_metadata = None
+
+# alembic.ini no guarda credenciales: se usa DATABASE_URL salvo que quien llama fije otra URL
+if not config.get_main_option("sqlalchemy.url"):
+    from app.core.config import settings
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
+# La tabla de control va en public: init.sql cambia el search_path a tutorias_unach
+VERSION_TABLE_SCHEMA = "public"
+
+
+def run_migrations_offline() -> None:
+    """Genera el SQL sin conectarse (alembic upgrade head --sql)."""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        version_table_schema=VERSION_TABLE_SCHEMA,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            version_table_schema=VERSION_TABLE_SCHEMA,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,35 @@
+"""Esquema base: el contenido de app/db/init.sql
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+init.sql sigue creando la base la primera vez que arranca el contenedor de
+PostgreSQL; es idempotente (IF NOT EXISTS / OR REPLACE), así que esta revisión
+sirve tanto para una base vacía como para una ya creada con docker. Los cambios
+de esquema posteriores van en revisiones nuevas, no en init.sql.
+"""
+from pathlib import Path
+
+from alembic import context, op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INIT_SQL = Path(__file__).resolve().parents[2] / "app" / "db" / "init.sql"
+
+
+def upgrade() -> None:
+    sql = INIT_SQL.read_text(encoding="utf-8")
+    # El SQL va tal cual, sin compilar (los % y $$ de los bloques DO no se tocan)
+    if context.is_offline_mode():
+        op.get_context().impl.static_output(sql)
+    else:
+        op.get_bind().exec_driver_sql(sql)
+    op.execute("RESET search_path")
+
+
+def downgrade() -> None:
+    op.execute("DROP SCHEMA IF EXISTS tutorias_unach CASCADE")
@@ -0,0 +1,43 @@
+"""Índices para las consultas de app/services
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Cada índice indica qué consultas lo usan. Las búsquedas por usuarios.correo,
+evaluaciones.tutoria_id, notas.matricula_id y tutores/estudiantes.usuario_id ya
+tienen índice por sus restricciones UNIQUE. scripts/check_query_plans.py verifica
+los planes sobre datos sintéticos.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    # Conteo de tutorías por matrícula (dashboards, get_features_bulk, get_risk_map),
+    # NOT EXISTS del job de tutorías proactivas y JOIN del reporte del coordinador
+    ("idx_tutorias_matricula_estado", "tutorias (matricula_id, estado)"),
+    # Conteos globales por estado (CMI) y conteo_tutorias completo (score_risk, job proactivo):
+    # se resuelven recorriendo solo el índice
+    ("idx_tutorias_estado_matricula", "tutorias (estado, matricula_id)"),
+    # Tutorías del tutor (get_tutorias_by_tutor, promedio de evaluaciones, tutores activos del CMI)
+    ("idx_tutorias_tutor_estado", "tutorias (tutor_id, estado)"),
+    # Matrículas del tutor sin período (conteo_tutorias del dashboard) y roster por curso
+    ("idx_matriculas_tutor_periodo_asignatura", "matriculas (tutor_id, periodo_id, asignatura_id)"),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY no bloquea escrituras en una base con datos, pero no puede ir en una transacción
+    with op.get_context().autocommit_block():
+        for nombre, definicion in INDICES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {nombre} ON tutorias_unach.{definicion}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nombre, _ in INDICES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS tutorias_unach.{nombre}")
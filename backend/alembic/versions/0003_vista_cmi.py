@@ -0,0 +1,85 @@
+"""Vista materializada del CMI por período y carrera
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+Una fila por (período, carrera) con los contadores del CMI, más las filas de
+totales de GROUPING SETS: periodo_id = 0 es "todos los períodos" y carrera = '*'
+"todas las carreras". Solo se guardan contadores (las tasas se calculan en
+CMIService) y las sumas de estrellas para poder promediar. Las tutorías sin
+matrícula no tienen período ni carrera y quedan fuera.
+
+El índice único permite REFRESH MATERIALIZED VIEW CONCURRENTLY (lo lanza el job
+de CMIService) y es el que usa /dashboard/coordinator. El contador
+'cmi_periodo_carrera' de tabla_version sube en cada refresco (su fecha_actualizacion
+es la del último refresco) y de él sale el ETag. La vista no guarda la hora de
+cálculo para que el refresco concurrente solo reescriba las filas que cambian.
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+VISTA_SQL = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS tutorias_unach.cmi_periodo_carrera AS
+SELECT
+    CASE WHEN GROUPING(b.periodo_id) = 1 THEN 0 ELSE b.periodo_id END AS periodo_id,
+    CASE WHEN GROUPING(b.carrera) = 1 THEN '*' ELSE b.carrera END AS carrera,
+    COUNT(b.tutoria_id) FILTER (WHERE b.estado = 'realizada') AS realizada,
+    COUNT(b.tutoria_id) FILTER (WHERE b.estado = 'no_asistio') AS no_asistio,
+    COUNT(b.tutoria_id) FILTER (WHERE b.estado = 'cancelada') AS cancelada,
+    COUNT(b.tutoria_id) FILTER (WHERE b.estado = 'programada') AS programada,
+    COUNT(b.tutoria_id) FILTER (WHERE b.estado = 'solicitada') AS solicitada,
+    COUNT(DISTINCT b.tutor_tutoria_id) AS tutores_activos,
+    COUNT(b.estrellas) AS num_evaluaciones,
+    COALESCE(SUM(b.estrellas), 0) AS suma_estrellas,
+    COUNT(DISTINCT b.tutor_id) AS total_tutores,
+    COUNT(DISTINCT b.estudiante_id) AS total_estudiantes
+FROM (
+    SELECT
+        m.periodo_id,
+        COALESCE(e.carrera, 'Sin carrera') AS carrera,
+        m.estudiante_id,
+        m.tutor_id,
+        t.id AS tutoria_id,
+        t.estado,
+        t.tutor_id AS tutor_tutoria_id,
+        ev.estrellas
+    FROM tutorias_unach.matriculas m
+    JOIN tutorias_unach.estudiantes e ON e.id = m.estudiante_id
+    LEFT JOIN tutorias_unach.tutorias t ON t.matricula_id = m.id
+    LEFT JOIN tutorias_unach.evaluaciones ev ON ev.tutoria_id = t.id
+) b
+GROUP BY GROUPING SETS ((b.periodo_id, b.carrera), (b.periodo_id), (b.carrera), ())
+"""
+
+
+def upgrade() -> None:
+    op.execute(VISTA_SQL)
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_cmi_periodo_carrera "
+        "ON tutorias_unach.cmi_periodo_carrera (periodo_id, carrera)"
+    )
+    # La vista no admite triggers: el contador lo sube el job al refrescarla.
+    # coordinadores entra en los contadores porque el ETag depende de la carrera del coordinador.
+    op.execute(
+        "INSERT INTO tutorias_unach.tabla_version (tabla) "
+        "VALUES ('cmi_periodo_carrera'), ('coordinadores') ON CONFLICT (tabla) DO NOTHING"
+    )
+    op.execute("DROP TRIGGER IF EXISTS trg_version_coordinadores ON tutorias_unach.coordinadores")
+    op.execute(
+        "CREATE TRIGGER trg_version_coordinadores "
+        "AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tutorias_unach.coordinadores "
+        "FOR EACH STATEMENT EXECUTE FUNCTION tutorias_unach.incrementar_tabla_version()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_version_coordinadores ON tutorias_unach.coordinadores")
+    op.execute(
+        "DELETE FROM tutorias_unach.tabla_version WHERE tabla IN ('cmi_periodo_carrera', 'coordinadores')"
+    )
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS tutorias_unach.cmi_periodo_carrera")
@@ -0,0 +1,61 @@
+"""Histórico diario del CMI (cmi_snapshots)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Una fila por día, período y carrera (mismas claves que cmi_periodo_carrera:
+periodo_id = 0 y carrera = '*' son los totales) con los contadores de la vista y
+los indicadores que calcula CMIService. La clave primaria (periodo_id, carrera,
+fecha) hace de cada gráfico de tendencia una lectura por rango del índice.
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+TABLA_SQL = """
+CREATE TABLE IF NOT EXISTS tutorias_unach.cmi_snapshots (
+    periodo_id INTEGER NOT NULL,
+    carrera VARCHAR(100) NOT NULL,
+    fecha DATE NOT NULL,
+    realizada INTEGER NOT NULL,
+    no_asistio INTEGER NOT NULL,
+    cancelada INTEGER NOT NULL,
+    programada INTEGER NOT NULL,
+    solicitada INTEGER NOT NULL,
+    tutores_activos INTEGER NOT NULL,
+    num_evaluaciones INTEGER NOT NULL,
+    suma_estrellas INTEGER NOT NULL,
+    total_tutores INTEGER NOT NULL,
+    total_estudiantes INTEGER NOT NULL,
+    tasa_asistencia NUMERIC(5, 2) NOT NULL,
+    satisfaccion_promedio NUMERIC(3, 2) NOT NULL,
+    ratio_tutor_estudiante NUMERIC(8, 2) NOT NULL,
+    tasa_adherencia_tutores NUMERIC(5, 2) NOT NULL,
+    fecha_calculo TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (periodo_id, carrera, fecha)
+)
+"""
+
+
+def upgrade() -> None:
+    op.execute(TABLA_SQL)
+    # El ETag de /dashboard/coordinator/tendencia sale de este contador
+    op.execute(
+        "INSERT INTO tutorias_unach.tabla_version (tabla) VALUES ('cmi_snapshots') "
+        "ON CONFLICT (tabla) DO NOTHING"
+    )
+    op.execute("DROP TRIGGER IF EXISTS trg_version_cmi_snapshots ON tutorias_unach.cmi_snapshots")
+    op.execute(
+        "CREATE TRIGGER trg_version_cmi_snapshots "
+        "AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tutorias_unach.cmi_snapshots "
+        "FOR EACH STATEMENT EXECUTE FUNCTION tutorias_unach.incrementar_tabla_version()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM tutorias_unach.tabla_version WHERE tabla = 'cmi_snapshots'")
+    op.execute("DROP TABLE IF EXISTS tutorias_unach.cmi_snapshots")
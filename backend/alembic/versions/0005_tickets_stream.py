@@ -0,0 +1,34 @@
+"""Tickets de un solo uso para los streams SSE (tickets_stream)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+EventSource no envía cabeceras, así que /tutorias/eventos no puede recibir el JWT
+en Authorization. En lugar del JWT en la URL (queda en logs de proxy e historial),
+el frontend pide un ticket con su JWT y abre el stream con ?ticket=. Se guarda el
+SHA-256 del ticket; caduca en segundos y se borra al usarlo (DELETE ... RETURNING),
+así que sirve una sola vez aunque cada petición la atienda un worker distinto.
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+TABLA_SQL = """
+CREATE TABLE IF NOT EXISTS tutorias_unach.tickets_stream (
+    ticket_hash CHAR(64) PRIMARY KEY,
+    usuario_id INTEGER NOT NULL REFERENCES tutorias_unach.usuarios(id) ON DELETE CASCADE,
+    expira TIMESTAMP NOT NULL
+)
+"""
+
+
+def upgrade() -> None:
+    op.execute(TABLA_SQL)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS tutorias_unach.tickets_stream")
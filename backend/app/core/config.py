@@ -7,6 +7,23 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+    # Vida de los tickets de un solo uso con que se abren los streams SSE
+    STREAM_TICKET_SECONDS: int = int(os.getenv("STREAM_TICKET_SECONDS", 30))
+    # Cargar el modelo de riesgo al arrancar el worker en vez de en la primera petición
+    RISK_MODEL_PRELOAD: bool = os.getenv("RISK_MODEL_PRELOAD", "false").lower() == "true"
+    # Pool de procesos para inferencia/clustering (0 = desactivado, todo en el propio worker)
+    INFERENCE_PROCESSES: int = int(os.getenv("INFERENCE_PROCESSES", 0))
+    INFERENCE_MAX_PENDING: int = int(os.getenv("INFERENCE_MAX_PENDING", 32))
+    INFERENCE_OFFLOAD_MIN_ROWS: int = int(os.getenv("INFERENCE_OFFLOAD_MIN_ROWS", 256))
+    # A partir de cuántos estudiantes el clustering usa MiniBatchKMeans
+    CLUSTER_MINIBATCH_MIN_ROWS: int = int(os.getenv("CLUSTER_MINIBATCH_MIN_ROWS", 10000))
+    # Cada cuántos minutos el worker crea las tutorías proactivas (0 = solo con scripts/crear_tutorias_proactivas.py)
+    PROACTIVE_TUTORING_INTERVAL_MINUTES: int = int(os.getenv("PROACTIVE_TUTORING_INTERVAL_MINUTES", 15))
+
+    # Segundos que se reutiliza el período activo resuelto antes de volver a consultarlo
+    ACTIVE_PERIOD_CACHE_SECONDS: int = int(os.getenv("ACTIVE_PERIOD_CACHE_SECONDS", 60))
+    # Cada cuántos minutos el worker refresca la vista del CMI (0 = solo con scripts/refrescar_cmi.py)
+    CMI_REFRESH_MINUTES: int = int(os.getenv("CMI_REFRESH_MINUTES", 5))
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,98 @@
+# backend/app/core/etag.py
+
+import hashlib
+from typing import Optional
+from fastapi import Depends, Request, Response
+from fastapi.responses import Response as PlainResponse
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+from app.db.database import get_db
+from app.dependencies import get_current_user
+from app.models.user import Usuario
+from app.services.periodo_service import periodo_service
+from app.services.prediction_service import prediction_service
+
+# El navegador guarda la respuesta pero la revalida siempre (If-None-Match) y nunca la comparte
+CACHE_CONTROL = "private, no-cache"
+
+# Tablas de las que depende cada pantalla (contadores de tabla_version)
+TABLAS_ESTUDIANTE = ("usuarios", "estudiantes", "tutores", "asignaturas", "periodos_academicos",
+                     "matriculas", "notas", "tutorias", "riesgo_matricula")
+TABLAS_TUTOR = TABLAS_ESTUDIANTE + ("evaluaciones",)
+# El CMI sale de la vista materializada: su contador sube con cada refresco
+TABLAS_CMI = ("cmi_periodo_carrera", "coordinadores", "periodos_academicos")
+TABLAS_CMI_TENDENCIA = ("cmi_snapshots", "coordinadores", "periodos_academicos")
+TABLAS_REPORTES = TABLAS_TUTOR
+
+
+class NotModified(Exception):
+    """Se lanza desde la dependencia cuando el cliente ya tiene la versión vigente."""
+
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def not_modified_handler(request: Request, exc: NotModified) -> PlainResponse:
+    return PlainResponse(status_code=304, headers={"ETag": exc.etag, "Cache-Control": CACHE_CONTROL})
+
+
+def _versiones(db: Session, tablas: tuple) -> Optional[str]:
+    """Una sola lectura de los contadores; None si la tabla de versiones no existe."""
+    try:
+        filas = db.execute(
+            text("SELECT tabla, version FROM tutorias_unach.tabla_version WHERE tabla = ANY(:tablas) ORDER BY tabla"),
+            {"tablas": list(tablas)}
+        ).all()
+    except Exception as e:
+        print(f"Sin contadores de versión, se responde sin ETag: {e}")
+        db.rollback()
+        return None
+    return ",".join(f"{tabla}:{version}" for tabla, version in filas)
+
+
+def _responder(request: Request, response: Response, db: Session, tablas: tuple, usuario: str,
+               modelo: bool, fecha: bool) -> None:
+    # Los contadores se leen ANTES de calcular: si algo cambia a mitad, la próxima petición ya no coincide
+    versiones = _versiones(db, tablas)
+    if versiones is None:
+        return
+
+    # El período activo (en caché) entra en la clave: si cambia, cambia la respuesta por defecto
+    periodo_activo = periodo_service.get_periodo_activo_id(db)
+    clave = f"{request.url.path}?{request.url.query}|{usuario}|{versiones}|{periodo_activo}"
+    # Cambiar de modelo invalida los puntajes guardados (vigencia) aunque no cambie ninguna tabla
+    if modelo:
+        clave += f"|{prediction_service.model_version}"
+    # Las respuestas que comparan con CURRENT_DATE cambian de un día a otro
+    if fecha:
+        clave += f"|{db.execute(text('SELECT CURRENT_DATE')).scalar()}"
+    etag = '"' + hashlib.sha1(clave.encode()).hexdigest() + '"'
+
+    recibidos = [e.strip().removeprefix("W/") for e in request.headers.get("if-none-match", "").split(",")]
+    if etag in recibidos or "*" in recibidos:
+        raise NotModified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def etag_por_usuario(*tablas: str, modelo: bool = True, fecha: bool = False):
+    """
+    Dependencia para endpoints autenticados: ETag fuerte por usuario y URL a partir
+    de los contadores de `tablas`. Si coincide con If-None-Match responde 304 antes
+    de que corra cualquier consulta pesada o inferencia.
+    La clave incluye la versión del modelo (modelo=False para lo que no lo usa, como
+    el CMI) y, con fecha=True, el CURRENT_DATE de la base.
+    """
+    def dependencia(request: Request, response: Response, db: Session = Depends(get_db),
+                    current_user: Usuario = Depends(get_current_user)) -> None:
+        _responder(request, response, db, tablas, str(current_user.id), modelo, fecha)
+    return dependencia
+
+
+def etag_publico(*tablas: str, modelo: bool = True, fecha: bool = False):
+    """Igual que etag_por_usuario para endpoints sin autenticación (misma respuesta para todos)."""
+    def dependencia(request: Request, response: Response, db: Session = Depends(get_db)) -> None:
+        _responder(request, response, db, tablas, "publico", modelo, fecha)
+    return dependencia
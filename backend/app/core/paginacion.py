@@ -0,0 +1,24 @@
+# backend/app/core/paginacion.py
+
+import base64
+import json
+from typing import Any, List, Optional
+from fastapi import HTTPException
+
+
+def codificar_cursor(valores: List[Any]) -> str:
+    """Cursor opaco (keyset) con los valores de orden de la última fila de la página."""
+    return base64.urlsafe_b64encode(json.dumps(valores, default=str).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: Optional[str], num_valores: int) -> Optional[List[Any]]:
+    """Valores de orden guardados en `cursor` (None si no hay cursor). 422 si no es válido."""
+    if not cursor:
+        return None
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        valores = None
+    if not isinstance(valores, list) or len(valores) != num_valores:
+        raise HTTPException(status_code=422, detail="Cursor de paginación inválido.")
+    return valores
@@ -1,4 +1,6 @@
 -- backend/app/db/init.sql
+-- Esquema base (revisión 0001 de Alembic). Los cambios posteriores van en
+-- backend/alembic/versions; este archivo ya no se modifica.
 -- Creamos un "esquema" o espacio de trabajo para mantener todo ordenado.
 CREATE SCHEMA IF NOT EXISTS tutorias_unach;
 SET search_path TO tutorias_unach;
@@ -132,9 +134,70 @@ CREATE TABLE IF NOT EXISTS evaluaciones (
     fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- -----------------------------------------------------
+-- Tabla: riesgo_matricula
+-- Puntaje de riesgo precalculado (scripts/score_risk.py). Guarda también las
+-- entradas con las que se calculó para detectar qué filas quedaron desactualizadas.
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS riesgo_matricula (
+    matricula_id INTEGER PRIMARY KEY REFERENCES matriculas(id) ON DELETE CASCADE,
+    nivel VARCHAR(10) NOT NULL,
+    color VARCHAR(10) NOT NULL,
+    probabilidad NUMERIC(4, 1) NOT NULL,
+    mensaje TEXT,
+    version_modelo VARCHAR(40),
+    parcial1 NUMERIC(4, 2),
+    parcial2 NUMERIC(4, 2),
+    final NUMERIC(4, 2),
+    situacion VARCHAR(50),
+    num_tutorias INTEGER NOT NULL DEFAULT 0,
+    fecha_calculo TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- -----------------------------------------------------
+-- Tabla: tabla_version
+-- Contador por tabla que sube con cada sentencia que la modifica (triggers de
+-- abajo). Los dashboards y reportes derivan su ETag de estos contadores.
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS tabla_version (
+    tabla VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION incrementar_tabla_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO tutorias_unach.tabla_version (tabla, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (tabla) DO UPDATE
+        SET version = tabla_version.version + 1,
+            fecha_actualizacion = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Un trigger por sentencia (no por fila): un INSERT masivo sube el contador una sola vez
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['usuarios', 'estudiantes', 'tutores', 'asignaturas', 'periodos_academicos',
+                             'matriculas', 'notas', 'tutorias', 'evaluaciones', 'riesgo_matricula']
+    LOOP
+        INSERT INTO tabla_version (tabla) VALUES (t) ON CONFLICT (tabla) DO NOTHING;
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_version_%1$s ON %1$I', t);
+        EXECUTE format(
+            'CREATE TRIGGER trg_version_%1$s AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %1$I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION incrementar_tabla_version()', t);
+    END LOOP;
+END;
+$$;
+
 -- Índices para búsquedas rápidas
 CREATE INDEX IF NOT EXISTS idx_tutorias_fecha ON tutorias(fecha);
 CREATE INDEX IF NOT EXISTS idx_usuarios_rol ON usuarios(rol);
 CREATE INDEX IF NOT EXISTS idx_matriculas_estudiante ON matriculas(estudiante_id);
+-- Dashboards y reportes filtran por el período activo
+CREATE INDEX IF NOT EXISTS idx_matriculas_periodo_tutor ON matriculas(periodo_id, tutor_id);
+CREATE INDEX IF NOT EXISTS idx_matriculas_periodo_estudiante ON matriculas(periodo_id, estudiante_id);
 
 -- COMMENT ON SCHEMA tutorias_unach IS 'Esquema v2.2 para el sistema de tutorías UNACH. Corregido timezone en fechas.';
\ No newline at end of file
@@ -1,6 +1,7 @@
 # backend/app/dependencies.py
 
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
@@ -9,6 +10,7 @@ from app.core.config import settings
 from app.db.database import get_db
 from app.models.user import Usuario
 from app.services import auth_service
+from app.services.periodo_service import periodo_service, TODOS_LOS_PERIODOS
 
 # Este es el esquema que le dice a FastAPI: "Para entrar aquí, necesitas un token".
 # Se encargará de buscar el token en la cabecera "Authorization: Bearer <token>"
@@ -38,4 +40,46 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if user is None:
         raise credentials_exception
     
-    return user
\ No newline at end of file
+    return user
+
+def get_current_user_stream(
+    ticket: str = Query(..., description="Ticket de un solo uso de POST /auth/stream-ticket (EventSource no puede enviar cabeceras)."),
+    db: Session = Depends(get_db)
+) -> Usuario:
+    """
+    Usuario de un stream SSE que abre el navegador con EventSource: en vez del JWT
+    (que quedaría en la URL) recibe un ticket efímero que se invalida al usarlo.
+    """
+    user = auth_service.consumir_ticket_stream(db, ticket)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Ticket de stream inválido, caducado o ya usado",
+        )
+    return user
+
+def get_periodo_scope(
+    periodo_id: Optional[str] = Query(None, description="ID del período, o 'all' para todos. Por defecto, el activo."),
+    db: Session = Depends(get_db)
+) -> int:
+    """
+    Dependencia que decide qué período consultan dashboards y reportes.
+    Devuelve el ID del período o TODOS_LOS_PERIODOS cuando se piden todos.
+    Sin ?periodo_id y sin ningún período registrado responde 404.
+    """
+    if periodo_id is None:
+        activo = periodo_service.get_periodo_activo_id(db)
+        if activo is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No hay ningún período académico registrado; use periodo_id=all."
+            )
+        return activo
+    if periodo_id.lower() in ("all", "todos"):
+        return TODOS_LOS_PERIODOS
+    if not periodo_id.isdigit() or int(periodo_id) == TODOS_LOS_PERIODOS:
+        raise HTTPException(
+            status_code=422,
+            detail="periodo_id debe ser un número o 'all'."
+        )
+    return int(periodo_id)
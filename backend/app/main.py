@@ -7,6 +7,8 @@ from fastapi.middleware.cors import CORSMiddleware # <--- 1. IMPORTAMOS EL MÓDU
 from app.routes import users, auth, dashboard, tutorias
 from app.routes import evaluaciones
 from app.routes import reports
+from app.core.config import settings
+from app.core.etag import NotModified, not_modified_handler
 
 app = FastAPI(
     title="Tutorías UNACH API",
@@ -28,6 +30,9 @@ app.add_middleware(
     allow_headers=["*"], # Permitir todas las cabeceras
 )
 
+# 304 Not Modified cuando el ETag (contadores de tabla_version) no cambió
+app.add_exception_handler(NotModified, not_modified_handler)
+
 # --- 3. CONECTAMOS LOS ROUTERS (esto ya estaba) ---
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
@@ -36,6 +41,51 @@ app.include_router(tutorias.router, prefix="/tutorias", tags=["Tutorías"])
 app.include_router(evaluaciones.router, prefix="/evaluaciones", tags=["Evaluaciones"])
 app.include_router(reports.router, prefix="/reports", tags=["Reports"])
 
+# --- 4. PRECARGA OPCIONAL DEL MODELO ---
+# Por defecto el modelo se carga en la primera predicción; con RISK_MODEL_PRELOAD=true
+# el worker lo carga antes de aceptar peticiones.
+@app.on_event("startup")
+def warmup_risk_model():
+    if settings.RISK_MODEL_PRELOAD:
+        from app.services.prediction_service import prediction_service
+        prediction_service.warmup()
+
+@app.on_event("shutdown")
+def stop_inference_pool():
+    from app.services.inference_executor import inference_executor
+    inference_executor.shutdown()
+
+# --- 5. JOB DE TUTORÍAS PROACTIVAS ---
+# Crea en bloque las tutorías de refuerzo para las matrículas en riesgo (el dashboard ya no escribe).
+# Con varios workers solo una ejecución avanza a la vez (advisory lock en PostgreSQL).
+@app.on_event("startup")
+def start_proactive_tutoring_job():
+    from app.services.tutoria_proactiva_service import tutoria_proactiva_service
+    tutoria_proactiva_service.iniciar_periodico(settings.PROACTIVE_TUTORING_INTERVAL_MINUTES)
+
+@app.on_event("shutdown")
+def stop_proactive_tutoring_job():
+    from app.services.tutoria_proactiva_service import tutoria_proactiva_service
+    tutoria_proactiva_service.detener()
+
+# --- 6. REFRESCO DE LA VISTA DEL CMI ---
+# REFRESH MATERIALIZED VIEW CONCURRENTLY de cmi_periodo_carrera (solo si cambiaron sus tablas).
+@app.on_event("startup")
+def start_cmi_refresh_job():
+    from app.services.cmi_service import cmi_service
+    cmi_service.iniciar_periodico(settings.CMI_REFRESH_MINUTES)
+
+@app.on_event("shutdown")
+def stop_cmi_refresh_job():
+    from app.services.cmi_service import cmi_service
+    cmi_service.detener()
+
+# --- 7. AVISOS EN VIVO (LISTEN/NOTIFY) ---
+@app.on_event("shutdown")
+def stop_notification_listener():
+    from app.services.notificacion_service import notificacion_service
+    notificacion_service.detener()
+
 @app.get("/")
 def read_root():
     return {"status": "ok", "message": "¡Bienvenido a la API de Tutorías UNACH!"}
\ No newline at end of file
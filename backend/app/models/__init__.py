@@ -10,4 +10,5 @@ from .nota import Nota
 from .tutoria import Tutoria
 from .evaluacion import Evaluacion
 # ✅ --- AÑADE ESTA LÍNEA AL FINAL ---
-from .coordinador import Coordinador
\ No newline at end of file
+from .coordinador import Coordinador
+from .riesgo_matricula import RiesgoMatricula
\ No newline at end of file
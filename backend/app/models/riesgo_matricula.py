@@ -0,0 +1,26 @@
+# backend/app/models/riesgo_matricula.py
+
+from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime, func
+from app.db.database import Base
+
+class RiesgoMatricula(Base):
+    """Puntaje de riesgo precalculado por scripts/score_risk.py."""
+    __tablename__ = "riesgo_matricula"
+    __table_args__ = {'schema': 'tutorias_unach'}
+
+    matricula_id = Column(Integer, ForeignKey("tutorias_unach.matriculas.id"), primary_key=True)
+
+    nivel = Column(String(10), nullable=False)
+    color = Column(String(10), nullable=False)
+    probabilidad = Column(Numeric(4, 1), nullable=False)
+    mensaje = Column(Text)
+    version_modelo = Column(String(40))
+
+    # --- Entradas usadas en el cálculo (refresco incremental) ---
+    parcial1 = Column(Numeric(4, 2))
+    parcial2 = Column(Numeric(4, 2))
+    final = Column(Numeric(4, 2))
+    situacion = Column(String(50))
+    num_tutorias = Column(Integer, nullable=False, default=0)
+
+    fecha_calculo = Column(DateTime, server_default=func.now())
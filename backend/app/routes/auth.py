@@ -9,6 +9,8 @@ from app.db.database import get_db
 from app.core.security import create_access_token
 from app.core.config import settings
 from app.services import auth_service
+from app.dependencies import get_current_user
+from app.models.user import Usuario
 
 router = APIRouter()
 
@@ -33,4 +35,13 @@ def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2Passw
         data={"sub": user.correo, "rol": user.rol}, expires_delta=access_token_expires
     )
     
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/stream-ticket")
+def crear_ticket_stream(db: Session = Depends(get_db), current_user: Usuario = Depends(get_current_user)):
+    """
+    Ticket de un solo uso para abrir un stream SSE (EventSource no envía el JWT en cabeceras).
+    Caduca en STREAM_TICKET_SECONDS segundos.
+    """
+    ticket = auth_service.crear_ticket_stream(db, current_user)
+    return {"ticket": ticket, "expira_en": settings.STREAM_TICKET_SECONDS}
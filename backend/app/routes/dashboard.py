@@ -1,27 +1,40 @@
 # backend/app/routes/dashboard.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import Dict, Any
+from datetime import date, timedelta
 
 from app.db.database import get_db
-from app.dependencies import get_current_user
+from typing import Optional
+from app.dependencies import get_current_user, get_periodo_scope
+from app.core.etag import etag_por_usuario, TABLAS_ESTUDIANTE, TABLAS_TUTOR, TABLAS_CMI, TABLAS_CMI_TENDENCIA
 from app.services import dashboard_service
 from app.services import tutor_dashboard_service
 from app.services.cmi_service import cmi_service
 # ✅ CORREGIDO: Importar el servicio centralizado de perfiles
 # ✅ CORRECTO (Esto importa la instancia creada al final del archivo)
 from app.services.tutor_dashboard_service import tutor_dashboard_service
-from app.services.profile_service import get_student_id_by_user_email, get_tutor_id_by_user_email 
+from app.services.profile_service import (
+    get_student_id_by_user_email, get_tutor_id_by_user_email, get_coordinador_carrera_by_user_email
+)
 from app.models.user import Usuario as UserModel
 from app.models.estudiante import Estudiante # <--- 1. IMPORTAR ESTO
 
 router = APIRouter()
 
-@router.get("/student", response_model=Dict[str, Any], tags=["Dashboard"])
-def get_student_dashboard(db: Session = Depends(get_db), current_user: UserModel = Depends(get_current_user)):
+# Días que muestra la tendencia del CMI si no se indica ?desde=
+DIAS_TENDENCIA_CMI = 90
+
+@router.get("/student", response_model=Dict[str, Any], tags=["Dashboard"],
+            dependencies=[Depends(etag_por_usuario(*TABLAS_ESTUDIANTE))])
+def get_student_dashboard(
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    periodo_id: int = Depends(get_periodo_scope)
+):
     """
-    Retorna todos los datos para el Dashboard del Estudiante.
+    Retorna todos los datos para el Dashboard del Estudiante (período activo por defecto, ?periodo_id=all para todos).
     Requiere un token de autenticación de un usuario con rol 'estudiante'.
     """
     if current_user.rol != "estudiante":
@@ -44,7 +57,7 @@ def get_student_dashboard(db: Session = Depends(get_db), current_user: UserModel
     codigo_est = estudiante_obj.codigo_estudiante if estudiante_obj else "S/N"
     # -
 
-    dashboard_data = dashboard_service.get_student_kpis(db, estudiante_id)
+    dashboard_data = dashboard_service.get_student_kpis(db, estudiante_id, periodo_id)
 
     return {
         "nombre": current_user.nombre,
@@ -53,12 +66,53 @@ def get_student_dashboard(db: Session = Depends(get_db), current_user: UserModel
     }
 
 # --- ENDPOINT PARA EL TUTOR ---
-@router.get("/tutor", response_model=Dict[str, Any], tags=["Dashboard"])
-def get_tutor_dashboard(db: Session = Depends(get_db), current_user: UserModel = Depends(get_current_user)):
+@router.get("/tutor", response_model=Dict[str, Any], tags=["Dashboard"],
+            dependencies=[Depends(etag_por_usuario(*TABLAS_TUTOR))])
+def get_tutor_dashboard(
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    periodo_id: int = Depends(get_periodo_scope)
+):
     """
-    Retorna todos los datos para el Dashboard del Tutor.
+    Retorna el Dashboard del Tutor con un resumen por curso (asignatura/período)
+    (período activo por defecto, ?periodo_id=all para todos). El detalle de
+    estudiantes se pide por curso en /tutor/estudiantes.
     Requiere un token de autenticación de un usuario con rol 'tutor'.
     """
+    _verificar_tutor(db, current_user)
+
+    # El servicio identifica al tutor por su usuario (no por tutores.id)
+    dashboard_data = tutor_dashboard_service.get_tutor_dashboard_data(db, current_user.id, periodo_id)
+
+    return {
+        "nombre": current_user.nombre,
+        "cursos": dashboard_data["cursos"],
+        "tutorias_pendientes": dashboard_data["tutorias_pendientes"],
+        "average_rating": dashboard_data["average_rating"]
+    }
+
+@router.get("/tutor/estudiantes", response_model=Dict[str, Any], tags=["Dashboard"],
+            dependencies=[Depends(etag_por_usuario(*TABLAS_TUTOR))])
+def get_tutor_roster(
+    asignatura_id: Optional[int] = Query(None),
+    riesgo: Optional[str] = Query(None, pattern="^(prioritario|normal|sin_calcular)$"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    periodo_id: int = Depends(get_periodo_scope)
+):
+    """
+    Página de estudiantes del tutor con el detalle de riesgo. Se pide al abrir un curso
+    (?asignatura_id=&periodo_id=) o un grupo de riesgo (?riesgo=prioritario|normal|sin_calcular).
+    """
+    _verificar_tutor(db, current_user)
+
+    return tutor_dashboard_service.get_course_roster(
+        db, current_user.id, asignatura_id, periodo_id, riesgo, limit, offset
+    )
+
+def _verificar_tutor(db: Session, current_user: UserModel) -> None:
     if current_user.rol != "tutor":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
@@ -66,40 +120,75 @@ def get_tutor_dashboard(db: Session = Depends(get_db), current_user: UserModel =
         )
 
     # ✅ CORREGIDO: Usamos la función del profile_service
-    tutor_id = get_tutor_id_by_user_email(db, current_user.correo)
-
-    if not tutor_id:
+    if not get_tutor_id_by_user_email(db, current_user.correo):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Perfil de tutor no encontrado."
         )
 
-    dashboard_data = tutor_dashboard_service.get_tutor_dashboard_data(db, tutor_id)
+# --- ✅ NUEVO ENDPOINT PARA EL COORDINADOR (CMI) ---
+@router.get("/coordinator", response_model=Dict[str, Any], tags=["Dashboard"],
+            dependencies=[Depends(etag_por_usuario(*TABLAS_CMI, modelo=False))])
+def get_coordinator_dashboard(
+    alcance: str = Query("carrera", pattern="^(carrera|global)$"),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    periodo_id: int = Depends(get_periodo_scope)
+):
+    """
+    Retorna los datos para el Cuadro de Mando Integral (CMI) del Coordinador: el de
+    su carrera (?alcance=global para todas) en el período activo por defecto
+    (?periodo_id=all para todos).
+    Requiere un token de autenticación de un usuario con rol 'coordinador'.
+    """
+    carrera = _carrera_coordinador(db, current_user, alcance)
 
+    # Una búsqueda por el índice único de la vista materializada cmi_periodo_carrera
+    data = cmi_service.get_cmi_data(db, periodo_id, carrera)
+    
     return {
         "nombre": current_user.nombre,
-        "cursos": dashboard_data["cursos"],
-        "tutorias_pendientes": dashboard_data["tutorias_pendientes"],
-        "average_rating": dashboard_data["average_rating"]
+        "periodo_id": data["periodo_id"],
+        "periodo": data["periodo"],
+        "carrera": data["carrera"],
+        "cmi": data["cmi"]
     }
 
-# --- ✅ NUEVO ENDPOINT PARA EL COORDINADOR (CMI) ---
-@router.get("/coordinator", response_model=Dict[str, Any], tags=["Dashboard"])
-def get_coordinator_dashboard(db: Session = Depends(get_db), current_user: UserModel = Depends(get_current_user)):
+@router.get("/coordinator/tendencia", response_model=Dict[str, Any], tags=["Dashboard"],
+            dependencies=[Depends(etag_por_usuario(*TABLAS_CMI_TENDENCIA, modelo=False, fecha=True))])
+def get_coordinator_trend(
+    desde: Optional[date] = Query(None, description="Por defecto, 90 días antes de 'hasta'."),
+    hasta: Optional[date] = Query(None, description="Por defecto, hoy."),
+    alcance: str = Query("carrera", pattern="^(carrera|global)$"),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    periodo_id: int = Depends(get_periodo_scope)
+):
     """
-    Retorna los datos para el Cuadro de Mando Integral (CMI) del Coordinador.
-    Requiere un token de autenticación de un usuario con rol 'coordinador'.
+    Serie diaria de los indicadores del CMI (histórico cmi_snapshots) entre dos fechas,
+    con el mismo corte de carrera y período que /coordinator.
     """
+    carrera = _carrera_coordinador(db, current_user, alcance)
+
+    hasta = hasta or date.today()
+    desde = desde or hasta - timedelta(days=DIAS_TENDENCIA_CMI)
+    if desde > hasta:
+        raise HTTPException(
+            status_code=422,
+            detail="'desde' no puede ser posterior a 'hasta'."
+        )
+
+    return cmi_service.get_tendencia(db, desde, hasta, periodo_id, carrera)
+
+def _carrera_coordinador(db: Session, current_user: UserModel, alcance: str) -> Optional[str]:
+    """Verifica el rol y devuelve la carrera del corte (None = todas las carreras)."""
     if current_user.rol != "coordinador":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Acceso denegado: Se requiere rol de coordinador."
         )
-    
-    # El CMI no está atado a un coordinador específico, es una vista global.
-    data = cmi_service.get_cmi_data(db)
-    
-    return {
-        "nombre": current_user.nombre,
-        "cmi": data
-    }
\ No newline at end of file
+
+    # Un coordinador sin carrera asignada ve el total de todas las carreras
+    if alcance == "global":
+        return None
+    return get_coordinador_carrera_by_user_email(db, current_user.correo)
\ No newline at end of file
@@ -1,23 +1,38 @@
 # backend/app/routes/reports.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional
+from datetime import date
 
 from app.db.database import get_db
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_periodo_scope
+from app.core.etag import etag_por_usuario, TABLAS_REPORTES
+from app.core.paginacion import codificar_cursor, decodificar_cursor
 from app.models.user import Usuario as UserModel
 from app.services.report_service import report_service
+from app.services.export_service import export_service, TIPOS_CONTENIDO
+from app.services.data_quality_service import data_quality_service, REGLAS_CALIDAD
+from app.services.inference_executor import inference_executor
+from app.services.prediction_service import prediction_service
 
 router = APIRouter()
 
-@router.get("/coordinator", response_model=List[Dict[str, Any]], tags=["Reports"])
+@router.get("/coordinator", response_model=Dict[str, Any], tags=["Reports"],
+            dependencies=[Depends(etag_por_usuario(*TABLAS_REPORTES))])
 def get_detailed_coordinator_report(
+    carrera: Optional[str] = Query(None),
+    tutor_id: Optional[int] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="El 'siguiente' de la página anterior."),
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserModel = Depends(get_current_user),
+    periodo_id: int = Depends(get_periodo_scope)
 ):
     """
-    Endpoint para el Coordinador.
+    Endpoint para el Coordinador (período activo por defecto, ?periodo_id=all para todos),
+    filtrable por carrera y tutor y paginado por cursor: {grupos, limit, siguiente}.
     """
     if current_user.rol != "coordinador":
         raise HTTPException(
@@ -25,28 +40,130 @@ def get_detailed_coordinator_report(
             detail="Acceso denegado: Se requiere rol de coordinador."
         )
     
-    report_data = report_service.get_coordinator_report(db)
+    report_data = report_service.get_coordinator_report(
+        db, periodo_id, carrera, tutor_id, limit, decodificar_cursor(cursor, 6)
+    )
+    if report_data["siguiente"] is not None:
+        report_data["siguiente"] = codificar_cursor(report_data["siguiente"])
     
     return report_data
 
+# Descarga del reporte completo (CSV o Excel) sin armarlo en memoria
+@router.get("/coordinator/export", tags=["Reports"])
+def export_coordinator_report(
+    formato: str = Query("csv", alias="format", pattern="^(csv|xlsx)$"),
+    carrera: Optional[str] = Query(None),
+    tutor_id: Optional[int] = Query(None),
+    current_user: UserModel = Depends(get_current_user),
+    periodo_id: int = Depends(get_periodo_scope)
+):
+    """
+    Exporta el reporte del coordinador (mismos filtros que /coordinator, sin paginar)
+    como ?format=csv|xlsx.
+    """
+    if current_user.rol != "coordinador":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="Acceso denegado: Se requiere rol de coordinador."
+        )
+
+    nombre = f"Reporte_Coordinador_{date.today().isoformat()}.{formato}"
+    return StreamingResponse(
+        export_service.reporte_coordinador(formato, periodo_id, carrera, tutor_id),
+        media_type=TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'}
+    )
+
 # ✅ NUEVO ENDPOINT: Calidad de Datos
-@router.get("/data-quality", tags=["Reports"])
+@router.get("/data-quality", tags=["Reports"],
+            dependencies=[Depends(etag_por_usuario(*TABLAS_REPORTES, modelo=False, fecha=True))])
 def get_data_quality_report(
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user)
 ):
+    """
+    Calidad de datos por dimensión (ISO/IEC 25012) con el detalle de cada regla.
+    """
     if current_user.rol != "coordinador":
         raise HTTPException(status_code=403, detail="Requiere rol de coordinador")
     
-    return report_service.get_data_quality_metrics(db)
+    return data_quality_service.get_metricas(db)
+
+# Registros que no cumplen una regla de calidad, paginados por cursor
+@router.get("/data-quality/{regla}", response_model=Dict[str, Any], tags=["Reports"],
+            dependencies=[Depends(etag_por_usuario(*TABLAS_REPORTES, modelo=False, fecha=True))])
+def get_data_quality_detail(
+    regla: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="El 'siguiente' de la página anterior."),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """
+    IDs de los registros que no cumplen `regla`: {regla, tabla, ids, limit, siguiente}.
+    """
+    if current_user.rol != "coordinador":
+        raise HTTPException(status_code=403, detail="Requiere rol de coordinador")
+    if regla not in REGLAS_CALIDAD:
+        raise HTTPException(status_code=404, detail=f"Regla de calidad desconocida: {regla}")
+
+    detalle = data_quality_service.get_detalle(db, regla, limit, decodificar_cursor(cursor, 1))
+    if detalle["siguiente"] is not None:
+        detalle["siguiente"] = codificar_cursor(detalle["siguiente"])
+    return detalle
+
+# Segmentación de estudiantes (Riesgo / Regular / Sobresaliente) de un período
+@router.get("/clusters", response_model=List[Dict[str, Any]], tags=["Reports"],
+            dependencies=[Depends(etag_por_usuario(*TABLAS_REPORTES))])
+def get_student_clusters_report(
+    periodo_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user)
+):
+    if current_user.rol != "coordinador":
+        raise HTTPException(status_code=403, detail="Requiere rol de coordinador")
+
+    return prediction_service.get_student_clusters(db, periodo_id)
+
+# Contadores del pool de inferencia (cola y latencia)
+@router.get("/inference-stats", tags=["Reports"])
+def get_inference_stats(current_user: UserModel = Depends(get_current_user)):
+    if current_user.rol != "coordinador":
+        raise HTTPException(status_code=403, detail="Requiere rol de coordinador")
+
+    return {**inference_executor.stats(), "modelo": prediction_service.model_meta}
 
-@router.get("/at-risk")
-def get_students_at_risk_report(db: Session = Depends(get_db)):
+@router.get("/at-risk", response_model=Dict[str, Any], tags=["Reports"],
+            dependencies=[Depends(etag_por_usuario(*TABLAS_REPORTES))])
+def get_students_at_risk_report(
+    carrera: Optional[str] = Query(None),
+    asignatura_id: Optional[int] = Query(None),
+    nivel: List[Literal["BAJO", "MEDIO", "ALTO", "N/D", "PENDIENTE"]] = Query(
+        list(report_service.NIVELES_EN_RIESGO), description="Niveles a incluir (repetible)."
+    ),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="El 'siguiente' de la página anterior."),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    periodo_id: int = Depends(get_periodo_scope)
+):
     """
-    Reporte de alerta temprana: Devuelve estudiantes con riesgo alto/medio.
+    Reporte de alerta temprana: estudiantes con riesgo BAJO/MEDIO por defecto
+    (período activo por defecto, ?periodo_id=all para todos), filtrable por carrera,
+    asignatura y nivel y paginado por cursor: {estudiantes, limit, siguiente}.
     """
+    if current_user.rol != "coordinador":
+        raise HTTPException(status_code=403, detail="Requiere rol de coordinador")
+
+    despues_de = decodificar_cursor(cursor, 2)
     try:
-        return report_service.get_students_at_risk(db)
+        reporte = report_service.get_students_at_risk(
+            db, periodo_id, carrera, asignatura_id, nivel, limit, despues_de
+        )
     except Exception as e:
         print(f"Error en reporte de riesgo: {e}")
-        raise HTTPException(status_code=500, detail="Error generando alertas de riesgo.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error generando alertas de riesgo.")
+
+    if reporte["siguiente"] is not None:
+        reporte["siguiente"] = codificar_cursor(reporte["siguiente"])
+    return reporte
@@ -1,11 +1,13 @@
 # backend/app/routes/tutorias.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.database import get_db
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_current_user_stream
 from app.schemas.tutoria import Tutoria, TutoriaCreate, TutoriaUpdate
 from app.services.tutoria_service import tutoria_service
+from app.services.notificacion_service import notificacion_service
 # ✅ Mantenemos la importación del servicio centralizado de perfiles
 from app.services.profile_service import get_tutor_id_by_user_email, get_student_id_by_user_email 
 from app.models.user import Usuario as UserModel
@@ -88,6 +90,34 @@ def obtener_mis_tutorias(
 
     return []
 
+# --- STREAM EN VIVO DE LAS TUTORÍAS DEL TUTOR (SSE) ---
+@router.get("/eventos")
+def stream_eventos_tutor(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user_stream)
+):
+    """
+    Server-Sent Events con los cambios de las tutorías del tutor (nuevas solicitudes,
+    aceptadas, canceladas...). Reemplaza recargar el dashboard para ver pendientes.
+    Se abre con ?ticket= (POST /auth/stream-ticket) porque EventSource no envía cabeceras.
+    """
+    if current_user.rol != 'tutor':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso denegado.")
+
+    tutor_id = get_tutor_id_by_user_email(db, current_user.correo)
+    if not tutor_id:
+        raise HTTPException(status_code=404, detail="Perfil de tutor no encontrado.")
+
+    # El stream puede durar horas: se libera la conexión a la BD antes de empezar
+    db.close()
+
+    return StreamingResponse(
+        notificacion_service.eventos_sse(tutor_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
     # --- ENDPOINT PARA ACTUALIZAR ESTADO (se mantiene igual, ya usaba el ID de perfil) ---
 @router.patch("/{tutoria_id}/estado", response_model=Tutoria)
 def actualizar_estado_tutoria(
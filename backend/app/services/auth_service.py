@@ -1,7 +1,11 @@
 # backend/app/services/auth_service.py
 
+import hashlib
+import secrets
 from sqlalchemy.orm import Session
+from sqlalchemy import text
 from typing import Optional
+from app.core.config import settings
 from app.core.security import verify_password
 from app.models.user import Usuario
 from app.services import user_service
@@ -22,4 +26,39 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[Usuari
         return None
     if not verify_password(password, user.hashed_password):
         return None
-    return user
\ No newline at end of file
+    return user
+
+def _hash_ticket(ticket: str) -> str:
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+def crear_ticket_stream(db: Session, usuario: Usuario) -> str:
+    """
+    Emite un ticket de un solo uso (válido STREAM_TICKET_SECONDS) para abrir un stream SSE.
+    Solo se guarda su hash; de paso se borran los tickets caducados.
+    """
+    ticket = secrets.token_urlsafe(32)
+    db.execute(text("DELETE FROM tutorias_unach.tickets_stream WHERE expira <= LOCALTIMESTAMP"))
+    db.execute(
+        text("""
+            INSERT INTO tutorias_unach.tickets_stream (ticket_hash, usuario_id, expira)
+            VALUES (:hash, :usuario_id, LOCALTIMESTAMP + make_interval(secs => :segundos))
+        """),
+        {"hash": _hash_ticket(ticket), "usuario_id": usuario.id, "segundos": settings.STREAM_TICKET_SECONDS}
+    )
+    db.commit()
+    return ticket
+
+def consumir_ticket_stream(db: Session, ticket: str) -> Optional[Usuario]:
+    """Canjea un ticket: lo borra y devuelve su usuario, o None si no existe, ya se usó o caducó."""
+    fila = db.execute(
+        text("""
+            DELETE FROM tutorias_unach.tickets_stream
+            WHERE ticket_hash = :hash
+            RETURNING usuario_id, expira > LOCALTIMESTAMP AS vigente
+        """),
+        {"hash": _hash_ticket(ticket)}
+    ).first()
+    db.commit()
+    if fila is None or not fila.vigente:
+        return None
+    return db.get(Usuario, fila.usuario_id)
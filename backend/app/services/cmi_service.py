@@ -1,75 +1,167 @@
 # backend/app/services/cmi_service.py
 
+import json
+import threading
+from datetime import date
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models.tutoria import Tutoria
-from app.models.evaluacion import Evaluacion
-from app.models.estudiante import Estudiante
-from app.models.tutor import Tutor
-from typing import Dict, Any
+from sqlalchemy import text
+from typing import Dict, Any, Optional, Mapping
+
+from app.db.database import SessionLocal
+from app.services.periodo_service import TODOS_LOS_PERIODOS
+
+# Estados posibles de una tutoría (CHECK de la tabla), en el orden en que se muestran
+ESTADOS_TUTORIA = ("realizada", "no_asistio", "cancelada", "programada", "solicitada")
+# Contadores de cada fila de la vista (y de cmi_snapshots)
+CONTADORES = ESTADOS_TUTORIA + (
+    "tutores_activos", "num_evaluaciones", "suma_estrellas", "total_tutores", "total_estudiantes"
+)
+
+# Claves de las filas de totales de la vista cmi_periodo_carrera (migración 0003);
+# TODOS_LOS_PERIODOS es el mismo alcance que devuelve get_periodo_scope con ?periodo_id=all
+TODAS_LAS_CARRERAS = "*"
+
+# Tablas de las que se calcula la vista: si sus contadores no cambian, no se refresca
+TABLAS_ORIGEN = ("matriculas", "estudiantes", "tutorias", "evaluaciones")
+
+# Un solo refresco a la vez aunque haya varios workers o un cron en paralelo
+_LOCK_ID = "tutorias_unach.cmi_periodo_carrera"
+
+# Una fila siempre (k), aunque el corte no tenga datos: los contadores llegan en NULL
+_CMI_SQL = text("""
+    SELECT
+        pa.nombre AS periodo,
+        v.realizada, v.no_asistio, v.cancelada, v.programada, v.solicitada,
+        v.tutores_activos, v.num_evaluaciones, v.suma_estrellas,
+        v.total_tutores, v.total_estudiantes
+    FROM (SELECT CAST(:periodo_id AS INTEGER) AS periodo_id, CAST(:carrera AS VARCHAR) AS carrera) k
+    LEFT JOIN tutorias_unach.cmi_periodo_carrera v
+        ON v.periodo_id = k.periodo_id AND v.carrera = k.carrera
+    LEFT JOIN tutorias_unach.periodos_academicos pa ON pa.id = k.periodo_id
+""")
+
+# Todos los cortes del día en una sentencia: las filas (con los indicadores ya
+# calculados en Python) llegan como un arreglo JSON
+_GUARDAR_SNAPSHOT_SQL = text(f"""
+    INSERT INTO tutorias_unach.cmi_snapshots
+        (periodo_id, carrera, fecha, {", ".join(CONTADORES)},
+         tasa_asistencia, satisfaccion_promedio, ratio_tutor_estudiante, tasa_adherencia_tutores)
+    SELECT f.periodo_id, f.carrera, CURRENT_DATE, {", ".join("f." + c for c in CONTADORES)},
+           f.tasa_asistencia, f.satisfaccion_promedio, f.ratio_tutor_estudiante, f.tasa_adherencia_tutores
+    FROM jsonb_to_recordset(CAST(:filas AS JSONB)) AS f(
+        periodo_id INTEGER, carrera VARCHAR, {", ".join(c + " INTEGER" for c in CONTADORES)},
+        tasa_asistencia NUMERIC, satisfaccion_promedio NUMERIC,
+        ratio_tutor_estudiante NUMERIC, tasa_adherencia_tutores NUMERIC
+    )
+    ON CONFLICT (periodo_id, carrera, fecha) DO UPDATE SET
+        {", ".join(f"{c} = EXCLUDED.{c}" for c in CONTADORES)},
+        tasa_asistencia = EXCLUDED.tasa_asistencia,
+        satisfaccion_promedio = EXCLUDED.satisfaccion_promedio,
+        ratio_tutor_estudiante = EXCLUDED.ratio_tutor_estudiante,
+        tasa_adherencia_tutores = EXCLUDED.tasa_adherencia_tutores,
+        fecha_calculo = CURRENT_TIMESTAMP
+    RETURNING fecha
+""")
+
+# Lectura por rango de la clave primaria (periodo_id, carrera, fecha)
+_TENDENCIA_SQL = text("""
+    SELECT fecha, realizada, tasa_asistencia, satisfaccion_promedio,
+           ratio_tutor_estudiante, tasa_adherencia_tutores, tutores_activos, total_estudiantes
+    FROM tutorias_unach.cmi_snapshots
+    WHERE periodo_id = :periodo_id AND carrera = :carrera AND fecha BETWEEN :desde AND :hasta
+    ORDER BY fecha
+""")
+
+_VERSIONES_SQL = text("""
+    SELECT string_agg(tabla || ':' || version, ',' ORDER BY tabla)
+    FROM tutorias_unach.tabla_version
+    WHERE tabla = ANY(:tablas)
+""")
 
 
 class CMIService:
-    """Servicio para el Cuadro de Mando Integral (CMI)"""
-    
-    @staticmethod
-    def get_cmi_data(db: Session) -> Dict[str, Any]:
+    """
+    Servicio para el Cuadro de Mando Integral (CMI).
+    Los contadores salen de la vista materializada cmi_periodo_carrera: cada
+    dashboard es una búsqueda por su índice único y un job la refresca en segundo plano.
+    """
+
+    def __init__(self):
+        self._detener = threading.Event()
+        self._hilo = None
+        # Contadores de TABLAS_ORIGEN con los que este proceso refrescó la vista por última vez
+        self._versiones_refrescadas: Optional[str] = None
+        # Último día del que este proceso guardó el histórico
+        self._ultimo_snapshot: Optional[date] = None
+
+    def get_cmi_data(self, db: Session, periodo_id: int = TODOS_LOS_PERIODOS,
+                     carrera: Optional[str] = None) -> Dict[str, Any]:
         """
-        Calcula y retorna los indicadores clave de rendimiento (KPIs) para el CMI.
-        Cubre las 4 perspectivas: Estudiante, Procesos, Recursos y Aprendizaje.
+        Retorna el CMI de un período y una carrera (TODOS_LOS_PERIODOS / None = todos /
+        todas, las filas de totales de la vista). Cubre las 4 perspectivas: Estudiante, Procesos,
+        Recursos y Aprendizaje.
         """
-        
+        fila = db.execute(_CMI_SQL, self._clave(periodo_id, carrera)).mappings().one()
+
+        return {
+            # En la respuesta, null = todos los períodos (como antes)
+            "periodo_id": None if periodo_id == TODOS_LOS_PERIODOS else periodo_id,
+            "periodo": fila["periodo"],
+            "carrera": carrera,
+            "cmi": self.calcular_indicadores(fila),
+        }
+
+    @staticmethod
+    def calcular_indicadores(fila: Mapping[str, Any]) -> Dict[str, Any]:
+        """Arma las 4 perspectivas a partir de los contadores de una fila de la vista."""
+        c = {clave: (fila[clave] or 0) for clave in CONTADORES}
+
         # --- Perspectiva 1: Estudiante ---
         # 1. Tasa de Asistencia
-        total_tutorias_finalizadas = db.query(Tutoria).filter(
-            Tutoria.estado.in_(['realizada', 'no_asistio'])
-        ).count()
-        
-        tutorias_asistidas = db.query(Tutoria).filter(
-            Tutoria.estado == 'realizada'
-        ).count()
-        
+        total_tutorias_finalizadas = c["realizada"] + c["no_asistio"]
+        tutorias_asistidas = c["realizada"]
         tasa_asistencia = (
-            (tutorias_asistidas / total_tutorias_finalizadas * 100) 
-            if total_tutorias_finalizadas > 0 
+            (tutorias_asistidas / total_tutorias_finalizadas * 100)
+            if total_tutorias_finalizadas > 0
             else 0
         )
-        
+
         # 2. Satisfacción
-        satisfaccion_promedio = db.query(func.avg(Evaluacion.estrellas)).scalar() or 0
-        
+        satisfaccion_promedio = (
+            float(c["suma_estrellas"]) / c["num_evaluaciones"]
+            if c["num_evaluaciones"] > 0
+            else 0
+        )
+
         # --- Perspectiva 2: Procesos Internos ---
         # 3. Total Sesiones
         total_sesiones_realizadas = tutorias_asistidas
-        
-        # 4. Distribución
-        distribucion_estados = db.query(
-            Tutoria.estado, 
-            func.count(Tutoria.id)
-        ).group_by(Tutoria.estado).all()
-        
+
+        # 4. Distribución (solo los estados que tienen tutorías)
+        distribucion_estados = [(estado, c[estado]) for estado in ESTADOS_TUTORIA if c[estado] > 0]
+
         # --- Perspectiva 3: Recursos (Financiera/Recursos) ---
         # 5. Ratio
-        total_tutores = db.query(Tutor).count()
-        total_estudiantes = db.query(Estudiante).count()
+        total_tutores = c["total_tutores"]
+        total_estudiantes = c["total_estudiantes"]
         ratio_tutor_estudiante = (
-            total_estudiantes / total_tutores 
-            if total_tutores > 0 
+            total_estudiantes / total_tutores
+            if total_tutores > 0
             else 0
         )
-        
-        # --- Perspectiva 4: Aprendizaje y Crecimiento (NUEVA) ---
+
+        # --- Perspectiva 4: Aprendizaje y Crecimiento ---
         # Métrica: Tasa de Adherencia/Uso de Tutores.
         # Cuántos tutores han registrado al menos una tutoría vs el total.
-        tutores_activos = db.query(Tutoria.tutor_id).distinct().count()
+        tutores_activos = c["tutores_activos"]
         tasa_adherencia_tutores = (
             (tutores_activos / total_tutores * 100)
             if total_tutores > 0
             else 0
         )
-        
+
         # --- Ensamblaje del CMI ---
-        cmi = {
+        return {
             "perspectiva_estudiante": {
                 "tasa_asistencia": round(tasa_asistencia, 2),
                 "satisfaccion_promedio": round(satisfaccion_promedio, 2),
@@ -77,7 +169,7 @@ class CMIService:
             "perspectiva_procesos": {
                 "total_sesiones_realizadas": total_sesiones_realizadas,
                 "distribucion_estados": [
-                    {"name": estado, "value": count} 
+                    {"name": estado, "value": count}
                     for estado, count in distribucion_estados
                 ],
             },
@@ -91,8 +183,144 @@ class CMIService:
                 "tutores_activos": tutores_activos
             }
         }
-        
-        return cmi
+
+    def get_tendencia(self, db: Session, desde: date, hasta: date, periodo_id: int = TODOS_LOS_PERIODOS,
+                      carrera: Optional[str] = None) -> Dict[str, Any]:
+        """Serie diaria de los indicadores del CMI entre `desde` y `hasta` (desde cmi_snapshots)."""
+        filas = db.execute(
+            _TENDENCIA_SQL, {**self._clave(periodo_id, carrera), "desde": desde, "hasta": hasta}
+        ).mappings().all()
+
+        return {
+            "periodo_id": None if periodo_id == TODOS_LOS_PERIODOS else periodo_id,
+            "carrera": carrera,
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "serie": [
+                {
+                    "fecha": f["fecha"].isoformat(),
+                    "tasa_asistencia": float(f["tasa_asistencia"]),
+                    "satisfaccion_promedio": float(f["satisfaccion_promedio"]),
+                    "total_sesiones_realizadas": f["realizada"],
+                    "ratio_tutor_estudiante": float(f["ratio_tutor_estudiante"]),
+                    "tasa_adherencia_tutores": float(f["tasa_adherencia_tutores"]),
+                    "tutores_activos": f["tutores_activos"],
+                    "total_estudiantes": f["total_estudiantes"],
+                }
+                for f in filas
+            ],
+        }
+
+    def guardar_snapshot(self, db: Session) -> Optional[date]:
+        """
+        Guarda (o reescribe) la fila de hoy de cada corte de la vista en cmi_snapshots.
+        Solo toca el día en curso: el histórico no se recalcula. Devuelve la fecha guardada.
+        """
+        filas = []
+        for fila in db.execute(text("SELECT * FROM tutorias_unach.cmi_periodo_carrera")).mappings():
+            cmi = self.calcular_indicadores(fila)
+            filas.append({
+                "periodo_id": fila["periodo_id"],
+                "carrera": fila["carrera"],
+                **{c: fila[c] for c in CONTADORES},
+                "tasa_asistencia": cmi["perspectiva_estudiante"]["tasa_asistencia"],
+                "satisfaccion_promedio": cmi["perspectiva_estudiante"]["satisfaccion_promedio"],
+                "ratio_tutor_estudiante": cmi["perspectiva_recursos"]["ratio_tutor_estudiante"],
+                "tasa_adherencia_tutores": cmi["perspectiva_aprendizaje"]["tasa_adherencia_tutores"],
+            })
+        if not filas:
+            return None
+
+        try:
+            fecha = db.execute(_GUARDAR_SNAPSHOT_SQL, {"filas": json.dumps(filas)}).scalars().first()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return fecha
+
+    def refrescar_vista(self, db: Session) -> bool:
+        """
+        REFRESH MATERIALIZED VIEW CONCURRENTLY (los dashboards siguen leyendo mientras
+        tanto) y sube el contador de la vista para el ETag. No hace nada si las tablas
+        de origen no cambiaron desde el último refresco. Devuelve si refrescó.
+        """
+        bloqueado = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:lock))"), {"lock": _LOCK_ID}
+        ).scalar()
+        if not bloqueado:
+            db.rollback()
+            print("⚠️ Otro refresco de la vista del CMI está en curso.")
+            return False
+
+        # Se leen ANTES de refrescar: si algo cambia a mitad, el próximo refresco lo recoge
+        versiones = db.execute(_VERSIONES_SQL, {"tablas": list(TABLAS_ORIGEN)}).scalar()
+        if versiones is not None and versiones == self._versiones_refrescadas:
+            db.rollback()
+            return False
+
+        try:
+            db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY tutorias_unach.cmi_periodo_carrera"))
+            db.execute(text("""
+                INSERT INTO tutorias_unach.tabla_version (tabla, version) VALUES ('cmi_periodo_carrera', 1)
+                ON CONFLICT (tabla) DO UPDATE
+                    SET version = tabla_version.version + 1,
+                        fecha_actualizacion = CURRENT_TIMESTAMP
+            """))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self._versiones_refrescadas = versiones
+        return True
+
+    def ejecutar(self) -> bool:
+        """
+        Refresco con sesión propia (para el hilo periódico y scripts/refrescar_cmi.py).
+        Tras cada refresco reescribe el histórico de hoy; la primera corrida del día
+        lo guarda aunque la vista no haya cambiado, para que no falten días en la serie.
+        """
+        db = SessionLocal()
+        try:
+            refrescada = self.refrescar_vista(db)
+            if refrescada:
+                print("🔄 Vista del CMI actualizada.")
+
+            hoy = db.execute(text("SELECT CURRENT_DATE")).scalar()
+            if refrescada or self._ultimo_snapshot != hoy:
+                self._ultimo_snapshot = self.guardar_snapshot(db)
+                print(f"🗓️ Histórico del CMI guardado ({self._ultimo_snapshot}).")
+            return refrescada
+        finally:
+            db.close()
+
+    @staticmethod
+    def _clave(periodo_id: int, carrera: Optional[str]) -> Dict[str, Any]:
+        """Clave de un corte en la vista y en cmi_snapshots (carrera None = fila de totales)."""
+        return {
+            "periodo_id": periodo_id,
+            "carrera": TODAS_LAS_CARRERAS if carrera is None else carrera,
+        }
+
+    def iniciar_periodico(self, minutos: int) -> None:
+        """Refresca la vista cada `minutos` en un hilo de fondo del worker."""
+        if minutos <= 0 or self._hilo is not None:
+            return
+
+        def _bucle():
+            while not self._detener.wait(minutos * 60):
+                try:
+                    self.ejecutar()
+                except Exception as e:
+                    print(f"❌ ERROR al refrescar la vista del CMI: {e}")
+
+        self._detener.clear()
+        self._hilo = threading.Thread(target=_bucle, name="cmi-refresco", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        self._hilo = None
 
 # Instancia del servicio
-cmi_service = CMIService()
\ No newline at end of file
+cmi_service = CMIService()
@@ -3,90 +3,17 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import Dict, Any, List, Optional
-from datetime import datetime 
 
-from app.services.prediction_service import prediction_service
-from app.services.tutoria_service import tutoria_service
-from app.schemas.tutoria import TutoriaCreate
+from app.services.risk_score_service import risk_score_service
+from app.services.periodo_service import TODOS_LOS_PERIODOS
 
-def _crear_tutoria_proactiva(db: Session, matricula: Dict[str, Any], nivel_probabilidad: str) -> bool:
+def get_student_kpis(db: Session, estudiante_id: int, periodo_id: int = TODOS_LOS_PERIODOS) -> Dict[str, Any]:
     """
-    Función interna para crear una tutoría de refuerzo.
-    Incluye bloqueo de base de datos para evitar duplicados por concurrencia.
+    Obtiene los KPIs y el historial académico para un estudiante (de un período o de todos con TODOS_LOS_PERIODOS).
+    Solo lectura: las tutorías de refuerzo las crea el job de tutoria_proactiva_service.
     """
-    try:
-        # El tema indica claramente por qué se creó
-        tema_riesgo = f"Refuerzo Académico - Nivel {nivel_probabilidad}"
-
-        # -------------------------------------------------------------------------
-        # 🔒 BLOQUEO DE SEGURIDAD (SOLUCIÓN A DUPLICADOS)
-        # Bloqueamos la fila de la matrícula para que nadie más pueda leer/escribir
-        # sobre ella hasta que esta función termine. 
-        # Si React manda 2 peticiones, la segunda se quedará "congelada" aquí 
-        # esperando a que la primera termine. Cuando entre, ya verá el duplicado.
-        # -------------------------------------------------------------------------
-        db.execute(
-            text("SELECT id FROM tutorias_unach.matriculas WHERE id = :mid FOR UPDATE"), 
-            {"mid": matricula["matricula_id"]}
-        )
-
-        print(f"🔄 Verificando creación automática para Matrícula {matricula['matricula_id']}...")
-
-        # 1. FILTRO: Verificar si ya existe una tutoría idéntica ACTIVA
-        query_existente = text("""
-            SELECT 1 FROM tutorias_unach.tutorias
-            WHERE matricula_id = :matricula_id
-            AND (
-                (tema = :tema AND estado != 'cancelada')  -- Ya existe esta alerta específica
-                OR 
-                (estado IN ('solicitada', 'programada'))  -- Ya tiene una tutoría pendiente (cualquiera)
-            )
-        """)
-        ya_existe = db.execute(query_existente, {
-            "matricula_id": matricula["matricula_id"],
-            "tema": tema_riesgo
-        }).scalar()
-
-        if ya_existe:
-            print(f"⚠️ Alerta duplicada o pendiente detectada. No se crea nada.")
-            return False
-
-        if not matricula.get("tutor_id"):
-            print(f"⚠️ La materia no tiene tutor asignado. No se puede crear.")
-            return False
-        
-        # 2. Crear la tutoría
-        fecha_actual = datetime.now().replace(microsecond=0)
-        
-        tutoria_payload = TutoriaCreate(
-            matricula_id=matricula["matricula_id"],
-            tutor_id=matricula["tutor_id"],
-            fecha=fecha_actual, 
-            tema=tema_riesgo,
-            modalidad="Virtual"
-        )
-        
-        tutoria_service.create_tutoria(
-            db=db,
-            tutoria=tutoria_payload,
-            estudiante_id=matricula["estudiante_id"],
-            tema_predeterminado=tema_riesgo,
-            modalidad_predeterminada="Virtual"
-        )
-        print(f"✅ ¡ÉXITO! Tutoría automática creada y guardada.")
-        return True 
-        
-    except Exception as e:
-        print(f"❌ ERROR CRÍTICO al crear tutoría proactiva: {e}")
-        db.rollback()
-        return False
-
-
-def get_student_kpis(db: Session, estudiante_id: int) -> Dict[str, Any]:
-    """
-    Obtiene los KPIs y el historial académico para un estudiante.
-    """
-    query_historial = text("""
+    filtro_periodo = "AND m.periodo_id = :periodo_id" if periodo_id != TODOS_LOS_PERIODOS else ""
+    query_historial = text(f"""
         SELECT 
             pa.nombre AS periodo,
             a.nombre AS asignatura,
@@ -105,17 +32,21 @@ def get_student_kpis(db: Session, estudiante_id: int) -> Dict[str, Any]:
         LEFT JOIN tutorias_unach.notas n ON m.id = n.matricula_id
         LEFT JOIN tutorias_unach.tutores t ON m.tutor_id = t.id
         LEFT JOIN tutorias_unach.usuarios t_u ON t.usuario_id = t_u.id
-        WHERE m.estudiante_id = :estudiante_id
+        WHERE m.estudiante_id = :estudiante_id {filtro_periodo}
         ORDER BY m.periodo_id DESC, a.nombre;
     """)
     
-    historial_result = db.execute(query_historial, {"estudiante_id": estudiante_id}).mappings().all()
+    historial_result = db.execute(
+        query_historial, {"estudiante_id": estudiante_id, "periodo_id": periodo_id}
+    ).mappings().all()
     
     historial_detallado = []
     suma_finales, total_finales = 0, 0
-    
-    # Control local para esta ejecución (por si hay duplicados en el mismo query)
-    tutorias_creadas_en_loop = set()
+
+    # Riesgo precalculado (riesgo_matricula); lo desactualizado sale pendiente hasta el próximo recálculo
+    riesgo_por_matricula = risk_score_service.get_risk_map(db, [
+        m['matricula_id'] for m in historial_result if m.get('situacion') not in ['APROBADO', 'REPROBADO']
+    ])
     
     for materia in historial_result:
         materia_dict = dict(materia)
@@ -123,22 +54,8 @@ def get_student_kpis(db: Session, estudiante_id: int) -> Dict[str, Any]:
         
         # Lógica de Riesgo
         if materia_dict.get('situacion') not in ['APROBADO', 'REPROBADO']:
-            risk_data = prediction_service.predict_risk(
-                db=db, 
-                estudiante_id=materia_dict['estudiante_id'], 
-                matricula_id=mid
-            )
+            risk_data = riesgo_por_matricula[mid]
             materia_dict.update(risk_data)
-            
-            probabilidad_aprobacion = risk_data.get('riesgo_nivel') 
-            
-            # Solo si la Probabilidad de éxito es BAJA o MEDIA (Riesgo real)
-            if probabilidad_aprobacion in ['BAJO', 'MEDIO']:
-                # Evitamos intentar crear 2 veces para la misma matrícula en el mismo loop
-                if mid not in tutorias_creadas_en_loop:
-                    resultado = _crear_tutoria_proactiva(db, materia_dict, probabilidad_aprobacion)
-                    if resultado:
-                        tutorias_creadas_en_loop.add(mid)
         else:
             if materia_dict.get('situacion') == 'REPROBADO':
                 materia_dict['riesgo_nivel'] = 'BAJO'
@@ -0,0 +1,182 @@
+# backend/app/services/data_quality_service.py
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+# Recorrido de cada tabla auditada: una subconsulta `x` con `id` y las columnas que usan las reglas.
+# matriculas trae sus notas, el estado del período y su clave (estudiante, asignatura, período).
+# Sin funciones de ventana: get_detalle pagina por x.id y el filtro llega al índice de la clave primaria.
+ESCANEOS = {
+    "usuarios": "SELECT id, correo FROM tutorias_unach.usuarios",
+    "estudiantes": "SELECT id, carrera FROM tutorias_unach.estudiantes",
+    "matriculas": """
+        SELECT
+            m.id, m.estudiante_id, m.asignatura_id, m.periodo_id,
+            pa.fecha_fin < CURRENT_DATE AS periodo_cerrado,
+            n.matricula_id IS NOT NULL AS tiene_notas,
+            n.parcial1, n.parcial2, n.final, n.suspension, n.situacion
+        FROM tutorias_unach.matriculas m
+        JOIN tutorias_unach.periodos_academicos pa ON m.periodo_id = pa.id
+        LEFT JOIN tutorias_unach.notas n ON m.id = n.matricula_id
+    """,
+    "tutorias": "SELECT id, matricula_id, estado, fecha FROM tutorias_unach.tutorias",
+}
+
+# Reglas (ISO/IEC 25012): clave -> (dimensión, tabla, descripción, condición que cumple un registro con falla)
+REGLAS_CALIDAD = {
+    "carrera_faltante": (
+        "completitud", "estudiantes", "Estudiantes sin carrera.",
+        "x.carrera IS NULL"),
+    "notas_faltantes": (
+        "completitud", "matriculas", "Matrículas de períodos cerrados sin registro de notas.",
+        "x.periodo_cerrado AND NOT x.tiene_notas"),
+    "notas_incompletas": (
+        "completitud", "matriculas", "Matrículas de períodos cerrados sin algún parcial o sin situación.",
+        "x.periodo_cerrado AND x.tiene_notas AND (x.parcial1 IS NULL OR x.parcial2 IS NULL OR x.situacion IS NULL)"),
+    "notas_fuera_de_rango": (
+        "exactitud", "matriculas", "Notas fuera del rango 0-10.",
+        "(x.parcial1 NOT BETWEEN 0 AND 10 OR x.parcial2 NOT BETWEEN 0 AND 10 "
+        "OR x.final NOT BETWEEN 0 AND 10 OR x.suspension NOT BETWEEN 0 AND 10)"),
+    "situacion_invalida": (
+        "exactitud", "matriculas", "Situación distinta de APROBADO o REPROBADO.",
+        "x.situacion NOT IN ('APROBADO', 'REPROBADO')"),
+    "correo_no_institucional": (
+        "precision", "usuarios", "Usuarios sin correo institucional (@unach.edu.ec).",
+        "x.correo NOT LIKE '%@unach.edu.ec'"),
+    "matriculas_duplicadas": (
+        "consistencia", "matriculas", "Matrículas repetidas del mismo estudiante, asignatura y período.",
+        "EXISTS (SELECT 1 FROM tutorias_unach.matriculas m2 WHERE m2.periodo_id = x.periodo_id "
+        "AND m2.estudiante_id = x.estudiante_id AND m2.asignatura_id = x.asignatura_id AND m2.id < x.id)"),
+    "tutorias_huerfanas": (
+        "consistencia", "tutorias", "Tutorías sin matrícula.",
+        "x.matricula_id IS NULL"),
+    "realizadas_futuras": (
+        "consistencia", "tutorias", "Tutorías realizadas con fecha futura.",
+        "x.estado = 'realizada' AND CAST(x.fecha AS DATE) > CURRENT_DATE"),
+}
+
+DIMENSIONES = ("completitud", "exactitud", "precision", "consistencia")
+
+# Contadores de versión de lo que se audita (mismas filas que usa el ETag)
+TABLAS_AUDITADAS = ("usuarios", "estudiantes", "periodos_academicos", "matriculas", "notas", "tutorias")
+
+# La fecha sale de la base (las reglas comparan con su CURRENT_DATE), en la misma lectura
+_VERSIONES_SQL = text("""
+    SELECT string_agg(tabla || ':' || version, ',' ORDER BY tabla) AS versiones, CURRENT_DATE AS hoy
+    FROM tutorias_unach.tabla_version
+    WHERE tabla = ANY(:tablas)
+""")
+
+
+def _conteo_sql(tabla: str) -> Tuple[Any, List[str]]:
+    """Una sola pasada por `tabla`: el total y una columna FILTER por cada regla de esa tabla."""
+    reglas = [clave for clave, (_, t, _, _) in REGLAS_CALIDAD.items() if t == tabla]
+    columnas = ",\n".join(
+        f"COUNT(*) FILTER (WHERE {REGLAS_CALIDAD[clave][3]}) AS {clave}" for clave in reglas
+    )
+    return text(f"SELECT COUNT(*) AS total, {columnas} FROM ({ESCANEOS[tabla]}) x"), reglas
+
+
+class DataQualityService:
+    """
+    Calidad de datos (ISO/IEC 25012). Cada tabla se recorre una vez y todas sus
+    reglas salen como agregados FILTER de esa misma pasada. El resultado se guarda
+    por versión de datos (contadores de tabla_version y fecha del día en la base).
+    """
+
+    def __init__(self):
+        self._cache: Optional[Tuple[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def get_metricas(self, db: Session) -> Dict[str, Any]:
+        """
+        Índice global, puntaje por dimensión y detalle por regla
+        (evaluados, fallas y porcentaje de cumplimiento).
+        """
+        clave = self._version(db)
+        with self._lock:
+            cache = self._cache
+        if clave is not None and cache and cache[0] == clave:
+            return cache[1]
+
+        reglas, registros = [], 0
+        for tabla in ESCANEOS:
+            query, claves = _conteo_sql(tabla)
+            fila = db.execute(query).mappings().one()
+            registros += fila['total']
+            for regla in claves:
+                dimension, _, descripcion, _ = REGLAS_CALIDAD[regla]
+                reglas.append({
+                    "regla": regla,
+                    "dimension": dimension,
+                    "tabla": tabla,
+                    "descripcion": descripcion,
+                    "evaluados": fila['total'],
+                    "fallas": fila[regla],
+                    "cumplimiento": self._porcentaje(fila['total'], fila[regla])
+                })
+
+        metricas = {}
+        for dimension in DIMENSIONES:
+            de_dimension = [r for r in reglas if r['dimension'] == dimension]
+            metricas[dimension] = self._porcentaje(
+                sum(r['evaluados'] for r in de_dimension), sum(r['fallas'] for r in de_dimension)
+            )
+        indice_global = round(sum(metricas.values()) / len(DIMENSIONES), 2)
+        metricas["registros_auditados"] = registros
+
+        resultado = {
+            "indice_global": indice_global,
+            "metricas": metricas,
+            "reglas": reglas,
+            "estado": "ÓPTIMO" if indice_global > 90 else "MEJORABLE"
+        }
+        if clave is not None:
+            with self._lock:
+                self._cache = (clave, resultado)
+        return resultado
+
+    def get_detalle(self, db: Session, regla: str, limit: int = 100,
+                    despues_de: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """
+        IDs de los registros que no cumplen `regla`, en orden y paginados por keyset
+        (`despues_de` es el `siguiente` de la página anterior).
+        """
+        _, tabla, _, condicion = REGLAS_CALIDAD[regla]
+        filtro_cursor = "AND x.id > :despues_de" if despues_de is not None else ""
+        query = text(f"""
+            SELECT x.id
+            FROM ({ESCANEOS[tabla]}) x
+            WHERE {condicion} {filtro_cursor}
+            ORDER BY x.id
+            LIMIT :limit
+        """)
+        ids = db.execute(query, {
+            "despues_de": despues_de[0] if despues_de is not None else None, "limit": limit + 1
+        }).scalars().all()
+
+        siguiente = [ids[limit - 1]] if len(ids) > limit else None
+        return {"regla": regla, "tabla": tabla, "ids": list(ids[:limit]), "limit": limit, "siguiente": siguiente}
+
+    def _version(self, db: Session) -> Optional[str]:
+        """Clave de caché: contadores de las tablas auditadas + CURRENT_DATE de la base (lo usan las reglas)."""
+        try:
+            fila = db.execute(_VERSIONES_SQL, {"tablas": list(TABLAS_AUDITADAS)}).one()
+        except Exception as e:
+            print(f"Sin contadores de versión, calidad de datos sin caché: {e}")
+            db.rollback()
+            return None
+        if fila.versiones is None:
+            return None
+        return f"{fila.versiones}|{fila.hoy}"
+
+    @staticmethod
+    def _porcentaje(evaluados: int, fallas: int) -> float:
+        if evaluados == 0:
+            return 100.0
+        return round((evaluados - fallas) / evaluados * 100, 2)
+
+# Instancia del servicio
+data_quality_service = DataQualityService()
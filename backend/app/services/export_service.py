@@ -0,0 +1,103 @@
+# backend/app/services/export_service.py
+
+import csv
+import io
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from app.db.database import SessionLocal
+from app.services.report_service import report_service
+from app.services.periodo_service import TODOS_LOS_PERIODOS
+
+# Columnas del reporte del coordinador: (encabezado, clave de la fila)
+COLUMNAS_REPORTE = (
+    ("Periodo", "periodo"),
+    ("Carrera", "carrera"),
+    ("Tutor", "tutor_nombre"),
+    ("Asignatura", "asignatura"),
+    ("Estudiantes", "total_estudiantes"),
+    ("Aprobados", "total_aprobados"),
+    ("Reprobados", "total_reprobados"),
+    ("Tutorías Registradas", "total_tutorias_registradas"),
+    ("Tutorías Realizadas", "tutorias_realizadas"),
+    ("Tutorías Canceladas", "tutorias_canceladas"),
+    ("No Asistió", "tutorias_no_asistidas"),
+    ("Satisfacción", "satisfaccion_promedio"),
+)
+
+TIPOS_CONTENIDO = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Filas por escritura del CSV y bytes por trozo al enviar el XLSX
+_FILAS_POR_TROZO = 500
+_BYTES_POR_TROZO = 64 * 1024
+
+
+class ExportService:
+    """
+    Exportación del reporte del coordinador como flujo de bytes (StreamingResponse).
+    Las filas llegan de un cursor de servidor y se escriben a medida que se leen:
+    la memoria no depende del número de filas.
+    """
+
+    def reporte_coordinador(
+        self,
+        formato: str,
+        periodo_id: int = TODOS_LOS_PERIODOS,
+        carrera: Optional[str] = None,
+        tutor_id: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """
+        Bytes del archivo `formato` (csv o xlsx). Usa una sesión propia: la respuesta
+        se sigue enviando después de que termina el endpoint.
+        """
+        db = SessionLocal()
+        try:
+            filas = report_service.iter_coordinator_report(db, periodo_id, carrera, tutor_id)
+            escribir = self.escribir_csv if formato == "csv" else self.escribir_xlsx
+            yield from escribir(filas)
+        finally:
+            db.close()
+
+    @staticmethod
+    def escribir_csv(filas: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # BOM para que Excel abra el CSV como UTF-8 (tildes y eñes)
+        buffer.write("\ufeff")
+        writer.writerow([encabezado for encabezado, _ in COLUMNAS_REPORTE])
+
+        for i, fila in enumerate(filas, start=1):
+            writer.writerow([fila[clave] for _, clave in COLUMNAS_REPORTE])
+            if i % _FILAS_POR_TROZO == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def escribir_xlsx(filas: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+        # openpyxl se importa aquí: importar app.main no debe pagar por él (ni por numpy)
+        from openpyxl import Workbook
+
+        # Modo write-only: cada fila se vuelca a disco al agregarla. El XLSX es un zip
+        # que se cierra al final, así que se arma en un temporal y luego se envía por trozos.
+        libro = Workbook(write_only=True)
+        hoja = libro.create_sheet("Reporte Tutorías")
+        hoja.append([encabezado for encabezado, _ in COLUMNAS_REPORTE])
+        for fila in filas:
+            hoja.append([fila[clave] for _, clave in COLUMNAS_REPORTE])
+
+        with tempfile.TemporaryFile() as archivo:
+            libro.save(archivo)
+            archivo.seek(0)
+            while True:
+                trozo = archivo.read(_BYTES_POR_TROZO)
+                if not trozo:
+                    break
+                yield trozo
+
+# Instancia del servicio
+export_service = ExportService()
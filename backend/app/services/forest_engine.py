@@ -0,0 +1,133 @@
+# backend/app/services/forest_engine.py
+
+import numpy as np
+
+# A partir de este tamaño de lote se recorre árbol por árbol: el recorrido de todos los
+# árboles a la vez crea arreglos (árboles × n) en cada nivel y se vuelve más lento que sklearn
+LOTE_POR_ARBOL = 1024
+
+
+class FlatForest:
+    """
+    Evaluador del RandomForest exportado como arreglos planos de NumPy.
+    No necesita scikit-learn: todos los árboles viven en los mismos arreglos
+    (índices globales) y se recorren a la vez para todo el lote.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth):
+        self.feature = feature        # Columna que evalúa cada nodo
+        self.threshold = threshold    # Umbral del nodo (X <= umbral -> izquierda)
+        self.left = left              # Hijo izquierdo (las hojas apuntan a sí mismas)
+        self.right = right            # Hijo derecho (las hojas apuntan a sí mismas)
+        self.value = value            # P(clase 1) en las hojas
+        self.roots = roots            # Nodo raíz de cada árbol
+        self.max_depth = int(max_depth)
+
+        # Formas listas para indexar: hijos intercalados [izq, der] y enteros nativos
+        self._hijos = np.stack([left, right], axis=1).ravel().astype(np.intp)
+        self._feature = feature.astype(np.intp)
+        self._roots = roots.astype(np.intp)
+        self._profundidades = self._profundidad_por_arbol()
+
+    def _profundidad_por_arbol(self) -> np.ndarray:
+        """Profundidad de cada árbol, deducida de los hijos (los nodos de un árbol son contiguos)."""
+        nodos = np.arange(len(self.left))
+        internos = nodos[self.left != nodos]
+        profundidad = np.zeros(len(nodos), dtype=np.int32)
+        for _ in range(self.max_depth):
+            profundidad[self.left[internos]] = profundidad[internos] + 1
+            profundidad[self.right[internos]] = profundidad[internos] + 1
+        return np.maximum.reduceat(profundidad, self._roots)
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatForest":
+        """Aplana un RandomForestClassifier ya entrenado."""
+        clase_positiva = list(model.classes_).index(1)
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset, max_depth = 0, 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            es_hoja = tree.children_left == -1
+            propio = np.arange(n) + offset
+
+            # sklearn guarda fracciones (o conteos en versiones antiguas): normalizamos
+            v = tree.value[:, 0, :]
+            v = v / v.sum(axis=1, keepdims=True)
+
+            features.append(np.where(es_hoja, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(es_hoja, propio, tree.children_left + offset))
+            rights.append(np.where(es_hoja, propio, tree.children_right + offset))
+            values.append(v[:, clase_positiva])
+            roots.append(offset)
+
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "FlatForest":
+        with np.load(path) as data:
+            return cls(
+                feature=data["feature"],
+                threshold=data["threshold"],
+                left=data["left"],
+                right=data["right"],
+                value=data["value"],
+                roots=data["roots"],
+                max_depth=data["max_depth"],
+            )
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            max_depth=np.int32(self.max_depth),
+        )
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Misma salida que RandomForestClassifier.predict_proba: columnas [P(0), P(1)]."""
+        # sklearn compara en float32 contra umbrales float64; replicamos la conversión
+        X = np.asarray(X, dtype=np.float32)
+        n = X.shape[0]
+
+        # X por columnas: el valor de la muestra j en la columna f está en f * n + j
+        columnas = np.ascontiguousarray(X.T).ravel()
+        desplazamiento = self._feature * n
+        muestras = np.arange(n, dtype=np.intp)
+
+        if n < LOTE_POR_ARBOL:
+            # Lotes chicos: todos los árboles a la vez, un nodo actual por (árbol, muestra);
+            # las hojas apuntan a sí mismas y se quedan fijas
+            nodos = np.repeat(self._roots[:, None], n, axis=1)
+            for _ in range(self.max_depth):
+                va_derecha = columnas[desplazamiento[nodos] + muestras] > self.threshold[nodos]
+                nodos = self._hijos[2 * nodos + va_derecha]
+            p = self.value[nodos].mean(axis=0)
+        else:
+            # Lotes grandes: árbol por árbol (arreglos de n y nodos contiguos en caché)
+            suma = np.zeros(n, dtype=np.float64)
+            for raiz, profundidad in zip(self._roots.tolist(), self._profundidades.tolist()):
+                nodos = np.full(n, raiz, dtype=np.intp)
+                for _ in range(profundidad):
+                    va_derecha = columnas[desplazamiento[nodos] + muestras] > self.threshold[nodos]
+                    nodos = self._hijos[2 * nodos + va_derecha]
+                suma += self.value[nodos]
+            p = suma / len(self._roots)
+        return np.column_stack([1.0 - p, p])
@@ -0,0 +1,134 @@
+# backend/app/services/inference_executor.py
+
+import time
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+# True dentro de los procesos del pool: ahí la inferencia siempre es local
+_en_worker = False
+
+
+def _init_worker():
+    """Inicializador de cada proceso del pool: carga el modelo una sola vez."""
+    global _en_worker
+    _en_worker = True
+    from app.services.prediction_service import prediction_service
+    prediction_service.warmup()
+
+
+class InferenceExecutor:
+    """
+    Pool de procesos acotado para el trabajo de CPU puro (predict_proba, KMeans).
+    Así ese cálculo no retiene el GIL del worker web y no frena login, tutorías, etc.
+    Con INFERENCE_PROCESSES=0 está desactivado y todo corre en el propio proceso.
+    """
+
+    def __init__(self, procesos: int, max_pendientes: int, min_filas: int):
+        self.procesos = procesos
+        self.max_pendientes = max_pendientes
+        self.min_filas = min_filas
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._cupos = threading.BoundedSemaphore(max_pendientes)
+
+        # Contadores de cola y latencia
+        self._pendientes = 0
+        self._max_pendientes_visto = 0
+        self._completadas = 0
+        self._errores = 0
+        self._latencia_total = 0.0
+        self._latencia_max = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.procesos > 0 and not _en_worker
+
+    def should_offload(self, filas: int) -> bool:
+        """Los lotes pequeños no compensan el costo de enviarlos a otro proceso."""
+        return self.enabled and filas >= self.min_filas
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # spawn: el servidor tiene hilos y fork podría heredar locks tomados
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.procesos,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                    )
+        return self._pool
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        """Envía el trabajo al pool; el cupo ya debe estar tomado."""
+        inicio = time.perf_counter()
+        with self._lock:
+            self._pendientes += 1
+            self._max_pendientes_visto = max(self._max_pendientes_visto, self._pendientes)
+
+        def _terminar(futuro: Future):
+            latencia = time.perf_counter() - inicio
+            with self._lock:
+                self._pendientes -= 1
+                self._completadas += 1
+                if futuro.cancelled() or futuro.exception() is not None:
+                    self._errores += 1
+                if not futuro.cancelled() and isinstance(futuro.exception(), BrokenProcessPool):
+                    # Un proceso murió: el siguiente envío crea un pool nuevo
+                    self._pool = None
+                self._latencia_total += latencia
+                self._latencia_max = max(self._latencia_max, latencia)
+            self._cupos.release()
+
+        try:
+            futuro = self._get_pool().submit(fn, *args)
+        except Exception as e:
+            with self._lock:
+                self._pendientes -= 1
+                self._errores += 1
+                if isinstance(e, BrokenProcessPool):
+                    self._pool = None
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(_terminar)
+        return futuro
+
+    def run(self, fn: Callable, *args) -> Any:
+        """
+        Ejecuta `fn` en el pool y espera el resultado (los endpoints son `def` y corren
+        en el threadpool): el hilo espera sin retener el GIL mientras el proceso calcula.
+        """
+        self._cupos.acquire()
+        return self._submit(fn, *args).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "habilitado": self.procesos > 0,
+                "procesos": self.procesos,
+                "en_cola": self._pendientes,
+                "max_en_cola": self._max_pendientes_visto,
+                "limite_cola": self.max_pendientes,
+                "completadas": self._completadas,
+                "errores": self._errores,
+                "latencia_promedio_ms": round(self._latencia_total / self._completadas * 1000, 2) if self._completadas else 0.0,
+                "latencia_max_ms": round(self._latencia_max * 1000, 2),
+            }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Instancia única por worker
+inference_executor = InferenceExecutor(
+    procesos=settings.INFERENCE_PROCESSES,
+    max_pendientes=settings.INFERENCE_MAX_PENDING,
+    min_filas=settings.INFERENCE_OFFLOAD_MIN_ROWS,
+)
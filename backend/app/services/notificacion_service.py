@@ -0,0 +1,170 @@
+# backend/app/services/notificacion_service.py
+
+import json
+import select
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, List, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+from app.db.database import engine
+
+# Un solo canal para todas las tutorías; cada evento lleva su tutor_id y el worker
+# se lo entrega solo a los streams de ese tutor
+CANAL = "tutorias_tutor"
+
+# Cada cuánto se manda un comentario SSE para que proxies y navegador no corten la conexión
+LATIDO_SEGUNDOS = 15
+# Cuánto espera EventSource antes de reconectarse
+RECONEXION_MS = 5000
+
+_NOTIFICAR_SQL = text(f"""
+    SELECT pg_notify('{CANAL}', json_build_object(
+        'evento', CAST(:evento AS TEXT),
+        'id', t.id,
+        'tutor_id', t.tutor_id,
+        'estado', t.estado,
+        'estudiante', u.nombre,
+        'fecha_solicitada', t.fecha,
+        'tema', LEFT(t.tema, 200)  -- El payload de NOTIFY no puede pasar de 8000 bytes
+    )::text)
+    FROM tutorias_unach.tutorias t
+    LEFT JOIN tutorias_unach.matriculas m ON t.matricula_id = m.id
+    LEFT JOIN tutorias_unach.estudiantes e ON m.estudiante_id = e.id
+    LEFT JOIN tutorias_unach.usuarios u ON e.usuario_id = u.id
+    WHERE t.id = ANY(:ids)
+""")
+
+
+class NotificacionService:
+    """
+    Avisos en tiempo real de las tutorías de cada tutor (LISTEN/NOTIFY de PostgreSQL).
+    Quien escribe hace pg_notify dentro de su transacción; cada worker mantiene UNA
+    conexión de escucha (se abre con el primer suscriptor) y reparte los eventos a las
+    colas asyncio de los streams SSE abiertos, sin ocupar una conexión por cliente.
+    """
+
+    def __init__(self, espera_segundos: float = 5.0):
+        self.espera_segundos = espera_segundos
+        self._suscriptores: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def notificar(self, db: Session, tutoria_ids: List[int], evento: str) -> None:
+        """
+        Encola el aviso de las tutorías en la transacción de `db`.
+        PostgreSQL solo lo entrega si la transacción hace COMMIT.
+        """
+        if not tutoria_ids:
+            return
+        db.flush()  # Los cambios del ORM tienen que verse en la consulta del payload
+        db.execute(_NOTIFICAR_SQL, {"ids": list(tutoria_ids), "evento": evento})
+
+    # --- Suscripciones (desde el event loop del servidor) ---
+
+    def suscribir(self, tutor_id: int) -> asyncio.Queue:
+        cola = asyncio.Queue(maxsize=100)
+        with self._lock:
+            self._suscriptores.setdefault(tutor_id, []).append((asyncio.get_running_loop(), cola))
+            if self._hilo is None:
+                self._detener.clear()
+                self._hilo = threading.Thread(target=self._escuchar, name="notificaciones-tutorias", daemon=True)
+                self._hilo.start()
+        return cola
+
+    def desuscribir(self, tutor_id: int, cola: asyncio.Queue) -> None:
+        with self._lock:
+            restantes = [s for s in self._suscriptores.get(tutor_id, []) if s[1] is not cola]
+            if restantes:
+                self._suscriptores[tutor_id] = restantes
+            else:
+                self._suscriptores.pop(tutor_id, None)
+
+    async def eventos_sse(self, tutor_id: int, desconectado: Callable[[], Awaitable[bool]]):
+        """Generador del stream text/event-stream de un tutor."""
+        cola = self.suscribir(tutor_id)
+        try:
+            yield f"retry: {RECONEXION_MS}\n\n"
+            while not await desconectado():
+                try:
+                    evento = await asyncio.wait_for(cola.get(), timeout=LATIDO_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: tutoria\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+        finally:
+            self.desuscribir(tutor_id, cola)
+
+    # --- Conexión de escucha (hilo de fondo) ---
+
+    def _escuchar(self) -> None:
+        primera_vez = True
+        while not self._detener.is_set():
+            conexion = None
+            try:
+                # Conexión propia, fuera del pool: queda en LISTEN mientras viva el worker
+                cargs, cparams = engine.dialect.create_connect_args(engine.url)
+                conexion = engine.dialect.connect(*cargs, **cparams)
+                conexion.autocommit = True
+                conexion.cursor().execute(f"LISTEN {CANAL}")
+
+                # Tras una caída pudo perderse algún aviso: los clientes recargan su lista
+                if not primera_vez:
+                    self._repartir_a_todos({"evento": "recargar"})
+                primera_vez = False
+
+                while not self._detener.is_set():
+                    if select.select([conexion], [], [], self.espera_segundos) == ([], [], []):
+                        continue
+                    conexion.poll()
+                    while conexion.notifies:
+                        self._repartir(conexion.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"❌ Escucha de notificaciones caída, reintentando: {e}")
+                self._detener.wait(self.espera_segundos)
+            finally:
+                if conexion is not None:
+                    try:
+                        conexion.close()
+                    except Exception:
+                        pass
+
+    def _repartir(self, payload: str) -> None:
+        try:
+            evento = json.loads(payload)
+        except ValueError:
+            return
+        with self._lock:
+            destinos = list(self._suscriptores.get(evento.get("tutor_id"), []))
+        self._entregar(destinos, evento)
+
+    def _repartir_a_todos(self, evento: dict) -> None:
+        with self._lock:
+            destinos = [s for suscritos in self._suscriptores.values() for s in suscritos]
+        self._entregar(destinos, evento)
+
+    def _entregar(self, destinos, evento: dict) -> None:
+        for loop, cola in destinos:
+            try:
+                loop.call_soon_threadsafe(self._encolar, cola, evento)
+            except RuntimeError:
+                pass  # El loop ya se cerró (worker apagándose)
+
+    @staticmethod
+    def _encolar(cola: asyncio.Queue, evento: dict) -> None:
+        try:
+            cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente demasiado lento: se descartan sus deltas y se le pide recargar
+            while not cola.empty():
+                cola.get_nowait()
+            cola.put_nowait({"evento": "recargar"})
+
+    def detener(self) -> None:
+        self._detener.set()
+        self._hilo = None
+
+# Instancia del servicio
+notificacion_service = NotificacionService()
@@ -0,0 +1,56 @@
+# backend/app/services/periodo_service.py
+
+import time
+import threading
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+from app.core.config import settings
+
+# Alcance "todos los períodos" (?periodo_id=all). Ningún período real tiene id 0;
+# es también la clave de las filas de totales de la vista del CMI.
+TODOS_LOS_PERIODOS = 0
+
+
+class PeriodoService:
+    """
+    Resuelve el período académico activo una vez y lo guarda en memoria unos segundos:
+    dashboards y reportes lo consultan en cada petición.
+    """
+
+    def __init__(self, ttl_segundos: int):
+        self.ttl_segundos = ttl_segundos
+        self._periodo_activo: Optional[int] = None
+        self._expira = 0.0
+        self._lock = threading.Lock()
+
+    def get_periodo_activo_id(self, db: Session) -> Optional[int]:
+        """
+        Período marcado como activo; si no hay ninguno, el que contiene la fecha actual
+        y si tampoco, el más reciente. None solo si no existen períodos.
+        """
+        if time.monotonic() < self._expira:
+            return self._periodo_activo
+
+        query = text("""
+            SELECT id FROM tutorias_unach.periodos_academicos
+            ORDER BY
+                activo IS TRUE DESC,
+                (CURRENT_DATE BETWEEN fecha_inicio AND fecha_fin) DESC,
+                fecha_inicio DESC
+            LIMIT 1
+        """)
+        periodo_id = db.execute(query).scalar()
+
+        with self._lock:
+            self._periodo_activo = periodo_id
+            self._expira = time.monotonic() + self.ttl_segundos
+        return periodo_id
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._expira = 0.0
+
+# Instancia del servicio
+periodo_service = PeriodoService(ttl_segundos=settings.ACTIVE_PERIOD_CACHE_SECONDS)
@@ -1,44 +1,227 @@
 # backend/app/services/prediction_service.py
 
 import os
-import joblib
-import pandas as pd
-import numpy as np
+import json
+import time
+import hashlib
+import warnings
+import threading
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from sklearn.cluster import KMeans
-from typing import Dict, Any, List
+from typing import Dict, Any, List, TYPE_CHECKING
+from app.core.config import settings
+from app.services.inference_executor import inference_executor
+
+# NumPy, pandas, joblib y scikit-learn se importan dentro de los métodos que los usan:
+# importar app.main (cada worker y cada --reload) no debe pagar por ellos.
+if TYPE_CHECKING:
+    import numpy as np
+
+# Rejilla de probabilidades para el caso "solo Parcial 1":
+# p1 es NUMERIC(4,2) en 0-10 (1001 valores) y las tutorías se recortaron a 0-15 al entrenar.
+GRID_P1_PASOS = 1001
+GRID_TUTORIAS_MAX = 15
+
+# Desde este tamaño de lote se usa el modelo de scikit-learn si está junto al bosque aplanado:
+# recorre los árboles en C y le gana en lotes grandes (reescrituras masivas, rejilla)
+LOTE_SKLEARN = 5000
+
+# Reglas de certeza (no usan el modelo): (probabilidad, color, nivel, mensaje).
+# RiskScoreService las evalúa también en SQL (REGLA_SQL) con estos mismos nombres.
+REGLAS_CERTEZA = {
+    "aprobado": (100.0, "green", "ALTO", "Materia aprobada oficialmente."),
+    "reprobado": (0.0, "red", "BAJO", "Materia reprobada oficialmente."),
+    "suficiente": (100.0, "green", "ALTO", "Promedio final suficiente."),
+    "insuficiente": (0.0, "red", "BAJO", "Promedio insuficiente."),
+    "sin_notas": (0.0, "gray", "N/D", "Sin calificaciones."),
+}
 
 class PredictionService:
     def __init__(self):
         self.model_path = "app/models/tutoria_risk_model.joblib"
-        self.model = self._load_model()
+        self.forest_path = "app/models/tutoria_risk_model_forest.npz"
+        self.grid_path = "app/models/tutoria_risk_model_grid.npy"
+        self.meta_path = "app/models/tutoria_risk_model.meta.json"
+
+        # El modelo se carga en el primer uso (o con warmup())
+        self._model = None
+        self._model_version = None
+        self._model_meta = None
+        self._grid = None
+        self._loaded = False
+        # Modelo de scikit-learn para lotes grandes (se carga en el primer lote grande)
+        self._sklearn = None
+        self._sklearn_cargado = False
+        self._lock = threading.Lock()
+
+        # Clusters por período: {periodo_id: (versión de datos, resultado)}
+        self._clusters_cache: Dict[int, tuple] = {}
+        self._clusters_lock = threading.Lock()
+
+    @property
+    def model(self):
+        self._ensure_loaded()
+        return self._model
+
+    @property
+    def model_version(self):
+        self._ensure_loaded()
+        return self._model_version
+
+    @property
+    def model_meta(self) -> Dict[str, Any]:
+        """Perfil, parámetros y métricas con que se entrenó el modelo (sidecar de train_model.py)."""
+        self._ensure_loaded()
+        return self._model_meta or {}
+
+    @property
+    def grid(self):
+        self._ensure_loaded()
+        return self._grid
+
+    def warmup(self) -> None:
+        """Carga el modelo y la rejilla por adelantado (hook de arranque)."""
+        self._ensure_loaded()
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            inicio = time.perf_counter()
+            self._model_meta = self._load_meta()
+            self._model = self._load_model()
+            self._model_version = self._compute_model_version()
+            self._grid = self._load_grid()
+            self._loaded = True
+            perfil = (self._model_meta or {}).get("perfil", "sin perfil")
+            print(f"Modelo de riesgo cargado en {time.perf_counter() - inicio:.2f}s "
+                  f"(versión {self._model_version}, perfil {perfil}).")
+
+    def _load_meta(self):
+        """Lee el sidecar de metadatos si corresponde al modelo vigente (se escribe después de él)."""
+        if not os.path.exists(self.meta_path) or os.path.getmtime(self.meta_path) < self._model_mtime():
+            return None
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Metadatos del modelo inválidos, se ignoran: {e}")
+            return None
 
     def _load_model(self):
+        from app.services.forest_engine import FlatForest
+
+        # Preferimos el bosque aplanado (sin scikit-learn) si corresponde al modelo vigente;
+        # los perfiles que no son bosques (p. ej. gradient boosting) se sirven con joblib
+        motor = (self._model_meta or {}).get("motor", "flat")
+        if motor == "flat" and os.path.exists(self.forest_path) and (
+            not os.path.exists(self.model_path)
+            or os.path.getmtime(self.forest_path) >= os.path.getmtime(self.model_path)
+        ):
+            try:
+                return FlatForest.load(self.forest_path)
+            except Exception as e:
+                print(f"Bosque aplanado inválido, se usa joblib: {e}")
         if os.path.exists(self.model_path):
             try:
+                import joblib
                 return joblib.load(self.model_path)
             except: return None
         return None
 
+    def _compute_model_version(self):
+        """Huella corta del archivo del modelo; identifica con qué modelo se guardó cada puntaje."""
+        if not self._model:
+            return None
+        if self._model_meta and self._model_meta.get("version"):
+            return self._model_meta["version"]
+        ruta = self.model_path if os.path.exists(self.model_path) else self.forest_path
+        with open(ruta, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()[:12]
+
+    def _model_mtime(self) -> float:
+        rutas = [r for r in (self.model_path, self.forest_path) if os.path.exists(r)]
+        return max((os.path.getmtime(r) for r in rutas), default=0.0)
+
+    def _load_grid(self, persistir: bool = True):
+        """
+        Precalcula P(aprobar) para todo el espacio [p1, p1, tutorias] (≈16k puntos)
+        y la guarda junto al modelo. Si ya existe una rejilla más reciente que el
+        modelo, simplemente se lee.
+        """
+        import numpy as np
+
+        if not self._model:
+            return None
+
+        forma = (GRID_P1_PASOS, GRID_TUTORIAS_MAX + 1)
+        if os.path.exists(self.grid_path) and os.path.getmtime(self.grid_path) >= self._model_mtime():
+            try:
+                grid = np.load(self.grid_path)
+                if grid.shape == forma:
+                    return grid
+            except Exception as e:
+                print(f"Rejilla de probabilidades inválida, se recalcula: {e}")
+
+        try:
+            p1 = np.repeat(np.arange(GRID_P1_PASOS) / 100.0, GRID_TUTORIAS_MAX + 1)
+            tutorias = np.tile(np.arange(GRID_TUTORIAS_MAX + 1, dtype=np.float64), GRID_P1_PASOS)
+            X = np.ascontiguousarray(np.column_stack([p1, p1, tutorias]))
+            grid = self._predict_proba_local(X)[:, 1].astype(np.float32).reshape(forma)
+        except Exception as e:
+            print(f"No se pudo precalcular la rejilla: {e}")
+            return None
+
+        if persistir:
+            try:
+                np.save(self.grid_path, grid)
+            except OSError as e:
+                print(f"Rejilla no persistida: {e}")
+        return grid
+
+    def get_features_bulk(self, db: Session, matricula_ids: List[int]) -> Dict[str, list]:
+        """
+        Notas y tutorías realizadas de muchas matrículas en una sola consulta.
+        Devuelve columnas (una lista por campo, alineadas por posición) listas para
+        calculate_risk_columns; las matrículas inexistentes no aparecen.
+        """
+        columnas = {"matricula_id": [], "p1": [], "p2": [], "final": [], "situacion": [], "tutorias": []}
+        if not matricula_ids:
+            return columnas
+
+        query = text("""
+            SELECT
+                m.id AS matricula_id,
+                n.parcial1, n.parcial2, n.final, n.situacion,
+                COALESCE(ct.num, 0) AS num_tutorias
+            FROM tutorias_unach.matriculas m
+            LEFT JOIN tutorias_unach.notas n ON m.id = n.matricula_id
+            LEFT JOIN (
+                SELECT matricula_id, COUNT(*) AS num
+                FROM tutorias_unach.tutorias
+                WHERE estado = 'realizada' AND matricula_id = ANY(:ids)
+                GROUP BY matricula_id
+            ) ct ON m.id = ct.matricula_id
+            WHERE m.id = ANY(:ids)
+            ORDER BY m.id
+        """)
+        for mid, p1, p2, final, situacion, tuts in db.execute(query, {"ids": list(matricula_ids)}):
+            columnas["matricula_id"].append(mid)
+            columnas["p1"].append(float(p1) if p1 is not None else None)
+            columnas["p2"].append(float(p2) if p2 is not None else None)
+            columnas["final"].append(float(final) if final is not None else None)
+            columnas["situacion"].append(situacion)
+            columnas["tutorias"].append(int(tuts))
+        return columnas
+
     def get_student_features(self, db: Session, matricula_id: int) -> Dict[str, Any]:
-        """Obtiene datos de la BD (Método lento para casos individuales)"""
-        q_nota = text("SELECT parcial1, parcial2, final, situacion FROM tutorias_unach.notas WHERE matricula_id = :mid")
-        row = db.execute(q_nota, {"mid": matricula_id}).mappings().one_or_none()
-        
-        q_tut = text("SELECT COUNT(id) FROM tutorias_unach.tutorias WHERE matricula_id = :mid AND estado = 'realizada'")
-        tuts = db.execute(q_tut, {"mid": matricula_id}).scalar() or 0
-
-        p1 = float(row['parcial1']) if row and row['parcial1'] is not None else None
-        p2 = float(row['parcial2']) if row and row['parcial2'] is not None else None
-        
-        return {
-            "p1": p1,
-            "p2": p2,
-            "final": float(row['final']) if row and row['final'] is not None else None,
-            "situacion": row['situacion'] if row else None,
-            "tutorias": int(tuts)
-        }
+        """Obtiene datos de la BD para una sola matrícula (para muchas, usar get_features_bulk)"""
+        columnas = self.get_features_bulk(db, [matricula_id])
+        if not columnas["matricula_id"]:
+            return {"p1": None, "p2": None, "final": None, "situacion": None, "tutorias": 0}
+        return {campo: valores[0] for campo, valores in columnas.items() if campo != "matricula_id"}
 
     # ✅ NUEVO MÉTODO RÁPIDO: Calcula riesgo sin ir a la BD
     def calculate_risk_local(self, feats: Dict[str, Any]) -> Dict[str, Any]:
@@ -46,65 +229,187 @@ class PredictionService:
         Calcula el riesgo usando datos ya cargados en memoria.
         ¡Cero consultas a base de datos!
         """
-        p1 = feats.get('p1')
-        p2 = feats.get('p2')
-        tutorias = feats.get('tutorias', 0)
-        situacion = feats.get('situacion')
+        return self.calculate_risk_batch([feats])[0]
+
+    def calculate_risk_batch(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Calcula el riesgo de N matrículas dadas como filas (diccionarios de features)."""
+        return self.calculate_risk_columns({
+            "p1": [r.get('p1') for r in rows],
+            "p2": [r.get('p2') for r in rows],
+            "final": [r.get('final') for r in rows],
+            "situacion": [r.get('situacion') for r in rows],
+            "tutorias": [r.get('tutorias') or 0 for r in rows],
+        })
+
+    def calculate_risk_columns(self, columnas: Dict[str, list]) -> List[Dict[str, Any]]:
+        """
+        Calcula el riesgo de N matrículas en una sola pasada (formato de get_features_bulk).
+        Las reglas de certeza se evalúan con máscaras de NumPy y el modelo
+        se invoca una única vez, solo con las filas que realmente lo necesitan.
+        """
+        import numpy as np
+
+        n = len(columnas['p1'])
+        if n == 0:
+            return []
+
+        # None -> NaN al convertir a float
+        p1 = np.array(columnas['p1'], dtype=np.float64)
+        p2 = np.array(columnas['p2'], dtype=np.float64)
+        tutorias = np.array(columnas['tutorias'], dtype=np.float64)
+        situacion = np.array(columnas['situacion'], dtype=object)
+
+        tiene_p1 = ~np.isnan(p1)
+        tiene_p2 = ~np.isnan(p2)
 
         # 1. CERTEZA ABSOLUTA
-        if situacion == 'APROBADO':
-            return self._response(100.0, "green", "ALTO", "Materia aprobada oficialmente.", feats)
-        if situacion == 'REPROBADO':
-            return self._response(0.0, "red", "BAJO", "Materia reprobada oficialmente.", feats)
+        aprobado = situacion == 'APROBADO'
+        reprobado = situacion == 'REPROBADO'
+        pendiente = ~(aprobado | reprobado)
 
         # 2. CERTEZA MATEMÁTICA (Dos Notas)
-        if p1 is not None and p2 is not None:
-            promedio = (p1 + p2) / 2
-            if promedio >= 7.0:
-                 return self._response(100.0, "green", "ALTO", "Promedio final suficiente.", feats)
-            else:
-                 return self._response(0.0, "red", "BAJO", "Promedio insuficiente.", feats)
+        dos_notas = pendiente & tiene_p1 & tiene_p2
+        suficiente = dos_notas & ((p1 + p2) / 2 >= 7.0)
+        insuficiente = dos_notas & ~suficiente
 
         # 3. PREDICCIÓN CON IA (Falta Parcial 2)
-        if p1 is not None and p2 is None:
-            if not self.model:
-                return self._response(0.0, "gray", "ERROR", "IA no disponible.", feats)
+        usa_ia = pendiente & tiene_p1 & ~tiene_p2
+        idx_ia = np.flatnonzero(usa_ia)
 
-            try:
-                # Proyección
-                features_df = pd.DataFrame([[p1, p1, tutorias]], columns=['parcial1', 'parcial2', 'num_tutorias'])
-                
-                # IA Calcula
-                prob_raw = self.model.predict_proba(features_df)[0][1] * 100
-                
-                # --- REGLA DEL SUPER ESTUDIANTE ---
-                if p1 >= 8.0 and tutorias >= 5:
-                    prob = max(prob_raw, 99.9) 
-                else:
-                    prob = min(prob_raw, 98.0)
-
-                # Piso mínimo de esperanza
-                prob = max(prob, 5.0)
-
-                # Mensajes
-                if prob >= 99:
-                     nivel, color, msg = "ALTO", "green", "Modelo IA: Excelencia Total. Aprobación virtualmente asegurada."
-                elif prob >= 90:
-                    nivel, color, msg = "ALTO", "green", "Modelo IA: Rendimiento destacado (Mantener ritmo)."
-                elif prob >= 70:
-                    nivel, color, msg = "ALTO", "green", "Modelo IA: Pronóstico favorable."
-                elif prob >= 50:
-                    nivel, color, msg = "MEDIO", "yellow", "Modelo IA: Zona de recuperación."
-                else:
-                    nivel, color, msg = "BAJO", "red", "Modelo IA: Alerta de riesgo académico."
-
-                return self._response(prob, color, nivel, msg, feats)
+        ia_resultados: Dict[int, tuple] = {}
+        ia_fallo = None
+        if idx_ia.size:
+            # Solo aquí hace falta el modelo: las reglas de certeza no lo cargan
+            self._ensure_loaded()
+            if not self._model:
+                ia_fallo = (0.0, "gray", "ERROR", "IA no disponible.")
+            else:
+                try:
+                    ia_resultados = self._score_ia(idx_ia, p1[idx_ia], tutorias[idx_ia])
+                except Exception as e:
+                    print(f"Error IA: {e}")
+                    ia_fallo = (0.0, "gray", "ERROR", "Fallo predicción.")
 
-            except Exception as e:
-                print(f"Error IA: {e}")
-                return self._response(0.0, "gray", "ERROR", "Fallo predicción.", feats)
+        resultados = []
+        for i in range(n):
+            if aprobado[i]:
+                r = REGLAS_CERTEZA["aprobado"]
+            elif reprobado[i]:
+                r = REGLAS_CERTEZA["reprobado"]
+            elif suficiente[i]:
+                r = REGLAS_CERTEZA["suficiente"]
+            elif insuficiente[i]:
+                r = REGLAS_CERTEZA["insuficiente"]
+            elif usa_ia[i]:
+                r = ia_fallo or ia_resultados[i]
+            else:
+                r = REGLAS_CERTEZA["sin_notas"]
+            prob, color, nivel, msg = r
+            feats = {
+                "p1": columnas['p1'][i], "p2": columnas['p2'][i],
+                "final": columnas['final'][i], "tutorias": columnas['tutorias'][i],
+            }
+            resultados.append(self._response(prob, color, nivel, msg, feats))
+        return resultados
+
+    def _score_ia(self, idx, p1, tutorias) -> Dict[int, tuple]:
+        """Aplica el modelo a las filas inciertas y traduce la probabilidad a nivel/mensaje."""
+        import numpy as np
+
+        # IA Calcula (rejilla precalculada; el modelo solo para lo que quede fuera)
+        prob_raw = self._probabilidad_ia(p1, tutorias) * 100
+
+        # --- REGLA DEL SUPER ESTUDIANTE ---
+        super_estudiante = (p1 >= 8.0) & (tutorias >= 5)
+        prob = np.where(super_estudiante, np.maximum(prob_raw, 99.9), np.minimum(prob_raw, 98.0))
+
+        # Piso mínimo de esperanza
+        prob = np.maximum(prob, 5.0)
+
+        # Mensajes
+        tramos = np.select(
+            [prob >= 99, prob >= 90, prob >= 70, prob >= 50],
+            [0, 1, 2, 3],
+            default=4
+        )
+        mensajes = (
+            ("ALTO", "green", "Modelo IA: Excelencia Total. Aprobación virtualmente asegurada."),
+            ("ALTO", "green", "Modelo IA: Rendimiento destacado (Mantener ritmo)."),
+            ("ALTO", "green", "Modelo IA: Pronóstico favorable."),
+            ("MEDIO", "yellow", "Modelo IA: Zona de recuperación."),
+            ("BAJO", "red", "Modelo IA: Alerta de riesgo académico."),
+        )
+
+        resultados = {}
+        for i, pr, tramo in zip(idx.tolist(), prob.tolist(), tramos.tolist()):
+            nivel, color, msg = mensajes[tramo]
+            resultados[i] = (pr, color, nivel, msg)
+        return resultados
+
+    def _probabilidad_ia(self, p1: "np.ndarray", tutorias: "np.ndarray") -> "np.ndarray":
+        """
+        P(aprobar) para filas sin Parcial 2. Dentro del rango de la rejilla es una
+        lectura de memoria; el resto (p. ej. más de 15 tutorías) pasa por el modelo.
+        """
+        import numpy as np
+
+        prob = np.empty(p1.size, dtype=np.float64)
+        en_rejilla = np.zeros(p1.size, dtype=bool)
+
+        if self._grid is not None:
+            fila = np.rint(p1 * 100)
+            en_rejilla = (
+                (fila >= 0) & (fila < GRID_P1_PASOS) & (np.abs(p1 * 100 - fila) < 1e-6)
+                & (tutorias >= 0) & (tutorias <= GRID_TUTORIAS_MAX) & (tutorias == np.floor(tutorias))
+            )
+            prob[en_rejilla] = self._grid[fila[en_rejilla].astype(np.intp), tutorias[en_rejilla].astype(np.intp)]
+
+        fuera = ~en_rejilla
+        if fuera.any():
+            # Proyección: sin Parcial 2 asumimos que repite la nota del Parcial 1
+            X = np.ascontiguousarray(np.column_stack([p1[fuera], p1[fuera], tutorias[fuera]]), dtype=np.float64)
+            prob[fuera] = self._predict_proba(X)[:, 1]
+        return prob
 
-        return self._response(0.0, "gray", "N/D", "Sin calificaciones.", feats)
+    def _predict_proba(self, X: "np.ndarray") -> "np.ndarray":
+        """Ejecuta predict_proba sobre una matriz contigua (n, 3); los lotes grandes van al pool."""
+        if inference_executor.should_offload(len(X)):
+            return inference_executor.run(_predict_proba_worker, X)
+        return self._predict_proba_local(X)
+
+    def _predict_proba_local(self, X: "np.ndarray") -> "np.ndarray":
+        modelo = self._modelo_lote_grande() if len(X) >= LOTE_SKLEARN else self._model
+        with warnings.catch_warnings():
+            # El modelo se entrenó con un DataFrame; con ndarray sklearn avisa por los nombres de columnas.
+            warnings.simplefilter("ignore", UserWarning)
+            return modelo.predict_proba(X)
+
+    def _modelo_lote_grande(self):
+        """El joblib del que se exportó el bosque aplanado (mismas predicciones), o el modelo vigente."""
+        from app.services.forest_engine import FlatForest
+
+        if not isinstance(self._model, FlatForest):
+            return self._model
+        if not self._sklearn_cargado:
+            with self._lock:
+                if not self._sklearn_cargado:
+                    self._sklearn = self._load_sklearn()
+                    self._sklearn_cargado = True
+        return self._sklearn or self._model
+
+    def _load_sklearn(self):
+        # Solo si el bosque aplanado se exportó de este archivo (se escribe después de él)
+        if not os.path.exists(self.model_path) or (
+            os.path.exists(self.forest_path) and os.path.getmtime(self.model_path) > os.path.getmtime(self.forest_path)
+        ):
+            return None
+        try:
+            import joblib
+            modelo = joblib.load(self.model_path)
+        except Exception as e:
+            print(f"Modelo joblib no disponible para lotes grandes: {e}")
+            return None
+        return modelo if hasattr(modelo, "estimators_") else None
 
     # Mantiene compatibilidad con el método viejo (por si acaso)
     def predict_risk(self, db: Session, estudiante_id: int, matricula_id: int) -> Dict[str, Any]:
@@ -112,40 +417,70 @@ class PredictionService:
         return self.calculate_risk_local(feats)
 
     def get_student_clusters(self, db: Session, periodo_id: int) -> List[Dict[str, Any]]:
-        # ... (Código de clusters se mantiene igual) ...
+        """
+        Agrupa a los estudiantes de un período. El resultado se guarda en caché por
+        período y solo se vuelve a ajustar cuando cambia la versión de sus datos.
+        """
         try:
+            version = self._cluster_data_version(db, periodo_id)
+            with self._clusters_lock:
+                cache = self._clusters_cache.get(periodo_id)
+            if cache and cache[0] == version:
+                return cache[1]
+
+            # Conteo de tutorías agrupado una sola vez (sin subconsulta por fila)
             q = text("""
-                SELECT u.nombre, n.parcial1, n.parcial2, 
-                    (SELECT COUNT(*) FROM tutorias_unach.tutorias t WHERE t.matricula_id = m.id AND t.estado = 'realizada') as tuts
+                WITH conteo_tutorias AS (
+                    SELECT t.matricula_id, COUNT(*) AS num
+                    FROM tutorias_unach.tutorias t
+                    JOIN tutorias_unach.matriculas m ON t.matricula_id = m.id
+                    WHERE m.periodo_id = :pid AND t.estado = 'realizada'
+                    GROUP BY t.matricula_id
+                )
+                SELECT u.nombre, n.parcial1, n.parcial2, COALESCE(ct.num, 0) AS tuts
                 FROM tutorias_unach.matriculas m
                 JOIN tutorias_unach.estudiantes e ON m.estudiante_id = e.id
                 JOIN tutorias_unach.usuarios u ON e.usuario_id = u.id
                 JOIN tutorias_unach.notas n ON m.id = n.matricula_id
+                LEFT JOIN conteo_tutorias ct ON m.id = ct.matricula_id
                 WHERE m.periodo_id = :pid
             """)
-            rows = db.execute(q, {"pid": periodo_id}).mappings().all()
-            if len(rows) < 3: return [] 
-            
-            df = pd.DataFrame(rows)
-            df['parcial1'] = df['parcial1'].fillna(0)
-            df['parcial2'] = df['parcial2'].fillna(df['parcial1']) 
-            df['promedio'] = (df['parcial1'] + df['parcial2']) / 2
-            
-            kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
-            df['cluster'] = kmeans.fit_predict(df[['promedio', 'tuts']])
-            means = df.groupby('cluster')['promedio'].mean().sort_values()
-            labels = {means.index[0]: 'Riesgo', means.index[1]: 'Regular', means.index[2]: 'Sobresaliente'}
-            df['categoria'] = df['cluster'].map(labels)
-            
-            return df[['nombre', 'promedio', 'tuts', 'categoria']].rename(columns={'tuts': 'total_tutorias'}).to_dict(orient='records')
+            rows = [dict(r) for r in db.execute(q, {"pid": periodo_id}).mappings().all()]
+            if len(rows) < 3:
+                resultado = []
+            elif inference_executor.should_offload(len(rows)):
+                # KMeans es CPU puro: si hay pool, se ajusta en otro proceso
+                resultado = inference_executor.run(_fit_clusters, rows, settings.CLUSTER_MINIBATCH_MIN_ROWS)
+            else:
+                resultado = _fit_clusters(rows, settings.CLUSTER_MINIBATCH_MIN_ROWS)
+
+            with self._clusters_lock:
+                self._clusters_cache[periodo_id] = (version, resultado)
+            return resultado
         except: return []
 
+    def _cluster_data_version(self, db: Session, periodo_id: int) -> str:
+        """Huella barata de los datos del período: notas (cantidad y suma) y tutorías realizadas."""
+        q = text("""
+            SELECT
+                (SELECT COUNT(*) || ':' || COALESCE(SUM(COALESCE(n.parcial1, 0) + COALESCE(n.parcial2, 0)), 0)
+                 FROM tutorias_unach.notas n
+                 JOIN tutorias_unach.matriculas m ON n.matricula_id = m.id
+                 WHERE m.periodo_id = :pid)
+                || '|' ||
+                (SELECT COUNT(*) || ':' || COALESCE(MAX(t.fecha_registro)::text, '')
+                 FROM tutorias_unach.tutorias t
+                 JOIN tutorias_unach.matriculas m ON t.matricula_id = m.id
+                 WHERE m.periodo_id = :pid AND t.estado = 'realizada')
+        """)
+        return db.execute(q, {"pid": periodo_id}).scalar()
+
     def _response(self, prob, color, nivel, msg, feats):
         nota = feats['p1'] if feats['p1'] is not None else 0.0
         # Mostrar la nota que tenga (Final > Promedio > P1)
         if feats.get('final') is not None:
              nota = feats['final']
-        elif feats['p2'] is not None: 
+        elif feats['p1'] is not None and feats['p2'] is not None: 
              nota = (feats['p1'] + feats['p2']) / 2
             
         return {
@@ -157,4 +492,34 @@ class PredictionService:
             "nota_actual": round(nota, 2)
         }
 
-prediction_service = PredictionService()
\ No newline at end of file
+prediction_service = PredictionService()
+
+
+# --- Trabajos para los procesos del pool (funciones de módulo: deben poder serializarse) ---
+
+def _predict_proba_worker(X):
+    prediction_service.warmup()
+    return prediction_service._predict_proba_local(X)
+
+
+def _fit_clusters(rows: List[Dict[str, Any]], minibatch_desde: int) -> List[Dict[str, Any]]:
+    """Agrupa a los estudiantes en Riesgo / Regular / Sobresaliente según promedio y tutorías."""
+    import pandas as pd
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    df = pd.DataFrame(rows)
+    df['parcial1'] = df['parcial1'].astype(float).fillna(0)
+    df['parcial2'] = df['parcial2'].astype(float).fillna(df['parcial1']) 
+    df['promedio'] = (df['parcial1'] + df['parcial2']) / 2
+    
+    # Períodos grandes: MiniBatchKMeans converge con una fracción del costo
+    if len(df) >= minibatch_desde:
+        kmeans = MiniBatchKMeans(n_clusters=3, random_state=42, n_init=3, batch_size=4096)
+    else:
+        kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
+    df['cluster'] = kmeans.fit_predict(df[['promedio', 'tuts']])
+    means = df.groupby('cluster')['promedio'].mean().sort_values()
+    labels = {means.index[0]: 'Riesgo', means.index[1]: 'Regular', means.index[2]: 'Sobresaliente'}
+    df['categoria'] = df['cluster'].map(labels)
+    
+    return df[['nombre', 'promedio', 'tuts', 'categoria']].rename(columns={'tuts': 'total_tutorias'}).to_dict(orient='records')
\ No newline at end of file
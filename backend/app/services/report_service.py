@@ -2,148 +2,262 @@
 
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List, Dict, Any
-# Importamos modelos para las validaciones
-from app.models.estudiante import Estudiante
-from app.models.user import Usuario
+from typing import List, Dict, Any, Optional, Iterator, Sequence, Tuple
 # ✅ NUEVA IMPORTACIÓN:
+from app.services.risk_score_service import (
+    risk_score_service, REGLA_SQL, NIVEL_REGLA_SQL, VIGENTE_SQL, RIESGO_PENDIENTE
+)
 from app.services.prediction_service import prediction_service
+from app.services.periodo_service import TODOS_LOS_PERIODOS
 
 class ReportService:
     
-    def get_coordinator_report(self, db: Session) -> List[Dict[str, Any]]:
+    def get_coordinator_report(
+        self,
+        db: Session,
+        periodo_id: int = TODOS_LOS_PERIODOS,
+        carrera: Optional[str] = None,
+        tutor_id: Optional[int] = None,
+        limit: int = 100,
+        despues_de: Optional[List[Any]] = None
+    ) -> Dict[str, Any]:
         """
-        Genera un reporte detallado para el coordinador.
+        Genera un reporte detallado para el coordinador, un grupo por período, carrera,
+        tutor y asignatura (de un período o de todos con TODOS_LOS_PERIODOS).
+        Paginación keyset: `despues_de` son los valores de orden del último grupo de la
+        página anterior (lo que devuelve `siguiente`).
         """
-        query = text("""
-            SELECT
-                pa.nombre AS periodo,
-                e.carrera AS carrera,
-                COALESCE(t_u.nombre, 'Sin Asignar') AS tutor_nombre,
-                a.nombre AS asignatura,
-                COUNT(DISTINCT m.estudiante_id) AS total_estudiantes,
-                SUM(CASE WHEN n.situacion = 'APROBADO' THEN 1 ELSE 0 END) AS total_aprobados,
-                SUM(CASE WHEN n.situacion = 'REPROBADO' THEN 1 ELSE 0 END) AS total_reprobados,
-                COUNT(DISTINCT t.id) AS total_tutorias_registradas,
-                SUM(CASE WHEN t.estado = 'realizada' THEN 1 ELSE 0 END) AS tutorias_realizadas,
-                SUM(CASE WHEN t.estado = 'cancelada' THEN 1 ELSE 0 END) AS tutorias_canceladas,
-                SUM(CASE WHEN t.estado = 'no_asistio' THEN 1 ELSE 0 END) AS tutorias_no_asistidas,
-                AVG(ev.estrellas) AS satisfaccion_promedio
-            FROM tutorias_unach.matriculas m
-            JOIN tutorias_unach.periodos_academicos pa ON m.periodo_id = pa.id
-            JOIN tutorias_unach.asignaturas a ON m.asignatura_id = a.id
-            LEFT JOIN tutorias_unach.notas n ON m.id = n.matricula_id
-            JOIN tutorias_unach.estudiantes e ON m.estudiante_id = e.id
-            LEFT JOIN tutorias_unach.tutores tut ON m.tutor_id = tut.id
-            LEFT JOIN tutorias_unach.usuarios t_u ON tut.usuario_id = t_u.id
-            LEFT JOIN tutorias_unach.tutorias t ON m.id = t.matricula_id
-            LEFT JOIN tutorias_unach.evaluaciones ev ON t.id = ev.tutoria_id
-            GROUP BY pa.nombre, e.carrera, t_u.nombre, a.nombre
-            ORDER BY pa.nombre DESC, e.carrera, t_u.nombre, a.nombre;
-        """)
-        
-        result = db.execute(query).mappings().all()
-        
-        report_data = []
-        for row in result:
-            row_dict = dict(row)
-            row_dict['satisfaccion_promedio'] = round(float(row_dict['satisfaccion_promedio'] or 0), 2)
-            report_data.append(row_dict)
-            
-        return report_data
-
-    # ✅ NUEVO MÉTODO: Calidad de Datos (ISO/IEC 25012)
-    def get_data_quality_metrics(self, db: Session) -> Dict[str, Any]:
+        query, params = self._consulta_reporte(periodo_id, carrera, tutor_id, despues_de, limit + 1)
+        result = db.execute(query, params).mappings().all()
+
+        report_data = [self._fila_reporte(row) for row in result[:limit]]
+
+        siguiente = None
+        if len(result) > limit:
+            ultimo = report_data[-1]
+            siguiente = [ultimo['periodo'], ultimo['carrera'], ultimo['tutor_nombre'], ultimo['tutor_id'] or 0,
+                         ultimo['asignatura'], ultimo['asignatura_id']]
+
+        return {"grupos": report_data, "limit": limit, "siguiente": siguiente}
+
+    def iter_coordinator_report(
+        self,
+        db: Session,
+        periodo_id: int = TODOS_LOS_PERIODOS,
+        carrera: Optional[str] = None,
+        tutor_id: Optional[int] = None,
+        lote: int = 500
+    ) -> Iterator[Dict[str, Any]]:
         """
-        Calcula métricas de Completitud y Precisión.
+        El reporte completo (mismos grupos y orden) leído con un cursor de servidor
+        de `lote` filas: la memoria no crece con el tamaño del reporte (exportaciones).
         """
-        # 1. Completitud: Estudiantes sin datos clave (carrera)
-        total_estudiantes = db.query(Estudiante).count()
-        if total_estudiantes == 0:
-            completitud_pct = 100
-        else:
-            incompletos = db.query(Estudiante).filter(Estudiante.carrera == None).count()
-            completitud_pct = ((total_estudiantes - incompletos) / total_estudiantes) * 100
-
-        # 2. Precisión: Usuarios con email institucional válido
-        total_usuarios = db.query(Usuario).count()
-        if total_usuarios == 0:
-            precision_pct = 100
-        else:
-            invalidos = db.query(Usuario).filter(~Usuario.correo.like("%@unach.edu.ec")).count()
-            precision_pct = ((total_usuarios - invalidos) / total_usuarios) * 100
-
-        indice_global = round((completitud_pct + precision_pct) / 2, 2)
-
-        return {
-            "indice_global": indice_global,
-            "metricas": {
-                "completitud": round(completitud_pct, 2),
-                "precision": round(precision_pct, 2),
-                "registros_auditados": total_estudiantes + total_usuarios
-            },
-            "estado": "ÓPTIMO" if indice_global > 90 else "MEJORABLE"
-        }
-    
+        query, params = self._consulta_reporte(periodo_id, carrera, tutor_id)
+        result = db.execute(query.execution_options(stream_results=True, yield_per=lote), params)
+        for row in result.mappings():
+            yield self._fila_reporte(row)
+
+    @staticmethod
+    def _fila_reporte(row) -> Dict[str, Any]:
+        row_dict = dict(row)
+        row_dict['satisfaccion_promedio'] = round(float(row_dict['satisfaccion_promedio'] or 0), 2)
+        return row_dict
+
+    @staticmethod
+    def _consulta_reporte(
+        periodo_id: int,
+        carrera: Optional[str],
+        tutor_id: Optional[int],
+        despues_de: Optional[List[Any]] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """SQL del reporte del coordinador con sus filtros, cursor y límite opcionales."""
+        filtros = []
+        if periodo_id != TODOS_LOS_PERIODOS:
+            filtros.append("m.periodo_id = :periodo_id")
+        if carrera is not None:
+            filtros.append("COALESCE(e.carrera, 'Sin carrera') = :carrera")
+        if tutor_id is not None:
+            filtros.append("m.tutor_id = :tutor_id")
 
-# ✅ PEGA ESTE MÉTODO AL FINAL DE LA CLASE:
-    def get_students_at_risk(self, db: Session) -> List[Dict[str, Any]]:
+        params = {"periodo_id": periodo_id, "carrera": carrera, "tutor_id": tutor_id, "limit": limit}
+        filtro_cursor = ""
+        if despues_de is not None:
+            # Los períodos más nuevos ya salieron: ni siquiera se agregan
+            filtros.append("pa.nombre <= :c_periodo")
+            filtro_cursor = """
+                WHERE g.periodo < :c_periodo
+                   OR (g.periodo = :c_periodo
+                       AND (g.carrera, g.tutor_nombre, COALESCE(g.tutor_id, 0), g.asignatura, g.asignatura_id)
+                         > (:c_carrera, :c_tutor_nombre, :c_tutor_id, :c_asignatura, :c_asignatura_id))
+            """
+            params.update(zip(
+                ("c_periodo", "c_carrera", "c_tutor_nombre", "c_tutor_id", "c_asignatura", "c_asignatura_id"),
+                despues_de
+            ))
+
+        # Tutorías y evaluaciones se agregan por matrícula ANTES de unirlas: cada
+        # matrícula aporta una sola fila y los conteos no se multiplican
+        query = text(f"""
+            WITH mats AS (
+                SELECT m.id, m.periodo_id, pa.nombre AS periodo, m.asignatura_id, m.tutor_id,
+                       COALESCE(e.carrera, 'Sin carrera') AS carrera
+                FROM tutorias_unach.matriculas m
+                JOIN tutorias_unach.periodos_academicos pa ON m.periodo_id = pa.id
+                JOIN tutorias_unach.estudiantes e ON m.estudiante_id = e.id
+                {"WHERE " + " AND ".join(filtros) if filtros else ""}
+            ),
+            tutorias_por_matricula AS (
+                SELECT
+                    t.matricula_id,
+                    COUNT(*) AS registradas,
+                    COUNT(*) FILTER (WHERE t.estado = 'realizada') AS realizadas,
+                    COUNT(*) FILTER (WHERE t.estado = 'cancelada') AS canceladas,
+                    COUNT(*) FILTER (WHERE t.estado = 'no_asistio') AS no_asistidas
+                FROM tutorias_unach.tutorias t
+                WHERE t.matricula_id IN (SELECT id FROM mats)
+                GROUP BY t.matricula_id
+            ),
+            evaluaciones_por_matricula AS (
+                SELECT t.matricula_id, SUM(ev.estrellas) AS suma_estrellas, COUNT(*) AS num_evaluaciones
+                FROM tutorias_unach.evaluaciones ev
+                JOIN tutorias_unach.tutorias t ON t.id = ev.tutoria_id
+                WHERE t.matricula_id IN (SELECT id FROM mats)
+                GROUP BY t.matricula_id
+            ),
+            grupos AS (
+                SELECT
+                    mt.periodo,
+                    mt.carrera,
+                    mt.tutor_id,
+                    COALESCE(t_u.nombre, 'Sin Asignar') AS tutor_nombre,
+                    mt.asignatura_id,
+                    a.nombre AS asignatura,
+                    COUNT(*) AS total_estudiantes,
+                    COUNT(*) FILTER (WHERE n.situacion = 'APROBADO') AS total_aprobados,
+                    COUNT(*) FILTER (WHERE n.situacion = 'REPROBADO') AS total_reprobados,
+                    COALESCE(SUM(tm.registradas), 0) AS total_tutorias_registradas,
+                    COALESCE(SUM(tm.realizadas), 0) AS tutorias_realizadas,
+                    COALESCE(SUM(tm.canceladas), 0) AS tutorias_canceladas,
+                    COALESCE(SUM(tm.no_asistidas), 0) AS tutorias_no_asistidas,
+                    CAST(SUM(em.suma_estrellas) AS NUMERIC) / NULLIF(SUM(em.num_evaluaciones), 0) AS satisfaccion_promedio
+                FROM mats mt
+                JOIN tutorias_unach.asignaturas a ON mt.asignatura_id = a.id
+                LEFT JOIN tutorias_unach.notas n ON mt.id = n.matricula_id
+                LEFT JOIN tutorias_unach.tutores tut ON mt.tutor_id = tut.id
+                LEFT JOIN tutorias_unach.usuarios t_u ON tut.usuario_id = t_u.id
+                LEFT JOIN tutorias_por_matricula tm ON mt.id = tm.matricula_id
+                LEFT JOIN evaluaciones_por_matricula em ON mt.id = em.matricula_id
+                GROUP BY mt.periodo, mt.carrera, mt.tutor_id, t_u.nombre, mt.asignatura_id, a.nombre
+            )
+            SELECT g.*
+            FROM grupos g
+            {filtro_cursor}
+            ORDER BY g.periodo DESC, g.carrera, g.tutor_nombre, COALESCE(g.tutor_id, 0), g.asignatura, g.asignatura_id
+            {"LIMIT :limit" if limit is not None else ""}
+        """)
+        return query, params
+
+    # Niveles que cuentan como "en riesgo" (probabilidad de aprobar baja o media)
+    NIVELES_EN_RIESGO = ("BAJO", "MEDIO")
+
+    def get_students_at_risk(
+        self,
+        db: Session,
+        periodo_id: int = TODOS_LOS_PERIODOS,
+        carrera: Optional[str] = None,
+        asignatura_id: Optional[int] = None,
+        niveles: Sequence[str] = NIVELES_EN_RIESGO,
+        limit: int = 100,
+        despues_de: Optional[List[Any]] = None
+    ) -> Dict[str, Any]:
         """
-        Identifica estudiantes con Riesgo MEDIO o ALTO.
+        Alerta temprana: matrículas cuyo nivel está en `niveles` (de un período o de
+        todos con TODOS_LOS_PERIODOS), por estudiante y paginadas por keyset.
+        El nivel sale de la regla de certeza o del puntaje vigente, en SQL; las matrículas
+        que necesitan el modelo y no tienen puntaje vigente son PENDIENTE (no se infiere al leer).
         """
-        # 1. Traemos matriculas activas con datos básicos
-        query = text("""
-            SELECT 
-                m.id as matricula_id,
-                m.estudiante_id,
-                u.nombre as estudiante_nombre,
-                e.carrera,
-                a.nombre as asignatura
-            FROM tutorias_unach.matriculas m
-            JOIN tutorias_unach.estudiantes e ON m.estudiante_id = e.id
-            JOIN tutorias_unach.usuarios u ON e.usuario_id = u.id
-            JOIN tutorias_unach.asignaturas a ON m.asignatura_id = a.id
-            -- Puedes filtrar por periodo activo si tienes esa lógica, por ahora traemos todo
-            ORDER BY u.nombre ASC
+        filtros = []
+        if periodo_id != TODOS_LOS_PERIODOS:
+            filtros.append("m.periodo_id = :periodo_id")
+        if carrera is not None:
+            filtros.append("COALESCE(e.carrera, 'Sin carrera') = :carrera")
+        if asignatura_id is not None:
+            filtros.append("m.asignatura_id = :asignatura_id")
+
+        params = {"periodo_id": periodo_id, "carrera": carrera, "asignatura_id": asignatura_id,
+                  "niveles": list(niveles), "limit": limit + 1,
+                  "version_modelo": prediction_service.model_version}
+        if despues_de is not None:
+            filtros.append("(u.nombre, m.id) > (:c_estudiante, :c_matricula_id)")
+            params.update(c_estudiante=despues_de[0], c_matricula_id=despues_de[1])
+
+        # 1. Una sola consulta: entradas, regla de certeza y puntaje guardado por matrícula
+        query = text(f"""
+            WITH mats AS (
+                SELECT m.id, u.nombre AS estudiante, COALESCE(e.carrera, 'Sin carrera') AS carrera, a.nombre AS asignatura
+                FROM tutorias_unach.matriculas m
+                JOIN tutorias_unach.estudiantes e ON m.estudiante_id = e.id
+                JOIN tutorias_unach.usuarios u ON e.usuario_id = u.id
+                JOIN tutorias_unach.asignaturas a ON m.asignatura_id = a.id
+                {"WHERE " + " AND ".join(filtros) if filtros else ""}
+            ),
+            conteo_tutorias AS (
+                SELECT matricula_id, COUNT(*) AS num
+                FROM tutorias_unach.tutorias
+                WHERE estado = 'realizada' AND matricula_id IN (SELECT id FROM mats)
+                GROUP BY matricula_id
+            ),
+            entradas AS (
+                SELECT
+                    mt.id AS matricula_id, mt.estudiante, mt.carrera, mt.asignatura,
+                    n.parcial1, n.parcial2, n.final, n.situacion,
+                    COALESCE(ct.num, 0) AS num_tutorias,
+                    {REGLA_SQL} AS regla,
+                    r.nivel AS nivel_guardado, r.color, r.probabilidad, r.mensaje,
+                    {VIGENTE_SQL} AS vigente
+                FROM mats mt
+                LEFT JOIN tutorias_unach.notas n ON mt.id = n.matricula_id
+                LEFT JOIN conteo_tutorias ct ON mt.id = ct.matricula_id
+                LEFT JOIN tutorias_unach.riesgo_matricula r ON mt.id = r.matricula_id
+            ),
+            clasificadas AS (
+                SELECT entradas.*,
+                       COALESCE({NIVEL_REGLA_SQL}, CASE WHEN vigente THEN nivel_guardado END,
+                                '{RIESGO_PENDIENTE[2]}') AS nivel
+                FROM entradas
+            )
+            SELECT *
+            FROM clasificadas
+            WHERE nivel = ANY(:niveles)
+            ORDER BY estudiante, matricula_id
+            LIMIT :limit
         """)
+        filas = db.execute(query, params).mappings().all()
+
+        # 2. Detalle de cada fila (regla, puntaje guardado o pendiente), sin modelo
+        pagina = filas[:limit]
+        riesgos = risk_score_service.resolver(pagina)
 
-        matriculas = db.execute(query).mappings().all()
         estudiantes_en_riesgo = []
+        for mat in pagina:
+            prediccion = riesgos[mat['matricula_id']]
+            estudiantes_en_riesgo.append({
+                "matricula_id": mat['matricula_id'],
+                "estudiante": mat['estudiante'],
+                "carrera": mat['carrera'],
+                "asignatura": mat['asignatura'],
+                "riesgo": prediccion['riesgo_nivel'],
+                "probabilidad": prediccion['probabilidad_riesgo'],
+                "color": prediccion['riesgo_color'],
+                "mensaje": prediccion['mensaje_explicativo']
+            })
+
+        siguiente = None
+        if len(filas) > limit:
+            siguiente = [pagina[-1]['estudiante'], pagina[-1]['matricula_id']]
 
-        # 2. Analizamos uno por uno con tu IA
-        for mat in matriculas:
-            try:
-                # Usamos tu servicio de predicción existente
-                prediccion = prediction_service.predict_risk(
-                    db=db, 
-                    estudiante_id=mat['estudiante_id'], 
-                    matricula_id=mat['matricula_id']
-                )
-
-                # 3. Filtramos: Solo guardamos Riesgo ALTO o MEDIO
-                if prediccion and prediccion.get('riesgo_nivel') in ['ALTO', 'MEDIO']:
-                    estudiantes_en_riesgo.append({
-                        "estudiante": mat['estudiante_nombre'],
-                        "carrera": mat['carrera'],
-                        "asignatura": mat['asignatura'],
-                        "riesgo": prediccion['riesgo_nivel'],
-                        "probabilidad": prediccion.get('probabilidad_riesgo', 0),
-                        "color": prediccion.get('riesgo_color', 'red')
-                    })
-            except Exception as e:
-                print(f"Error analizando estudiante {mat['estudiante_id']}: {e}")
-                continue
-        if not estudiantes_en_riesgo:
-                estudiantes_en_riesgo.append({
-                    "estudiante": "PRUEBA VISUAL (Verifica Datos)",
-                    "carrera": "Sistemas",
-                    "asignatura": "Debug",
-                    "riesgo": "ALTO",
-                    "probabilidad": 100.0,
-                    "color": "red"
-                })
-                # Ordenamos primero los más urgentes (ALTO)
-                return sorted(estudiantes_en_riesgo, key=lambda x: x['probabilidad'] or 0, reverse=True)
+        return {"estudiantes": estudiantes_en_riesgo, "limit": limit, "siguiente": siguiente}
 
 # Instancia única del servicio
 report_service = ReportService()
\ No newline at end of file
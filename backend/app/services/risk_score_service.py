@@ -0,0 +1,220 @@
+# backend/app/services/risk_score_service.py
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Dict, Any, List, Iterator, Optional
+
+from app.services.prediction_service import prediction_service, REGLAS_CERTEZA
+
+# Un solo recálculo de riesgo_matricula a la vez (job de cada worker o scripts/score_risk.py)
+_LOCK_RECALCULO = "tutorias_unach.riesgo_matricula_recalculo"
+
+# "vigente": el puntaje guardado (r) se calculó con el modelo vigente (:version_modelo)
+# y exactamente con las notas (n) y tutorías realizadas (ct) actuales. Un ERROR guardado
+# antes de que save_scores los descartara nunca es vigente: el job lo vuelve a intentar.
+VIGENTE_SQL = """
+    (r.matricula_id IS NOT NULL AND
+     r.nivel <> 'ERROR' AND
+     r.version_modelo IS NOT DISTINCT FROM :version_modelo AND
+     (r.parcial1, r.parcial2, r.final, r.situacion, r.num_tutorias)
+        IS NOT DISTINCT FROM (n.parcial1, n.parcial2, n.final, n.situacion, COALESCE(ct.num, 0)))
+"""
+
+# Reglas de certeza de PredictionService.calculate_risk_columns evaluadas en SQL.
+# NULL solo cuando hace falta el modelo (Parcial 1 sin Parcial 2 ni situación oficial).
+REGLA_SQL = """
+    CASE
+        WHEN n.situacion = 'APROBADO' THEN 'aprobado'
+        WHEN n.situacion = 'REPROBADO' THEN 'reprobado'
+        WHEN n.parcial1 IS NOT NULL AND n.parcial2 IS NOT NULL AND (n.parcial1 + n.parcial2) / 2 >= 7.0 THEN 'suficiente'
+        WHEN n.parcial1 IS NOT NULL AND n.parcial2 IS NOT NULL THEN 'insuficiente'
+        WHEN n.parcial1 IS NULL THEN 'sin_notas'
+    END
+"""
+
+# Lo que se muestra de una matrícula que necesita el modelo y no tiene puntaje vigente:
+# las lecturas no infieren ni escriben, la puntúa el próximo recálculo (score_risk.py o el job)
+RIESGO_PENDIENTE = (0.0, "gray", "PENDIENTE", "Riesgo pendiente de cálculo.")
+
+_NIVELES_POR_REGLA = " ".join(
+    f"WHEN '{regla}' THEN '{nivel}'" for regla, (_, _, nivel, _) in REGLAS_CERTEZA.items()
+)
+
+# Nivel que da cada regla (sobre una columna `regla` ya calculada)
+NIVEL_REGLA_SQL = f"CASE regla {_NIVELES_POR_REGLA} END"
+
+# Nivel que muestra resolver, sobre n, ct y r: el de la regla, el guardado si está
+# vigente o NULL si falta calcularlo (PENDIENTE)
+NIVEL_SQL = f"""
+    COALESCE(CASE ({REGLA_SQL}) {_NIVELES_POR_REGLA} END, CASE WHEN {VIGENTE_SQL} THEN r.nivel END)
+"""
+
+# Entradas actuales de cada matrícula (notas + tutorías realizadas) junto a su regla
+# de certeza y al puntaje guardado.
+_ENTRADAS_SQL = f"""
+    SELECT
+        m.id AS matricula_id,
+        n.parcial1, n.parcial2, n.final, n.situacion,
+        COALESCE(ct.num, 0) AS num_tutorias,
+        {REGLA_SQL} AS regla,
+        r.nivel, r.color, r.probabilidad, r.mensaje, r.version_modelo,
+        {VIGENTE_SQL} AS vigente
+    FROM tutorias_unach.matriculas m
+    LEFT JOIN tutorias_unach.notas n ON m.id = n.matricula_id
+    LEFT JOIN conteo_tutorias ct ON m.id = ct.matricula_id
+    LEFT JOIN tutorias_unach.riesgo_matricula r ON m.id = r.matricula_id
+"""
+
+
+def _features(fila) -> Dict[str, Any]:
+    """Convierte una fila de _ENTRADAS_SQL al diccionario que espera PredictionService."""
+    return {
+        "p1": float(fila['parcial1']) if fila['parcial1'] is not None else None,
+        "p2": float(fila['parcial2']) if fila['parcial2'] is not None else None,
+        "final": float(fila['final']) if fila['final'] is not None else None,
+        "situacion": fila['situacion'],
+        "tutorias": int(fila['num_tutorias']),
+    }
+
+
+class RiskScoreService:
+
+    def get_risk_map(self, db: Session, matricula_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Devuelve el riesgo de cada matrícula leyendo riesgo_matricula (solo lectura).
+        Las filas sin puntaje vigente que no decide una regla salen como RIESGO_PENDIENTE.
+        """
+        if not matricula_ids:
+            return {}
+
+        query = text(f"""
+            WITH conteo_tutorias AS (
+                SELECT matricula_id, COUNT(*) AS num
+                FROM tutorias_unach.tutorias
+                WHERE estado = 'realizada' AND matricula_id = ANY(:ids)
+                GROUP BY matricula_id
+            )
+            {_ENTRADAS_SQL}
+            WHERE m.id = ANY(:ids)
+        """)
+        filas = db.execute(query, {
+            "ids": list(matricula_ids), "version_modelo": prediction_service.model_version
+        }).mappings().all()
+        return self.resolver(filas)
+
+    def resolver(self, filas) -> Dict[int, Dict[str, Any]]:
+        """
+        Riesgo de filas con las columnas de _ENTRADAS_SQL, sin modelo ni escrituras:
+        la regla de certeza, el puntaje guardado si está vigente o RIESGO_PENDIENTE.
+        """
+        riesgos = {}
+        for fila in filas:
+            feats = _features(fila)
+            if fila['regla'] is not None:
+                riesgo = REGLAS_CERTEZA[fila['regla']]
+            elif fila['vigente']:
+                riesgo = (float(fila['probabilidad']), fila['color'], fila['nivel'], fila['mensaje'])
+            else:
+                riesgo = RIESGO_PENDIENTE
+            riesgos[fila['matricula_id']] = prediction_service._response(*riesgo, feats)
+        return riesgos
+
+    def iter_pending(self, db: Session, completo: bool, version_modelo: Optional[str],
+                     tamano_lote: int = 2000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Recorre con cursor de servidor las matrículas que hay que (re)calcular:
+        todas si `completo`, o solo las nuevas, las que cambiaron de notas/tutorías
+        realizadas y las calculadas con otro modelo.
+        """
+        query = text(f"""
+            WITH conteo_tutorias AS (
+                SELECT matricula_id, COUNT(*) AS num
+                FROM tutorias_unach.tutorias
+                WHERE estado = 'realizada'
+                GROUP BY matricula_id
+            ),
+            entradas AS ({_ENTRADAS_SQL})
+            SELECT matricula_id, parcial1, parcial2, final, situacion, num_tutorias
+            FROM entradas
+            WHERE :completo OR NOT vigente
+            ORDER BY matricula_id
+        """)
+        result = db.execute(
+            query, {"completo": completo, "version_modelo": version_modelo},
+            execution_options={"stream_results": True, "yield_per": tamano_lote}
+        ).mappings()
+
+        for lote in result.partitions(tamano_lote):
+            yield [dict(matricula_id=f['matricula_id'], **_features(f)) for f in lote]
+
+    def save_scores(self, db: Session, filas: List[Dict[str, Any]], resultados: List[Dict[str, Any]],
+                    version_modelo: Optional[str]) -> int:
+        """
+        Guarda (upsert) un lote de puntajes junto con las entradas usadas y devuelve
+        cuántos guardó. Los ERROR del modelo no se guardan: quedan sin puntaje vigente
+        y el próximo recálculo los vuelve a intentar.
+        """
+        pares = [(f, r) for f, r in zip(filas, resultados) if r['riesgo_nivel'] != "ERROR"]
+        if not pares:
+            return 0
+        query = text("""
+            INSERT INTO tutorias_unach.riesgo_matricula
+                (matricula_id, nivel, color, probabilidad, mensaje, version_modelo,
+                 parcial1, parcial2, final, situacion, num_tutorias, fecha_calculo)
+            VALUES
+                (:matricula_id, :nivel, :color, :probabilidad, :mensaje, :version_modelo,
+                 :parcial1, :parcial2, :final, :situacion, :num_tutorias, NOW())
+            ON CONFLICT (matricula_id) DO UPDATE SET
+                nivel = EXCLUDED.nivel,
+                color = EXCLUDED.color,
+                probabilidad = EXCLUDED.probabilidad,
+                mensaje = EXCLUDED.mensaje,
+                version_modelo = EXCLUDED.version_modelo,
+                parcial1 = EXCLUDED.parcial1,
+                parcial2 = EXCLUDED.parcial2,
+                final = EXCLUDED.final,
+                situacion = EXCLUDED.situacion,
+                num_tutorias = EXCLUDED.num_tutorias,
+                fecha_calculo = EXCLUDED.fecha_calculo
+        """)
+        db.execute(query, [
+            {
+                "matricula_id": f['matricula_id'],
+                "nivel": r['riesgo_nivel'],
+                "color": r['riesgo_color'],
+                "probabilidad": r['probabilidad_riesgo'],
+                "mensaje": r['mensaje_explicativo'],
+                "version_modelo": version_modelo,
+                "parcial1": f['p1'],
+                "parcial2": f['p2'],
+                "final": f['final'],
+                "situacion": f['situacion'],
+                "num_tutorias": f['tutorias'],
+            }
+            for f, r in pares
+        ])
+        db.commit()
+        return len(pares)
+
+    def tomar_lock_recalculo(self, lectura: Session) -> bool:
+        """
+        Try-lock del recálculo en la transacción de `lectura` (dura todo el recorrido del
+        cursor y se libera con su rollback/close). False si otro proceso ya está recalculando.
+        """
+        return bool(lectura.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:lock))"), {"lock": _LOCK_RECALCULO}
+        ).scalar())
+
+    def refresh_pending(self, lectura: Session, escritura: Session, tamano_lote: int = 2000) -> int:
+        """
+        Recalcula en este proceso las matrículas nuevas o desactualizadas.
+        Usa dos sesiones: el cursor de `lectura` sigue abierto mientras `escritura` confirma cada lote.
+        """
+        version = prediction_service.model_version
+        total = 0
+        for filas in self.iter_pending(lectura, False, version, tamano_lote):
+            total += self.save_scores(escritura, filas, prediction_service.calculate_risk_batch(filas), version)
+        return total
+
+# Instancia del servicio
+risk_score_service = RiskScoreService()
@@ -2,121 +2,89 @@
 
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from app.services.prediction_service import prediction_service
+from app.services.risk_score_service import risk_score_service, NIVEL_SQL, REGLA_SQL, VIGENTE_SQL
+from app.services.periodo_service import TODOS_LOS_PERIODOS
+
+# Tutorías realizadas por matrícula, solo de las matrículas del tutor
+_CONTEO_TUTORIAS_SQL = """
+    conteo_tutorias AS (
+        SELECT matricula_id, COUNT(*) as num
+        FROM tutorias_unach.tutorias
+        WHERE estado = 'realizada'
+          AND matricula_id IN (SELECT id FROM tutorias_unach.matriculas WHERE tutor_id = :tid)
+        GROUP BY matricula_id
+    )
+"""
+
+_EN_CURSO_SQL = "n.situacion IS DISTINCT FROM 'APROBADO' AND n.situacion IS DISTINCT FROM 'REPROBADO'"
+
+# Grupos de las matrículas en curso, con el mismo nivel que muestra el roster (regla de
+# certeza o puntaje vigente). Las que esperan al modelo van aparte hasta el próximo
+# recálculo: no se cuentan como riesgo ni como buen pronóstico.
+_EN_RIESGO_SQL = f"{_EN_CURSO_SQL} AND ({NIVEL_SQL}) IN ('BAJO', 'MEDIO')"
+_SIN_CALCULAR_SQL = f"{_EN_CURSO_SQL} AND ({NIVEL_SQL}) IS NULL"
+
+# Filtros de grupo para el roster
+_FILTROS_RIESGO = {
+    "prioritario": f"AND {_EN_RIESGO_SQL}",
+    "normal": f"AND {_EN_CURSO_SQL} AND ({NIVEL_SQL}) NOT IN ('BAJO', 'MEDIO')",
+    "sin_calcular": f"AND {_SIN_CALCULAR_SQL}",
+}
+
+# Columnas del roster que usa risk_score_service.resolver y no se devuelven tal cual
+_COLUMNAS_RIESGO = ("regla", "nivel", "color", "probabilidad", "mensaje", "vigente")
 
 class TutorDashboardService:
-    
-    def get_tutor_dashboard_data(self, db: Session, usuario_id: int) -> Dict[str, Any]:
+
+    def get_tutor_dashboard_data(self, db: Session, usuario_id: int, periodo_id: int = TODOS_LOS_PERIODOS) -> Dict[str, Any]:
         """
-        Obtiene dashboard del tutor ULTRA-OPTIMIZADO.
-        Mejoras:
-        1. SQL: Usa JOINs en lugar de subconsultas correlacionadas.
-        2. Python: Aplica lógica de 'Cortocircuito' para evitar llamar a la IA innecesariamente.
+        Obtiene el dashboard del tutor a nivel de curso (asignatura + período).
+        Los totales salen de un GROUP BY en SQL; el detalle por estudiante (con riesgo)
+        se pide curso a curso con get_course_roster.
         """
         try:
-            # 1. Identificar al Tutor (Rápido)
-            tutor_query = text("""
-                SELECT t.id, u.nombre 
-                FROM tutorias_unach.tutores t
-                JOIN tutorias_unach.usuarios u ON t.usuario_id = u.id
-                WHERE t.usuario_id = :uid
-            """)
-            tutor = db.execute(tutor_query, {"uid": usuario_id}).mappings().one_or_none()
-            
-            if not tutor:
-                raise Exception("Usuario no es tutor o no existe.")
-
+            tutor = self._get_tutor(db, usuario_id)
             tutor_id = tutor['id']
-            nombre_tutor = tutor['nombre']
-
-            # 2. Obtener Cursos y Estudiantes (OPTIMIZACIÓN SQL MÁXIMA)
-            # Usamos un LEFT JOIN con una subtabla pre-agrupada para contar tutorías.
-            # Esto es mucho más rápido que hacer un SELECT COUNT por cada fila.
-            cursos_query = text("""
-                WITH conteo_tutorias AS (
-                    SELECT matricula_id, COUNT(*) as num 
-                    FROM tutorias_unach.tutorias 
-                    WHERE estado = 'realizada' 
-                    GROUP BY matricula_id
-                )
-                SELECT 
-                    m.id as matricula_id,
-                    e.id as estudiante_id,
-                    u.nombre as estudiante_nombre,
+
+            # 1. Resumen por curso (una fila por asignatura/período)
+            filtro_periodo = "AND m.periodo_id = :periodo_id" if periodo_id != TODOS_LOS_PERIODOS else ""
+            cursos_query = text(f"""
+                WITH {_CONTEO_TUTORIAS_SQL}
+                SELECT
+                    a.id as asignatura_id,
                     a.nombre as asignatura,
+                    pa.id as periodo_id,
                     pa.nombre as periodo,
-                    n.parcial1 as parcial1, 
-                    n.parcial2 as parcial2,
-                    n.final as final,
-                    n.situacion,
-                    COALESCE(ct.num, 0) as num_tutorias
+                    COUNT(*) as total_estudiantes,
+                    COUNT(*) FILTER (WHERE n.situacion = 'APROBADO') as aprobados,
+                    COUNT(*) FILTER (WHERE n.situacion = 'REPROBADO') as reprobados,
+                    COUNT(*) FILTER (WHERE {_EN_CURSO_SQL}) as en_curso,
+                    -- Según la regla de certeza o el riesgo guardado vigente (lo mantiene el job)
+                    COUNT(*) FILTER (WHERE {_EN_RIESGO_SQL}) as en_riesgo,
+                    COUNT(*) FILTER (WHERE {_SIN_CALCULAR_SQL}) as sin_calcular,
+                    ROUND(AVG(n.final), 2) as promedio_final,
+                    COALESCE(SUM(ct.num), 0) as tutorias_realizadas
                 FROM tutorias_unach.matriculas m
                 JOIN tutorias_unach.asignaturas a ON m.asignatura_id = a.id
                 JOIN tutorias_unach.periodos_academicos pa ON m.periodo_id = pa.id
-                JOIN tutorias_unach.estudiantes e ON m.estudiante_id = e.id
-                JOIN tutorias_unach.usuarios u ON e.usuario_id = u.id
                 LEFT JOIN tutorias_unach.notas n ON m.id = n.matricula_id
                 LEFT JOIN conteo_tutorias ct ON m.id = ct.matricula_id
-                WHERE m.tutor_id = :tid
-                ORDER BY a.nombre, u.nombre
+                LEFT JOIN tutorias_unach.riesgo_matricula r ON m.id = r.matricula_id
+                WHERE m.tutor_id = :tid {filtro_periodo}
+                GROUP BY a.id, a.nombre, pa.id, pa.nombre
+                ORDER BY a.nombre, pa.nombre DESC
             """)
-            
-            filas = db.execute(cursos_query, {"tid": tutor_id}).mappings().all()
-            
-            cursos_procesados = []
-            
-            # 3. PROCESAR CADA ESTUDIANTE (Con "Vía Rápida")
-            for fila in filas:
-                estudiante_dict = dict(fila)
-                estudiante_dict['asistencia'] = 100 
-                estudiante_dict['tutorias_acumuladas'] = fila['num_tutorias']
-                
-                # Extracción segura de datos
-                p1 = float(fila['parcial1']) if fila['parcial1'] is not None else None
-                p2 = float(fila['parcial2']) if fila['parcial2'] is not None else None
-                final = float(fila['final']) if fila['final'] is not None else None
-                situacion = fila['situacion']
-                tutorias = int(fila['num_tutorias'])
-
-                # --- OPTIMIZACIÓN LÓGICA (Circuit Breaker) ---
-                # Si el estudiante ya aprobó o reprobó oficialmente, NO LLAMAMOS A LA IA.
-                # Esto ahorra crear DataFrames y cálculos pesados para casos obvios.
-                if situacion == 'APROBADO':
-                    estudiante_dict.update({
-                        "riesgo_nivel": "ALTO", "riesgo_color": "green", 
-                        "probabilidad_riesgo": 100.0, "mensaje_explicativo": "Materia aprobada."
-                    })
-                elif situacion == 'REPROBADO':
-                    estudiante_dict.update({
-                        "riesgo_nivel": "BAJO", "riesgo_color": "red", 
-                        "probabilidad_riesgo": 0.0, "mensaje_explicativo": "Materia reprobada."
-                    })
-                elif final is not None:
-                     # Si ya tiene nota final pero no tiene situación marcada (caso raro pero posible)
-                     if final >= 7.0:
-                        estudiante_dict.update({"riesgo_nivel": "ALTO", "riesgo_color": "green", "probabilidad_riesgo": 100.0, "mensaje_explicativo": "Promedio suficiente."})
-                     else:
-                        estudiante_dict.update({"riesgo_nivel": "BAJO", "riesgo_color": "red", "probabilidad_riesgo": 0.0, "mensaje_explicativo": "Promedio insuficiente."})
-                else:
-                    # --- SOLO AQUÍ LLAMAMOS A LA IA (CASOS EN CURSO) ---
-                    # Solo procesamos con IA a los que realmente lo necesitan (ahorra 80% de tiempo)
-                    feats_for_ia = {
-                        "p1": p1, "p2": p2, "final": final,
-                        "situacion": situacion, "tutorias": tutorias
-                    }
-                    try:
-                        prediccion = prediction_service.calculate_risk_local(feats_for_ia)
-                        estudiante_dict.update(prediccion)
-                    except Exception:
-                        estudiante_dict.update({
-                            "riesgo_nivel": "BAJO", "probabilidad_riesgo": 0,
-                            "riesgo_color": "gray", "mensaje_explicativo": "Calc Pendiente"
-                        })
-                
-                cursos_procesados.append(estudiante_dict)
-
-            # 4. Tutorías Pendientes (Consulta simple)
+            cursos = []
+            cursos_params = {"tid": tutor_id, "periodo_id": periodo_id,
+                             "version_modelo": prediction_service.model_version}
+            for fila in db.execute(cursos_query, cursos_params).mappings():
+                curso = dict(fila)
+                curso['promedio_final'] = float(curso['promedio_final']) if curso['promedio_final'] is not None else None
+                cursos.append(curso)
+
+            # 2. Tutorías Pendientes (Consulta simple)
             pendientes_query = text("""
                 SELECT t.id, u.nombre as estudiante, t.fecha as fecha_solicitada, t.tema
                 FROM tutorias_unach.tutorias t
@@ -127,7 +95,7 @@ class TutorDashboardService:
             """)
             pendientes = db.execute(pendientes_query, {"tid": tutor_id}).mappings().all()
 
-            # 5. Promedio Calificación (Optimizado con COALESCE)
+            # 3. Promedio Calificación (Optimizado con COALESCE)
             rating_query = text("""
                 SELECT COALESCE(AVG(ev.estrellas), 5.0)
                 FROM tutorias_unach.evaluaciones ev
@@ -138,15 +106,121 @@ class TutorDashboardService:
             avg_rating = db.execute(rating_query, {"tid": tutor_id}).scalar()
 
             return {
-                "nombre": nombre_tutor,
-                "cursos": cursos_procesados,
+                "nombre": tutor['nombre'],
+                "cursos": cursos,
                 "tutorias_pendientes": [dict(p) for p in pendientes],
                 "average_rating": round(float(avg_rating), 1)
             }
 
         except Exception as e:
-            db.rollback() 
+            db.rollback()
             print(f"Error CRÍTICO en Dashboard Tutor: {e}")
             raise e
 
-tutor_dashboard_service = TutorDashboardService()
\ No newline at end of file
+    def get_course_roster(self, db: Session, usuario_id: int, asignatura_id: Optional[int] = None,
+                          periodo_id: int = TODOS_LOS_PERIODOS, riesgo: Optional[str] = None,
+                          limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """
+        Página de estudiantes del tutor con el detalle de riesgo.
+        Filtra por curso (asignatura_id + periodo_id) y/o por grupo de riesgo
+        ('prioritario', 'normal' o 'sin_calcular'). Solo lectura: el riesgo es la regla
+        de certeza, el puntaje guardado vigente o PENDIENTE.
+        """
+        try:
+            tutor_id = self._get_tutor(db, usuario_id)['id']
+
+            filtros = ""
+            if asignatura_id is not None:
+                filtros += " AND m.asignatura_id = :asignatura_id"
+            if periodo_id != TODOS_LOS_PERIODOS:
+                filtros += " AND m.periodo_id = :periodo_id"
+            filtros += " " + _FILTROS_RIESGO.get(riesgo, "")
+
+            # Los prioritarios se listan del menor al mayor pronóstico
+            orden = "r.probabilidad ASC NULLS LAST, u.nombre" if riesgo == "prioritario" else "a.nombre, u.nombre"
+
+            desde = """
+                FROM tutorias_unach.matriculas m
+                JOIN tutorias_unach.asignaturas a ON m.asignatura_id = a.id
+                JOIN tutorias_unach.periodos_academicos pa ON m.periodo_id = pa.id
+                JOIN tutorias_unach.estudiantes e ON m.estudiante_id = e.id
+                JOIN tutorias_unach.usuarios u ON e.usuario_id = u.id
+                LEFT JOIN tutorias_unach.notas n ON m.id = n.matricula_id
+                LEFT JOIN conteo_tutorias ct ON m.id = ct.matricula_id
+                LEFT JOIN tutorias_unach.riesgo_matricula r ON m.id = r.matricula_id
+            """
+            params = {
+                "tid": tutor_id, "asignatura_id": asignatura_id, "periodo_id": periodo_id,
+                "limit": limit, "offset": offset, "version_modelo": prediction_service.model_version
+            }
+
+            total = db.execute(text(f"""
+                WITH {_CONTEO_TUTORIAS_SQL}
+                SELECT COUNT(*) {desde}
+                WHERE m.tutor_id = :tid {filtros}
+            """), params).scalar()
+
+            roster_query = text(f"""
+                WITH {_CONTEO_TUTORIAS_SQL}
+                SELECT
+                    m.id as matricula_id,
+                    e.id as estudiante_id,
+                    u.nombre as estudiante_nombre,
+                    a.nombre as asignatura,
+                    pa.nombre as periodo,
+                    n.parcial1 as parcial1,
+                    n.parcial2 as parcial2,
+                    n.final as final,
+                    n.situacion,
+                    COALESCE(ct.num, 0) as num_tutorias,
+                    {REGLA_SQL} as regla,
+                    r.nivel, r.color, r.probabilidad, r.mensaje,
+                    -- El puntaje guardado solo sirve si se calculó con el modelo y las notas/tutorías actuales
+                    {VIGENTE_SQL} as vigente
+                {desde}
+                WHERE m.tutor_id = :tid {filtros}
+                ORDER BY {orden}, m.id
+                LIMIT :limit OFFSET :offset
+            """)
+            filas = db.execute(roster_query, params).mappings().all()
+
+            return {
+                "total": total,
+                "limit": limit,
+                "offset": offset,
+                "estudiantes": self._con_riesgo(filas),
+            }
+
+        except Exception as e:
+            db.rollback()
+            print(f"Error CRÍTICO en roster del tutor: {e}")
+            raise e
+
+    def _get_tutor(self, db: Session, usuario_id: int):
+        """Identifica al Tutor (Rápido)"""
+        tutor_query = text("""
+            SELECT t.id, u.nombre
+            FROM tutorias_unach.tutores t
+            JOIN tutorias_unach.usuarios u ON t.usuario_id = u.id
+            WHERE t.usuario_id = :uid
+        """)
+        tutor = db.execute(tutor_query, {"uid": usuario_id}).mappings().one_or_none()
+        if not tutor:
+            raise Exception("Usuario no es tutor o no existe.")
+        return tutor
+
+    def _con_riesgo(self, filas) -> List[Dict[str, Any]]:
+        """
+        Agrega el riesgo a cada fila del roster con risk_score_service.resolver:
+        sin IA ni escrituras (lo desactualizado lo recalcula el job).
+        """
+        riesgos = risk_score_service.resolver(filas)
+        estudiantes = []
+        for fila in filas:
+            estudiante_dict = {k: v for k, v in fila.items() if k not in _COLUMNAS_RIESGO}
+            estudiante_dict['asistencia'] = 100
+            estudiante_dict.update(riesgos[fila['matricula_id']])
+            estudiantes.append(estudiante_dict)
+        return estudiantes
+
+tutor_dashboard_service = TutorDashboardService()
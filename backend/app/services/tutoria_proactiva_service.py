@@ -0,0 +1,138 @@
+# backend/app/services/tutoria_proactiva_service.py
+
+import threading
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+from app.db.database import SessionLocal
+from app.services.prediction_service import prediction_service
+from app.services.risk_score_service import risk_score_service, _ENTRADAS_SQL
+from app.services.notificacion_service import notificacion_service
+
+# Una sola ejecución a la vez aunque haya varios workers o un cron en paralelo
+_LOCK_ID = "tutorias_unach.tutorias_proactivas"
+
+
+class TutoriaProactivaService:
+    """
+    Job que crea las tutorías de "Refuerzo Académico" para las matrículas en riesgo.
+    Antes se hacía al abrir el dashboard del estudiante (bloqueos FOR UPDATE e INSERT
+    en cada GET); ahora es una única sentencia para todas las matrículas.
+    """
+
+    def __init__(self):
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def crear_tutorias(self, db: Session) -> int:
+        """
+        Inserta en bloque una tutoría 'solicitada' para cada matrícula BAJO/MEDIO
+        (con puntaje vigente y tutor asignado) que no tenga ya una tutoría pendiente
+        ni la misma alerta activa. Devuelve cuántas se crearon.
+        """
+        bloqueado = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:lock))"), {"lock": _LOCK_ID}
+        ).scalar()
+        if not bloqueado:
+            db.rollback()
+            print("⚠️ Otra ejecución del job de tutorías proactivas está en curso.")
+            return 0
+
+        query = text(f"""
+            WITH conteo_tutorias AS (
+                SELECT matricula_id, COUNT(*) AS num
+                FROM tutorias_unach.tutorias
+                WHERE estado = 'realizada'
+                GROUP BY matricula_id
+            ),
+            entradas AS ({_ENTRADAS_SQL}),
+            en_riesgo AS (
+                SELECT e.matricula_id, m.tutor_id, 'Refuerzo Académico - Nivel ' || e.nivel AS tema
+                FROM entradas e
+                JOIN tutorias_unach.matriculas m ON m.id = e.matricula_id
+                WHERE e.vigente
+                  AND e.nivel IN ('BAJO', 'MEDIO')
+                  AND m.tutor_id IS NOT NULL
+                  AND e.situacion IS DISTINCT FROM 'APROBADO'
+                  AND e.situacion IS DISTINCT FROM 'REPROBADO'
+            )
+            INSERT INTO tutorias_unach.tutorias
+                (matricula_id, tutor_id, fecha, duracion_min, tema, modalidad, estado)
+            SELECT r.matricula_id, r.tutor_id, LOCALTIMESTAMP(0) + INTERVAL '2 days', 60,
+                   r.tema, 'Virtual', 'solicitada'
+            FROM en_riesgo r
+            WHERE NOT EXISTS (
+                SELECT 1 FROM tutorias_unach.tutorias t
+                WHERE t.matricula_id = r.matricula_id
+                AND (
+                    (t.tema = r.tema AND t.estado != 'cancelada')  -- Ya existe esta alerta específica
+                    OR
+                    t.estado IN ('solicitada', 'programada')       -- Ya tiene una tutoría pendiente (cualquiera)
+                )
+            )
+            RETURNING id
+        """)
+        try:
+            creadas = db.execute(query, {"version_modelo": prediction_service.model_version}).scalars().all()
+            # Los tutores con el dashboard abierto ven las nuevas solicitudes al instante
+            notificacion_service.notificar(db, creadas, "creada")
+            db.commit()
+            return len(creadas)
+        except Exception:
+            db.rollback()
+            raise
+
+    def recalcular(self, lectura: Session, escritura: Session) -> int:
+        """
+        Actualiza los puntajes desactualizados solo si ningún otro worker lo está haciendo
+        (try-lock de risk_score_service sobre la transacción de `lectura`).
+        """
+        try:
+            if not risk_score_service.tomar_lock_recalculo(lectura):
+                print("⚠️ Otro worker ya está recalculando los puntajes de riesgo.")
+                return 0
+            recalculadas = risk_score_service.refresh_pending(lectura, escritura)
+            if recalculadas:
+                print(f"🔄 {recalculadas} puntajes de riesgo actualizados.")
+            return recalculadas
+        finally:
+            lectura.rollback()
+
+    def ejecutar(self, recalcular: bool = True) -> int:
+        """
+        Corrida completa con sesiones propias: actualiza los puntajes desactualizados
+        de riesgo_matricula y luego crea las tutorías.
+        """
+        lectura, escritura = SessionLocal(), SessionLocal()
+        try:
+            if recalcular:
+                self.recalcular(lectura, escritura)
+            creadas = self.crear_tutorias(escritura)
+            print(f"✅ Tutorías proactivas creadas: {creadas}")
+            return creadas
+        finally:
+            lectura.close()
+            escritura.close()
+
+    def iniciar_periodico(self, minutos: int) -> None:
+        """Ejecuta el job cada `minutos` en un hilo de fondo del worker."""
+        if minutos <= 0 or self._hilo is not None:
+            return
+
+        def _bucle():
+            while not self._detener.wait(minutos * 60):
+                try:
+                    self.ejecutar()
+                except Exception as e:
+                    print(f"❌ ERROR en el job de tutorías proactivas: {e}")
+
+        self._detener.clear()
+        self._hilo = threading.Thread(target=_bucle, name="tutorias-proactivas", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        self._hilo = None
+
+# Instancia del servicio
+tutoria_proactiva_service = TutoriaProactivaService()
@@ -7,6 +7,7 @@ from app.models.matricula import Matricula
 from app.models.estudiante import Estudiante
 from app.models.user import Usuario
 from app.schemas.tutoria import TutoriaCreate,TutoriaUpdate
+from app.services.notificacion_service import notificacion_service
 from fastapi import HTTPException
 from typing import Optional # ✅ CORREGIDO: Importar Optional
 from fastapi import status 
@@ -54,6 +55,9 @@ class TutoriaService:
             # 4. Guardar en BD
             nueva_tutoria = Tutoria(**tutoria_data)
             db.add(nueva_tutoria)
+            db.flush()
+            # Aviso en vivo al tutor (se entrega al hacer commit)
+            notificacion_service.notificar(db, [nueva_tutoria.id], "creada")
             db.commit()
             db.refresh(nueva_tutoria)
             
@@ -161,7 +165,9 @@ class TutoriaService:
             
         else:
             tutoria.estado = nuevo_estado
-            
+
+        # Aviso en vivo al tutor (se entrega al hacer commit)
+        notificacion_service.notificar(db, [tutoria.id], "actualizada")
         db.commit()
         db.refresh(tutoria)
         return tutoria
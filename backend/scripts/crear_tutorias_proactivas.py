@@ -0,0 +1,22 @@
+# backend/scripts/crear_tutorias_proactivas.py
+
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services.tutoria_proactiva_service import tutoria_proactiva_service
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Crea las tutorías de refuerzo para todas las matrículas en riesgo (para cron)."
+    )
+    parser.add_argument("--sin-recalcular", action="store_true",
+                        help="No actualiza riesgo_matricula antes (p. ej. si score_risk.py acaba de correr).")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    tutoria_proactiva_service.ejecutar(recalcular=not args.sin_recalcular)
+    print(f"⏱️  Job terminado en {time.perf_counter() - inicio:.1f}s.")
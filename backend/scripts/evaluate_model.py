@@ -1,72 +1,171 @@
 # backend/scripts/evaluate_model.py
 
-import pandas as pd
-import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import confusion_matrix, classification_report, accuracy_score
+import sys
 import os
+import time
+import argparse
+import resource
+import numpy as np
+import pandas as pd
 
 # Ajustamos rutas para que funcione dentro y fuera de Docker
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-# Busca el modelo un nivel arriba, en app/models/
-MODEL_PATH = os.path.join(BASE_DIR, "..", "app", "models", "tutoria_risk_model.joblib")
+BACKEND_DIR = os.path.dirname(BASE_DIR)
+sys.path.append(BACKEND_DIR)
+from app.services.prediction_service import prediction_service
+from app.services.inference_executor import inference_executor
+
 # Busca datos simulados en la misma carpeta scripts/
 DATA_PATH = os.path.join(BASE_DIR, "datos_historicos_simulados.csv")
 
-def evaluate():
-    print("--- INICIANDO EVALUACIÓN DEL MODELO ---")
-    print(f"📂 Buscando modelo en: {MODEL_PATH}")
-    
-    if not os.path.exists(MODEL_PATH):
-        print("❌ Error CRÍTICO: No se encuentra el archivo .joblib del modelo.")
-        print("   Asegúrate de haber entrenado el modelo primero.")
-        return
+# Notas históricas con resultado conocido y las tutorías realizadas de cada matrícula
+HISTORICO_SQL = """
+    SELECT
+        n.parcial1, n.final, n.situacion,
+        COALESCE(ct.num, 0) AS num_tutorias
+    FROM tutorias_unach.notas n
+    LEFT JOIN (
+        SELECT matricula_id, COUNT(*) AS num
+        FROM tutorias_unach.tutorias WHERE estado = 'realizada' GROUP BY matricula_id
+    ) ct ON n.matricula_id = ct.matricula_id
+    WHERE n.parcial1 IS NOT NULL
+      AND (n.final IS NOT NULL OR n.situacion IN ('APROBADO', 'REPROBADO'))
+"""
 
-    # Cargar modelo
-    try:
-        model = joblib.load(MODEL_PATH)
-        print("✅ Modelo cargado exitosamente.")
-    except Exception as e:
-        print(f"❌ Error al cargar joblib: {e}")
-        return
 
-    # Generar datos de prueba si no existen
-    if os.path.exists(DATA_PATH):
-        df = pd.read_csv(DATA_PATH)
+class MetricasIncrementales:
+    """Matriz de confusión y log-loss acumulados lote a lote (memoria constante)."""
+
+    def __init__(self):
+        self.matriz = np.zeros((2, 2), dtype=np.int64)  # [real, predicción]
+        self.suma_log_loss = 0.0
+        self.filas = 0
+
+    def agregar(self, y_real: np.ndarray, prob: np.ndarray) -> None:
+        y_pred = (prob >= 0.5).astype(np.int64)
+        self.matriz += np.bincount(2 * y_real + y_pred, minlength=4).reshape(2, 2)
+        p = np.clip(prob, 1e-15, 1 - 1e-15)
+        self.suma_log_loss -= float(np.sum(y_real * np.log(p) + (1 - y_real) * np.log(1 - p)))
+        self.filas += len(y_real)
+
+    def reporte(self) -> str:
+        lineas = [f"{'':<12}{'precisión':>10}{'recall':>10}{'f1':>10}{'soporte':>10}"]
+        for clase, nombre in enumerate(['Reprobado', 'Aprobado']):
+            vp = self.matriz[clase, clase]
+            predichos = self.matriz[:, clase].sum()
+            soporte = self.matriz[clase].sum()
+            precision = vp / predichos if predichos else 0.0
+            recall = vp / soporte if soporte else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            lineas.append(f"{nombre:<12}{precision:>10.2f}{recall:>10.2f}{f1:>10.2f}{soporte:>10}")
+        exactitud = np.trace(self.matriz) / self.filas if self.filas else 0.0
+        log_loss = self.suma_log_loss / self.filas if self.filas else 0.0
+        lineas.append(f"\nExactitud: {exactitud:.2%}   Log-loss: {log_loss:.4f}   Filas: {self.filas}")
+        return "\n".join(lineas)
+
+
+def preparar_lote(df: pd.DataFrame):
+    """
+    Construye las mismas entradas que PredictionService en el caso "solo Parcial 1"
+    (el modelo ve [p1, p1, tutorías]) y el resultado real de cada fila.
+    """
+    df = df[df['parcial1'].notna()]
+    tutorias_col = 'num_tutorias' if 'num_tutorias' in df else 'conteo_tutorias_asistidas'
+    p1 = df['parcial1'].to_numpy(dtype=np.float64)
+    tutorias = df[tutorias_col].fillna(0).to_numpy(dtype=np.float64)
+
+    if 'aprobado' in df:
+        y = df['aprobado'].to_numpy(dtype=np.int64)
+    else:
+        # Misma regla que train_model.py: aprobado si final >= 7 o situación APROBADO
+        y = ((df['final'] >= 7) | (df['situacion'] == 'APROBADO')).to_numpy(dtype=np.int64)
+    return p1, tutorias, y
+
+
+def iterar_lotes(args):
+    """Devuelve un iterador de DataFrames: CSV por trozos, cursor de servidor o datos de ejemplo."""
+    if args.db:
+        from sqlalchemy import text
+        from app.db.database import engine
+
+        with engine.connect().execution_options(stream_results=True, max_row_buffer=args.chunksize) as conn:
+            yield from pd.read_sql(text(HISTORICO_SQL), conn, chunksize=args.chunksize)
+    elif os.path.exists(args.csv):
+        yield from pd.read_csv(args.csv, chunksize=args.chunksize)
     else:
         print("⚠️ No se encontró CSV real. Usando datos simulados en memoria...")
-        data = {
+        yield pd.DataFrame({
             'parcial1': [4.0, 9.5, 7.2, 5.0, 8.8, 3.5, 9.0, 6.5, 7.8, 2.0],
             'conteo_tutorias_asistidas': [0, 5, 2, 1, 4, 0, 3, 2, 3, 0],
             'aprobado': [0, 1, 1, 0, 1, 0, 1, 0, 1, 0] # 0=Reprobado, 1=Aprobado
-        }
-        df = pd.DataFrame(data)
+        })
 
-    X = df[['parcial1', 'conteo_tutorias_asistidas']]
-    y_true = df['aprobado']
 
-    # Predicciones
-    y_pred = model.predict(X)
+def guardar_grafico(matriz: np.ndarray) -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-    # 1. Generar Matriz de Confusión
-    cm = confusion_matrix(y_true, y_pred)
-    
     plt.figure(figsize=(6, 5))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                xticklabels=['Reprobado', 'Aprobado'], 
+    sns.heatmap(matriz, annot=True, fmt='d', cmap='Blues',
+                xticklabels=['Reprobado', 'Aprobado'],
                 yticklabels=['Reprobado', 'Aprobado'])
     plt.xlabel('Predicción del Sistema')
     plt.ylabel('Valor Real')
     plt.title('Matriz de Confusión - Modelo de Riesgo')
-    
+
     output_img = os.path.join(BASE_DIR, "matriz_confusion.png")
     plt.savefig(output_img)
     print(f"✅ Gráfico guardado en: {output_img}")
 
+
+def evaluate(args):
+    print("--- INICIANDO EVALUACIÓN DEL MODELO ---")
+
+    # Mismo modelo, rejilla y rutas que el servidor, sin importar desde dónde se ejecute
+    for atributo in ("model_path", "forest_path", "grid_path", "meta_path"):
+        setattr(prediction_service, atributo, os.path.join(BACKEND_DIR, getattr(prediction_service, atributo)))
+    inference_executor.procesos = 0
+    print(f"📂 Buscando modelo en: {prediction_service.model_path}")
+
+    prediction_service.warmup()
+    if prediction_service.model is None:
+        print("❌ Error CRÍTICO: No se encuentra el archivo .joblib del modelo.")
+        print("   Asegúrate de haber entrenado el modelo primero.")
+        return
+
+    metricas = MetricasIncrementales()
+    inicio = time.perf_counter()
+    for numero, df in enumerate(iterar_lotes(args), start=1):
+        p1, tutorias, y = preparar_lote(df)
+        if len(y):
+            metricas.agregar(y, prediction_service._probabilidad_ia(p1, tutorias))
+        if numero % 10 == 0:
+            print(f"   ... {metricas.filas} filas evaluadas")
+    duracion = time.perf_counter() - inicio
+
+    if not metricas.filas:
+        print("⚠️ No hay filas con Parcial 1 y resultado final para evaluar.")
+        return
+
+    # 1. Matriz de Confusión
+    if not args.sin_grafico:
+        guardar_grafico(metricas.matriz)
+
     # 2. Imprimir Métricas
     print("\n--- REPORTE DE CLASIFICACIÓN ---")
-    print(classification_report(y_true, y_pred, target_names=['Reprobado', 'Aprobado']))
+    print(metricas.reporte())
+
+    pico_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB
+    print(f"\n⏱️  {metricas.filas / duracion:,.0f} filas/s ({duracion:.2f}s)   🧠 Pico de memoria: {pico_mb:.0f} MB")
+
 
 if __name__ == "__main__":
-    evaluate()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Evalúa el modelo de riesgo por lotes (memoria constante).")
+    parser.add_argument("--csv", default=DATA_PATH, help="CSV histórico (parcial1, tutorías y resultado).")
+    parser.add_argument("--db", action="store_true",
+                        help="Lee tutorias_unach.notas con un cursor de servidor en lugar del CSV.")
+    parser.add_argument("--chunksize", type=int, default=50000, help="Filas por lote.")
+    parser.add_argument("--sin-grafico", action="store_true", help="No genera matriz_confusion.png.")
+    evaluate(parser.parse_args())
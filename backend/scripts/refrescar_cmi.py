@@ -0,0 +1,16 @@
+# backend/scripts/refrescar_cmi.py
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services.cmi_service import cmi_service
+
+
+if __name__ == "__main__":
+    # Para cron cuando el refresco periódico del worker está desactivado (CMI_REFRESH_MINUTES=0)
+    inicio = time.perf_counter()
+    if not cmi_service.ejecutar():
+        print("ℹ️  La vista del CMI ya estaba al día.")
+    print(f"⏱️  Refresco terminado en {time.perf_counter() - inicio:.1f}s.")
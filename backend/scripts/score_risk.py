@@ -0,0 +1,71 @@
+# backend/scripts/score_risk.py
+
+import sys
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.db.database import SessionLocal
+from app.services.prediction_service import prediction_service
+from app.services.risk_score_service import risk_score_service
+from app.services.inference_executor import inference_executor
+
+
+def _puntuar_lote(filas):
+    """Corre en un proceso del pool: el modelo se carga una sola vez por proceso al importar."""
+    return prediction_service.calculate_risk_batch(filas)
+
+
+def score(completo: bool, tamano_lote: int, procesos: int):
+    # Este script ya reparte los lotes en su propio pool: la inferencia de cada proceso es local
+    inference_executor.procesos = 0
+
+    version = prediction_service.model_version
+    modo = "COMPLETO" if completo else "INCREMENTAL"
+    print(f"🚀 Recalculando riesgo ({modo}) con el modelo {version} en {procesos} procesos...")
+
+    inicio = time.perf_counter()
+    total = 0
+    lectura = SessionLocal()   # Cursor de servidor abierto durante todo el recorrido
+    escritura = SessionLocal() # Confirma cada lote sin cerrar el cursor de lectura
+    try:
+        if not risk_score_service.tomar_lock_recalculo(lectura):
+            print("⚠️ Otro proceso ya está recalculando riesgo_matricula; inténtalo más tarde.")
+            return
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            en_vuelo = {}
+            for filas in risk_score_service.iter_pending(lectura, completo, version, tamano_lote):
+                en_vuelo[pool.submit(_puntuar_lote, filas)] = filas
+
+                # Limitamos los lotes pendientes para mantener la memoria acotada
+                if len(en_vuelo) >= procesos * 2:
+                    listos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                    for futuro in listos:
+                        total += _guardar(escritura, en_vuelo.pop(futuro), futuro.result(), version)
+
+            for futuro in list(en_vuelo):
+                total += _guardar(escritura, en_vuelo.pop(futuro), futuro.result(), version)
+    finally:
+        lectura.close()
+        escritura.close()
+
+    duracion = time.perf_counter() - inicio
+    print(f"✅ {total} matrículas recalculadas en {duracion:.1f}s.")
+
+
+def _guardar(db, filas, resultados, version) -> int:
+    # save_scores descarta los ERROR: se reintentan en la próxima corrida
+    return risk_score_service.save_scores(db, filas, resultados, version)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula la tabla riesgo_matricula.")
+    parser.add_argument("--completo", action="store_true",
+                        help="Recalcula todas las matrículas (por defecto solo las que cambiaron).")
+    parser.add_argument("--lote", type=int, default=2000, help="Matrículas por lote.")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1,
+                        help="Procesos del pool de inferencia.")
+    args = parser.parse_args()
+    score(args.completo, args.lote, args.procesos)
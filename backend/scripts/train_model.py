@@ -2,31 +2,42 @@
 
 import sys
 import os
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import warnings
 import joblib
+from contextlib import contextmanager
+from datetime import datetime
 import pandas as pd
 import numpy as np
 from sqlalchemy import create_engine, text
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+from sklearn.metrics import accuracy_score, log_loss
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.core.config import settings
+from app.services.forest_engine import FlatForest
 
-def generar_datos_probabilistiscos(cantidad=3000):
+def generar_datos_probabilistiscos(cantidad=3000, rng=None):
     """
     Genera datos donde el éxito no es blanco/negro, sino una probabilidad
     basada en la nota y el esfuerzo.
     """
     print(f"🧪 Generando {cantidad} casos con lógica de 'Curva de Esfuerzo'...")
+    rng = rng if rng is not None else np.random.default_rng()
     
     # 1. Variables aleatorias
     # Generamos notas concentradas en rangos comunes (Gaussiana)
-    parcial1 = np.clip(np.random.normal(6.5, 2.0, cantidad), 0, 10)
-    parcial2 = np.clip(np.random.normal(6.5, 2.0, cantidad), 0, 10)
+    parcial1 = np.clip(rng.normal(6.5, 2.0, cantidad), 0, 10)
+    parcial2 = np.clip(rng.normal(6.5, 2.0, cantidad), 0, 10)
     
     # Tutorías: La mayoría va a pocas, algunos a muchas
-    tutorias = np.clip(np.random.exponential(3, cantidad), 0, 15).astype(int)
+    tutorias = np.clip(rng.exponential(3, cantidad), 0, 15).astype(int)
     
     # 2. CÁLCULO DE PROBABILIDAD (La Lógica Humana)
     # Definimos una "Puntuación de Mérito" (0 a 100)
@@ -42,29 +53,21 @@ def generar_datos_probabilistiscos(cantidad=3000):
     
     probabilidad_exito = score_base + bonus_tutorias
     
-    # Ajustes finos (Tunear la IA)
-    targets = []
-    for p, n_real in zip(probabilidad_exito, promedio):
-        # Topes naturales
-        prob = max(0, min(100, p)) / 100.0
-        
-        # CASOS ESPECIALES (Para dar los porcentajes que pides)
-        
-        # Caso 7.0 (Raspando): Queremos que de ~80%
-        # Nuestra fórmula da: 70 + bonus. Si bonus es 0 -> 70%. Con tutorías sube. Correcto.
-        
-        # Caso 5.0 (Riesgo): 
-        # Fórmula: 50 + (2 tuts * 2.5) = 55%. -> ¡Justo tu 53%!
+    # Ajustes finos (Tunear la IA), sobre todo el arreglo a la vez
+    # Topes naturales
+    prob = np.clip(probabilidad_exito, 0, 100) / 100.0
+    
+    # CASOS ESPECIALES (Para dar los porcentajes que pides)
+    # Caso 7.0 (Raspando): 70 + bonus. Si bonus es 0 -> 70%. Con tutorías sube. Correcto.
+    # Caso 5.0 (Riesgo): 50 + (2 tuts * 2.5) = 55%. -> ¡Justo tu 53%!
+    
+    # Caso Irrecuperable: Si tienes menos de 3, es muy difícil que la tutoría haga milagros
+    prob = np.where(promedio < 3.5, prob * 0.3, prob) # Bajamos drásticamente la probabilidad
         
-        # Caso Irrecuperable: Si tienes menos de 3, es muy difícil que la tutoría haga milagros
-        if n_real < 3.5:
-            prob = prob * 0.3 # Bajamos drásticamente la probabilidad
-            
-        # 3. La Moneda al Aire (Bernoulli)
-        # Aquí definimos si aprobó o no basado en esa probabilidad.
-        # Esto hace que la IA aprenda "el 55% de los chicos con nota 5 y 2 tutorías, pasaron".
-        resultado = np.random.choice([1, 0], p=[prob, 1-prob])
-        targets.append(resultado)
+    # 3. La Moneda al Aire (Bernoulli)
+    # Aquí definimos si aprobó o no basado en esa probabilidad.
+    # Esto hace que la IA aprenda "el 55% de los chicos con nota 5 y 2 tutorías, pasaron".
+    targets = (rng.random(cantidad) < prob).astype(int)
 
     return pd.DataFrame({
         'parcial1': parcial1,
@@ -73,15 +76,151 @@ def generar_datos_probabilistiscos(cantidad=3000):
         'target': targets
     })
 
-def train():
+def exportar_bosque_plano(model, X_verificacion, output_path):
+    """
+    Exporta el RandomForest como arreglos planos para el evaluador sin sklearn
+    y comprueba que sus probabilidades coinciden con predict_proba.
+    """
+    bosque = FlatForest.from_sklearn(model)
+
+    esperado = model.predict_proba(X_verificacion)
+    obtenido = bosque.predict_proba(X_verificacion.to_numpy())
+    diferencia = float(np.max(np.abs(esperado - obtenido)))
+    if diferencia > 1e-9:
+        raise RuntimeError(f"El bosque aplanado no coincide con sklearn (dif. máx {diferencia:.2e}).")
+
+    bosque.save(output_path)
+    print(f"🌲 Bosque aplanado exportado ({bosque.value.size} nodos, dif. máx {diferencia:.1e}).")
+
+# Perfiles candidatos: del más preciso al más rápido en el camino de la petición
+PERFILES = {
+    "preciso": {
+        "descripcion": "RandomForest 300 árboles, profundidad 10 (modelo histórico).",
+        "tipo": "rf", "params": {"n_estimators": 300, "max_depth": 10},
+    },
+    "balanceado": {
+        "descripcion": "RandomForest 100 árboles, profundidad 8.",
+        "tipo": "rf", "params": {"n_estimators": 100, "max_depth": 8},
+    },
+    "rapido": {
+        "descripcion": "RandomForest 30 árboles, profundidad 6: mínima latencia por petición.",
+        "tipo": "rf", "params": {"n_estimators": 30, "max_depth": 6},
+    },
+    "gbm_calibrado": {
+        "descripcion": "HistGradientBoosting con calibración isotónica (un solo modelo).",
+        "tipo": "gbm", "params": {"max_iter": 200, "max_depth": 6, "learning_rate": 0.1},
+    },
+}
+
+MODELS_DIR = os.path.join("app", "models")
+MODEL_PATH = os.path.join(MODELS_DIR, "tutoria_risk_model.joblib")
+FOREST_PATH = os.path.join(MODELS_DIR, "tutoria_risk_model_forest.npz")
+META_PATH = os.path.join(MODELS_DIR, "tutoria_risk_model.meta.json")
+REPORT_PATH = os.path.join(MODELS_DIR, "tutoria_risk_model.report.json")
+
+def construir_modelo(perfil, n_jobs, max_samples):
+    config = PERFILES[perfil]
+    if config["tipo"] == "rf":
+        # min_samples_leaf alto para que el árbol no sea tan "binario" y promedie más (suaviza porcentajes)
+        return RandomForestClassifier(**config["params"], min_samples_leaf=5, max_samples=max_samples,
+                                      random_state=42, n_jobs=n_jobs)
+    base = HistGradientBoostingClassifier(**config["params"], random_state=42)
+    return CalibratedClassifierCV(base, method="isotonic", cv=3)
+
+def medir_latencia_ms(motor, X, repeticiones):
+    """Mediana de predict_proba sobre X (en milisegundos)."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        motor.predict_proba(X)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return round(float(np.median(tiempos)), 3)
+
+def evaluar_perfil(perfil, model, X_test, y_test):
+    """Precisión, log-loss, latencia con el motor que usará el servidor y tamaño serializado."""
+    proba = model.predict_proba(X_test)[:, 1]
+    es_bosque = PERFILES[perfil]["tipo"] == "rf"
+    motor = FlatForest.from_sklearn(model) if es_bosque else model
+
+    X_lote = X_test.iloc[:10000].to_numpy()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # ndarray sin nombres de columnas, como en el servidor
+        latencia_fila = medir_latencia_ms(motor, X_lote[:1], 50)
+        latencia_lote = medir_latencia_ms(motor, X_lote, 5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "modelo.joblib")
+        joblib.dump(model, ruta)
+        tamano = os.path.getsize(ruta)
+        if es_bosque:
+            motor.save(os.path.join(tmp, "bosque.npz"))
+            tamano_motor = os.path.getsize(os.path.join(tmp, "bosque.npz"))
+        else:
+            tamano_motor = tamano
+
+    return {
+        "perfil": perfil,
+        "descripcion": PERFILES[perfil]["descripcion"],
+        "motor": "flat" if es_bosque else "sklearn",
+        "precision": round(float(accuracy_score(y_test, (proba >= 0.5).astype(int))), 4),
+        "log_loss": round(float(log_loss(y_test, proba)), 4),
+        "latencia_fila_ms": latencia_fila,
+        "latencia_lote_ms": latencia_lote,
+        "filas_lote": len(X_lote),
+        "tamano_joblib_kb": round(tamano / 1024, 1),
+        "tamano_servidor_kb": round(tamano_motor / 1024, 1),
+    }
+
+def guardar_modelo(perfil, model, metricas, X_test, registros):
+    """Guarda el perfil elegido, su bosque aplanado (si aplica) y el sidecar de metadatos."""
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    joblib.dump(model, MODEL_PATH)
+    print(f"💾 Cerebro IA actualizado con el perfil '{perfil}'.")
+
+    # Versión sin scikit-learn para el servidor (se guarda después del joblib: debe ser más reciente).
+    # Se verifica con una muestra: con millones de filas el recorrido plano no cabe en memoria.
+    if PERFILES[perfil]["tipo"] == "rf":
+        exportar_bosque_plano(model, X_test.iloc[:10000], FOREST_PATH)
+    elif os.path.exists(FOREST_PATH):
+        os.remove(FOREST_PATH)  # Pertenecía a un bosque anterior
+
+    with open(MODEL_PATH, "rb") as f:
+        version = hashlib.sha1(f.read()).hexdigest()[:12]
+
+    # El sidecar se escribe al final: PredictionService solo lo acepta si es más reciente que el modelo
+    meta = {
+        "version": version,
+        "perfil": perfil,
+        "descripcion": PERFILES[perfil]["descripcion"],
+        "motor": metricas["motor"],
+        "parametros": PERFILES[perfil]["params"],
+        "registros_entrenamiento": registros,
+        "entrenado_en": datetime.now().isoformat(timespec="seconds"),
+        "metricas": {k: metricas[k] for k in ("precision", "log_loss", "latencia_fila_ms", "latencia_lote_ms")},
+    }
+    with open(META_PATH, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+@contextmanager
+def etapa(nombre):
+    """Mide e imprime la duración de una etapa del entrenamiento."""
+    inicio = time.perf_counter()
+    yield
+    print(f"⏱️  {nombre}: {time.perf_counter() - inicio:.2f}s")
+
+def train(muestras=5000, n_jobs=-1, seed=42, max_muestras_arbol=100000, perfil="preciso", candidatos=None):
     print("🚀 Iniciando entrenamiento con MATICES PROBABILÍSTICOS...")
+    rng = np.random.default_rng(seed)
+    candidatos = list(candidatos or PERFILES)
+    if perfil not in candidatos:
+        candidatos.append(perfil)
 
     db_url = str(settings.DATABASE_URL)
     engine = create_engine(db_url)
-    
+
     # 1. Leer datos reales (si existen)
     query = text("""
-        SELECT 
+        SELECT
             n.parcial1, n.parcial2, n.final, n.situacion,
             COALESCE(t_agrupadas.num_tutorias, 0) as num_tutorias
         FROM tutorias_unach.notas n
@@ -93,42 +232,82 @@ def train():
         WHERE n.final IS NOT NULL
     """)
 
-    try:
-        with engine.connect() as conn:
-            df_real = pd.read_sql(query, conn)
-    except:
-        df_real = pd.DataFrame()
+    with etapa("Lectura de datos reales"):
+        try:
+            with engine.connect() as conn:
+                df_real = pd.read_sql(query, conn)
+        except:
+            df_real = pd.DataFrame()
 
-    if not df_real.empty:
-        df_real['parcial2'] = df_real['parcial2'].fillna(0)
-        df_real['target'] = df_real.apply(lambda row: 1 if (row['final'] >= 7 or row['situacion'] == 'APROBADO') else 0, axis=1)
-        df_real = df_real[['parcial1', 'parcial2', 'num_tutorias', 'target']]
+        if not df_real.empty:
+            df_real['parcial2'] = df_real['parcial2'].fillna(0)
+            df_real['target'] = ((df_real['final'] >= 7) | (df_real['situacion'] == 'APROBADO')).astype(int)
+            df_real = df_real[['parcial1', 'parcial2', 'num_tutorias', 'target']]
 
     # 2. Generar Datos Matizados
-    # Creamos muchos datos (5000) para que la IA entienda bien los porcentajes
-    df_simulado = generar_datos_probabilistiscos(cantidad=5000)
+    # Creamos muchos datos para que la IA entienda bien los porcentajes
+    with etapa("Generación de datos simulados"):
+        df_simulado = generar_datos_probabilistiscos(cantidad=muestras, rng=rng)
 
     # 3. Mezclar
     df_final = pd.concat([df_real, df_simulado], ignore_index=True)
-    
-    print(f"🧠 Entrenando con {len(df_final)} registros variados...")
-    
+
+    print(f"🧠 Entrenando {len(candidatos)} perfiles con {len(df_final)} registros variados...")
+
     X = df_final[['parcial1', 'parcial2', 'num_tutorias']]
     y = df_final['target']
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Aumentamos min_samples_leaf para que el árbol no sea tan "binario" y promedie más (suaviza porcentajes)
-    model = RandomForestClassifier(n_estimators=300, max_depth=10, min_samples_leaf=5, random_state=42)
-    model.fit(X_train, y_train)
 
-    acc = accuracy_score(y_test, model.predict(X_test))
-    print(f"✅ Modelo entrenado. Precisión estimada: {acc:.2%}")
+    # Con millones de filas cada árbol usa un bootstrap acotado: con profundidad <= 10 no gana precisión
+    # y el tiempo de entrenamiento deja de crecer con el tamaño de los datos.
+    max_samples = max_muestras_arbol if max_muestras_arbol and len(X_train) > max_muestras_arbol else None
+
+    # 4. Entrenar y medir cada perfil
+    modelos, reporte = {}, []
+    for nombre in candidatos:
+        with etapa(f"Entrenamiento '{nombre}'"):
+            model = construir_modelo(nombre, n_jobs, max_samples)
+            model.fit(X_train, y_train)
+            if isinstance(model, RandomForestClassifier):
+                # En el servidor cada proceso predice en un solo hilo (el paralelismo lo da el pool)
+                model.set_params(n_jobs=None)
+        with etapa(f"Evaluación '{nombre}'"):
+            metricas = evaluar_perfil(nombre, model, X_test, y_test)
+        modelos[nombre] = model
+        reporte.append(metricas)
+
+    print(f"\n{'perfil':<15}{'precisión':>10}{'log-loss':>10}{'fila ms':>10}{'10k ms':>10}{'KB':>10}")
+    for m in reporte:
+        marca = " ⬅" if m["perfil"] == perfil else ""
+        print(f"{m['perfil']:<15}{m['precision']:>10.2%}{m['log_loss']:>10.4f}{m['latencia_fila_ms']:>10.3f}"
+              f"{m['latencia_lote_ms']:>10.1f}{m['tamano_servidor_kb']:>10.0f}{marca}")
 
-    output_path = os.path.join("app", "models", "tutoria_risk_model.joblib")
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    joblib.dump(model, output_path)
-    print("💾 Cerebro IA actualizado con lógica humana.")
+    # 5. Guardar el perfil elegido y el reporte comparativo
+    with etapa("Guardado"):
+        elegido = next(m for m in reporte if m["perfil"] == perfil)
+        guardar_modelo(perfil, modelos[perfil], elegido, X_test, len(X_train))
+        with open(REPORT_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "generado_en": datetime.now().isoformat(timespec="seconds"),
+                "registros_entrenamiento": len(X_train),
+                "registros_prueba": len(X_test),
+                "perfil_elegido": perfil,
+                "perfiles": reporte,
+            }, f, indent=2, ensure_ascii=False)
+    print(f"📊 Reporte de perfiles en {REPORT_PATH}")
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Entrena el modelo de riesgo de tutorías.")
+    parser.add_argument("--muestras", type=int, default=5000, help="Casos simulados a generar.")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Núcleos para entrenar (-1 = todos).")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos simulados.")
+    parser.add_argument("--max-muestras-arbol", type=int, default=100000,
+                        help="Filas del bootstrap de cada árbol (0 = todas).")
+    parser.add_argument("--perfil", choices=list(PERFILES), default="preciso",
+                        help="Perfil que se guarda como modelo del servidor.")
+    parser.add_argument("--candidatos", nargs="+", choices=list(PERFILES),
+                        help="Perfiles a entrenar y comparar (por defecto todos).")
+    args = parser.parse_args()
+    train(muestras=args.muestras, n_jobs=args.n_jobs, seed=args.seed, max_muestras_arbol=args.max_muestras_arbol,
+          perfil=args.perfil, candidatos=args.candidatos)
@@ -0,0 +1,42 @@
+# backend/tests/asgi.py
+
+import asyncio
+from typing import Any, Dict, Optional
+
+# Cliente ASGI mínimo (sin httpx): una petición contra la app y la respuesta completa.
+
+
+def request(app, method: str, path: str, headers: Optional[Dict[str, str]] = None,
+            query: str = "", body: bytes = b"") -> Dict[str, Any]:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "scheme": "http", "server": ("test", 80), "client": ("test", 1), "root_path": "",
+    }
+    respuesta = {"status": None, "headers": {}, "body": b""}
+
+    async def correr():
+        terminado = asyncio.Event()
+        pendiente = [True]
+
+        async def receive():
+            if pendiente[0]:
+                pendiente[0] = False
+                return {"type": "http.request", "body": body, "more_body": False}
+            await terminado.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(mensaje):
+            if mensaje["type"] == "http.response.start":
+                respuesta["status"] = mensaje["status"]
+                respuesta["headers"] = {k.decode(): v.decode() for k, v in mensaje["headers"]}
+            elif mensaje["type"] == "http.response.body":
+                respuesta["body"] += mensaje.get("body", b"")
+                if not mensaje.get("more_body"):
+                    terminado.set()
+
+        await app(scope, receive, send)
+
+    asyncio.run(correr())
+    return respuesta
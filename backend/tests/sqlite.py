@@ -0,0 +1,35 @@
+# backend/tests/sqlite.py
+
+import json
+import re
+from typing import Iterable
+
+from sqlalchemy import create_engine, event, text
+
+# Motor SQLite en memoria con el esquema tutorias_unach, para correr las consultas
+# de los servicios sin PostgreSQL. Solo traduce lo poco de PostgreSQL que usan.
+
+
+def motor_sqlite(tablas: Iterable[str] = ()):
+    motor = create_engine("sqlite://")
+    sentencias = []
+    motor.sentencias = sentencias
+
+    @event.listens_for(motor, "connect")
+    def _esquema(conexion, _):
+        conexion.execute("ATTACH ':memory:' AS tutorias_unach")
+
+    @event.listens_for(motor, "before_cursor_execute", retval=True)
+    def _dialecto(conn, cursor, sql, params, contexto, varias):
+        sentencias.append(sql)
+        if "= ANY(?)" in sql:
+            sql = sql.replace("= ANY(?)", "IN (SELECT value FROM json_each(?))")
+            params = tuple(json.dumps(p) if isinstance(p, list) else p for p in params)
+        sql = sql.replace("NOW()", "CURRENT_TIMESTAMP")
+        sql = re.sub(r"CAST\(([\w.]+) AS DATE\)", r"date(\1)", sql)
+        return sql, params
+
+    with motor.begin() as conexion:
+        for ddl in tablas:
+            conexion.execute(text(f"CREATE TABLE tutorias_unach.{ddl}"))
+    return motor
@@ -0,0 +1,196 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+from app.services import cmi_service as modulo
+from app.services.cmi_service import CMIService, CONTADORES, TODAS_LAS_CARRERAS
+from app.services.periodo_service import TODOS_LOS_PERIODOS
+
+
+class Resultado:
+    def __init__(self, filas=(), escalar=None):
+        self.filas = list(filas)
+        self.escalar = escalar
+
+    def mappings(self):
+        return self
+
+    def one(self):
+        return self.filas[0]
+
+    def all(self):
+        return self.filas
+
+    def __iter__(self):
+        return iter(self.filas)
+
+    def scalar(self):
+        return self.escalar
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return self.escalar
+
+
+class SesionFalsa:
+    """Responde a cada consulta con la primera respuesta cuyo fragmento aparece en el SQL."""
+
+    def __init__(self, respuestas=None):
+        self.respuestas = respuestas or {}
+        self.consultas = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def execute(self, query, params=None):
+        sql = str(query)
+        self.consultas.append((sql, params))
+        for fragmento, resultado in self.respuestas.items():
+            if fragmento in sql:
+                return resultado
+        return Resultado()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+FILA_VISTA = dict(periodo="2025-2026", realizada=6, no_asistio=2, cancelada=0, programada=3, solicitada=None,
+                  tutores_activos=4, num_evaluaciones=3, suma_estrellas=13, total_tutores=5, total_estudiantes=40)
+
+
+def test_cmi_en_una_sola_consulta():
+    db = SesionFalsa({"cmi_periodo_carrera v": Resultado([FILA_VISTA])})
+
+    datos = CMIService().get_cmi_data(db, 3, "Sistemas")
+
+    assert len(db.consultas) == 1
+    assert db.consultas[0][1] == {"periodo_id": 3, "carrera": "Sistemas"}
+    assert (datos["periodo_id"], datos["periodo"], datos["carrera"]) == (3, "2025-2026", "Sistemas")
+    cmi = datos["cmi"]
+    assert cmi["perspectiva_estudiante"] == {"tasa_asistencia": 75.0, "satisfaccion_promedio": 4.33}
+    assert cmi["perspectiva_procesos"] == {
+        "total_sesiones_realizadas": 6,
+        "distribucion_estados": [{"name": "realizada", "value": 6}, {"name": "no_asistio", "value": 2},
+                                 {"name": "programada", "value": 3}],
+    }
+    assert cmi["perspectiva_recursos"] == {"total_tutores": 5, "total_estudiantes": 40, "ratio_tutor_estudiante": 8.0}
+    assert cmi["perspectiva_aprendizaje"] == {"tasa_adherencia_tutores": 80.0, "tutores_activos": 4}
+
+
+def test_cmi_de_todos_los_periodos_y_carreras():
+    db = SesionFalsa({"cmi_periodo_carrera v": Resultado([FILA_VISTA])})
+
+    datos = CMIService().get_cmi_data(db)
+
+    assert db.consultas[0][1] == {"periodo_id": TODOS_LOS_PERIODOS, "carrera": TODAS_LAS_CARRERAS}
+    assert datos["periodo_id"] is None and datos["carrera"] is None
+
+
+def test_corte_sin_datos_da_indicadores_en_cero():
+    vacia = {"periodo": None, **{c: None for c in CONTADORES}}
+    cmi = CMIService.calcular_indicadores(vacia)
+
+    assert cmi["perspectiva_estudiante"] == {"tasa_asistencia": 0, "satisfaccion_promedio": 0}
+    assert cmi["perspectiva_procesos"]["distribucion_estados"] == []
+    assert cmi["perspectiva_recursos"]["ratio_tutor_estudiante"] == 0
+    assert cmi["perspectiva_aprendizaje"]["tasa_adherencia_tutores"] == 0
+
+
+def test_refresco_se_salta_si_otro_proceso_tiene_el_lock():
+    db = SesionFalsa({"pg_try_advisory_xact_lock": Resultado(escalar=False)})
+
+    assert CMIService().refrescar_vista(db) is False
+    assert not any("REFRESH" in sql for sql, _ in db.consultas)
+    assert db.rollbacks == 1
+
+
+def test_refresco_solo_si_cambiaron_las_tablas_de_origen():
+    versiones = {"v": "matriculas:1,tutorias:1"}
+    db = SesionFalsa({"pg_try_advisory_xact_lock": Resultado(escalar=True)})
+    servicio = CMIService()
+
+    def refrescos():
+        return sum("REFRESH MATERIALIZED VIEW CONCURRENTLY" in sql for sql, _ in db.consultas)
+
+    db.respuestas["string_agg"] = Resultado(escalar=versiones["v"])
+    assert servicio.refrescar_vista(db) is True
+    assert refrescos() == 1 and db.commits == 1
+    assert any("'cmi_periodo_carrera'" in sql for sql, _ in db.consultas)
+
+    assert servicio.refrescar_vista(db) is False
+    assert refrescos() == 1
+
+    db.respuestas["string_agg"] = Resultado(escalar="matriculas:2,tutorias:1")
+    assert servicio.refrescar_vista(db) is True
+    assert refrescos() == 2
+
+
+VISTA = [
+    dict(periodo_id=3, carrera="Sistemas", realizada=6, no_asistio=2, cancelada=0, programada=1, solicitada=0,
+         tutores_activos=2, num_evaluaciones=4, suma_estrellas=18, total_tutores=4, total_estudiantes=30),
+    dict(periodo_id=0, carrera="*", realizada=9, no_asistio=1, cancelada=2, programada=1, solicitada=3,
+         tutores_activos=3, num_evaluaciones=0, suma_estrellas=0, total_tutores=6, total_estudiantes=50),
+]
+
+
+def test_snapshot_de_todos_los_cortes_en_una_sentencia():
+    db = SesionFalsa({
+        "SELECT * FROM tutorias_unach.cmi_periodo_carrera": Resultado(VISTA),
+        "INSERT INTO tutorias_unach.cmi_snapshots": Resultado(escalar=date(2026, 10, 18)),
+    })
+
+    assert CMIService().guardar_snapshot(db) == date(2026, 10, 18)
+
+    inserciones = [p for sql, p in db.consultas if "INSERT INTO tutorias_unach.cmi_snapshots" in sql]
+    assert len(inserciones) == 1 and db.commits == 1
+    filas = json.loads(inserciones[0]["filas"])
+    assert [(f["periodo_id"], f["carrera"]) for f in filas] == [(3, "Sistemas"), (0, "*")]
+    assert filas[0]["realizada"] == 6 and filas[0]["total_estudiantes"] == 30
+    assert (filas[0]["tasa_asistencia"], filas[0]["satisfaccion_promedio"],
+            filas[0]["ratio_tutor_estudiante"], filas[0]["tasa_adherencia_tutores"]) == (75.0, 4.5, 7.5, 50.0)
+    assert filas[1]["satisfaccion_promedio"] == 0
+
+
+def test_snapshot_sin_cortes_no_escribe():
+    db = SesionFalsa()
+    assert CMIService().guardar_snapshot(db) is None
+    assert db.commits == 0
+
+
+def test_job_guarda_el_historico_la_primera_vez_de_cada_dia(monkeypatch):
+    hoy = {"fecha": date(2026, 10, 18)}
+    guardados = []
+    servicio = CMIService()
+    monkeypatch.setattr(modulo, "SessionLocal",
+                        lambda: SesionFalsa({"CURRENT_DATE": Resultado(escalar=hoy["fecha"])}))
+    monkeypatch.setattr(SesionFalsa, "close", lambda self: None, raising=False)
+    monkeypatch.setattr(servicio, "refrescar_vista", lambda db: False)
+    monkeypatch.setattr(servicio, "guardar_snapshot", lambda db: guardados.append(hoy["fecha"]) or hoy["fecha"])
+
+    servicio.ejecutar()
+    servicio.ejecutar()
+    hoy["fecha"] = date(2026, 10, 19)
+    servicio.ejecutar()
+
+    assert guardados == [date(2026, 10, 18), date(2026, 10, 19)]
+
+
+def test_tendencia_por_rango_de_la_clave():
+    serie = [dict(fecha=date(2026, 10, 1), realizada=5, tasa_asistencia=Decimal("70.00"),
+                  satisfaccion_promedio=Decimal("4.10"), ratio_tutor_estudiante=Decimal("7.5"),
+                  tasa_adherencia_tutores=Decimal("50"), tutores_activos=2, total_estudiantes=30)]
+    db = SesionFalsa({"FROM tutorias_unach.cmi_snapshots": Resultado(serie)})
+
+    tendencia = CMIService().get_tendencia(db, date(2026, 9, 1), date(2026, 10, 18), 3, "Sistemas")
+
+    assert db.consultas[0][1] == {"periodo_id": 3, "carrera": "Sistemas",
+                                  "desde": date(2026, 9, 1), "hasta": date(2026, 10, 18)}
+    assert tendencia["serie"] == [{
+        "fecha": "2026-10-01", "tasa_asistencia": 70.0, "satisfaccion_promedio": 4.1,
+        "total_sesiones_realizadas": 5, "ratio_tutor_estudiante": 7.5, "tasa_adherencia_tutores": 50.0,
+        "tutores_activos": 2, "total_estudiantes": 30,
+    }]
@@ -0,0 +1,106 @@
+import json
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import app.dependencies as dependencies
+import app.routes.dashboard as dashboard
+from app.main import app
+from app.db.database import get_db
+from app.dependencies import get_current_user
+from app.services.periodo_service import TODOS_LOS_PERIODOS
+from tests.asgi import request
+
+
+class SesionSinTablas:
+    """Sin tabla_version: los endpoints responden sin ETag."""
+
+    def execute(self, query, params=None):
+        raise RuntimeError("sin tabla")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def coordinador(monkeypatch):
+    usuario = SimpleNamespace(id=9, rol="coordinador", correo="c@unach.edu.ec", nombre="Coordinador")
+    app.dependency_overrides[get_db] = lambda: SesionSinTablas()
+    app.dependency_overrides[get_current_user] = lambda: usuario
+    monkeypatch.setattr(dashboard, "get_coordinador_carrera_by_user_email", lambda db, correo: "Sistemas")
+    monkeypatch.setattr(dependencies.periodo_service, "get_periodo_activo_id", lambda db: 7)
+    yield usuario
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def cortes_cmi(monkeypatch):
+    cortes = []
+
+    def cmi(db, periodo_id, carrera):
+        cortes.append((periodo_id, carrera))
+        return {"periodo_id": periodo_id, "periodo": "P", "carrera": carrera, "cmi": {}}
+
+    monkeypatch.setattr(dashboard.cmi_service, "get_cmi_data", cmi)
+    return cortes
+
+
+@pytest.mark.parametrize("query, corte", [
+    ("", (7, "Sistemas")),
+    ("periodo_id=3", (3, "Sistemas")),
+    ("periodo_id=all&alcance=global", (TODOS_LOS_PERIODOS, None)),
+])
+def test_cmi_por_carrera_y_periodo(coordinador, cortes_cmi, query, corte):
+    r = request(app, "GET", "/dashboard/coordinator", query=query)
+
+    assert r["status"] == 200
+    assert cortes_cmi == [corte]
+    assert json.loads(r["body"])["nombre"] == "Coordinador"
+
+
+def test_cmi_alcance_invalido(coordinador, cortes_cmi):
+    assert request(app, "GET", "/dashboard/coordinator", query="alcance=x")["status"] == 422
+    assert cortes_cmi == []
+
+
+def test_cmi_solo_coordinador(coordinador, cortes_cmi):
+    coordinador.rol = "tutor"
+    assert request(app, "GET", "/dashboard/coordinator")["status"] == 403
+
+
+@pytest.fixture
+def rangos_tendencia(monkeypatch):
+    rangos = []
+
+    def tendencia(db, desde, hasta, periodo_id, carrera):
+        rangos.append((desde, hasta, periodo_id, carrera))
+        return {"periodo_id": periodo_id, "carrera": carrera, "desde": desde.isoformat(),
+                "hasta": hasta.isoformat(), "serie": []}
+
+    monkeypatch.setattr(dashboard.cmi_service, "get_tendencia", tendencia)
+    return rangos
+
+
+def test_tendencia_con_rango_y_periodo(coordinador, rangos_tendencia):
+    r = request(app, "GET", "/dashboard/coordinator/tendencia", query="desde=2026-09-01&hasta=2026-10-18&periodo_id=3")
+
+    assert r["status"] == 200
+    assert rangos_tendencia == [(date(2026, 9, 1), date(2026, 10, 18), 3, "Sistemas")]
+
+
+def test_tendencia_por_defecto_ultimos_90_dias(coordinador, rangos_tendencia):
+    r = request(app, "GET", "/dashboard/coordinator/tendencia", query="alcance=global&periodo_id=all")
+
+    assert r["status"] == 200
+    hoy = date.today()
+    assert rangos_tendencia == [(hoy - timedelta(days=dashboard.DIAS_TENDENCIA_CMI), hoy, TODOS_LOS_PERIODOS, None)]
+
+
+def test_tendencia_rango_invertido(coordinador, rangos_tendencia):
+    r = request(app, "GET", "/dashboard/coordinator/tendencia", query="desde=2026-10-18&hasta=2026-10-01")
+    assert r["status"] == 422
+    assert rangos_tendencia == []
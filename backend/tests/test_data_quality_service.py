@@ -0,0 +1,151 @@
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.data_quality_service import DataQualityService, REGLAS_CALIDAD
+from tests.sqlite import motor_sqlite
+
+
+@pytest.fixture(scope="module")
+def datos():
+    """Datos al azar con fallas conocidas de cada regla: {regla: ids que no la cumplen}."""
+    motor = motor_sqlite((
+        "usuarios(id INTEGER PRIMARY KEY, correo TEXT)",
+        "estudiantes(id INTEGER PRIMARY KEY, carrera TEXT)",
+        "periodos_academicos(id INTEGER PRIMARY KEY, fecha_fin TEXT)",
+        "matriculas(id INTEGER PRIMARY KEY, estudiante_id INT, asignatura_id INT, periodo_id INT)",
+        "notas(matricula_id INT, parcial1 REAL, parcial2 REAL, final REAL, suspension REAL, situacion TEXT)",
+        "tutorias(id INTEGER PRIMARY KEY, matricula_id INT, estado TEXT, fecha TEXT)",
+    ))
+    aleatorio = random.Random(5)
+    hoy = date.today()
+    fallas = {regla: set() for regla in REGLAS_CALIDAD}
+    with motor.begin() as c:
+        for i in range(1, 81):
+            correo = aleatorio.choice(["a@unach.edu.ec", "b@gmail.com"])
+            carrera = aleatorio.choice(["Civil", None])
+            c.execute(text("INSERT INTO tutorias_unach.usuarios VALUES (:i, :c)"), {"i": i, "c": correo})
+            c.execute(text("INSERT INTO tutorias_unach.estudiantes VALUES (:i, :c)"), {"i": i, "c": carrera})
+            if not correo.endswith("@unach.edu.ec"):
+                fallas["correo_no_institucional"].add(i)
+            if carrera is None:
+                fallas["carrera_faltante"].add(i)
+
+        # Período 1 cerrado, período 2 en curso
+        c.execute(text("INSERT INTO tutorias_unach.periodos_academicos VALUES (1, :a), (2, :b)"),
+                  {"a": str(hoy - timedelta(days=30)), "b": str(hoy + timedelta(days=60))})
+        vistas = set()
+        for mid in range(1, 301):
+            e, a, p = aleatorio.randint(1, 30), aleatorio.randint(1, 3), aleatorio.choice([1, 2])
+            c.execute(text("INSERT INTO tutorias_unach.matriculas VALUES (:m, :e, :a, :p)"),
+                      {"m": mid, "e": e, "a": a, "p": p})
+            if (e, a, p) in vistas:
+                fallas["matriculas_duplicadas"].add(mid)
+            vistas.add((e, a, p))
+            if aleatorio.random() < 0.2:
+                if p == 1:
+                    fallas["notas_faltantes"].add(mid)
+                continue
+            p1 = aleatorio.choice([None, 5.0, 8.0, 11.0])
+            p2 = aleatorio.choice([None, 6.0, -1.0, 9.0])
+            situacion = aleatorio.choice([None, "APROBADO", "REPROBADO", "PENDIENTE"])
+            c.execute(text("INSERT INTO tutorias_unach.notas VALUES (:m, :a, :b, NULL, NULL, :s)"),
+                      {"m": mid, "a": p1, "b": p2, "s": situacion})
+            if p == 1 and (p1 is None or p2 is None or situacion is None):
+                fallas["notas_incompletas"].add(mid)
+            if p1 == 11.0 or p2 == -1.0:
+                fallas["notas_fuera_de_rango"].add(mid)
+            if situacion == "PENDIENTE":
+                fallas["situacion_invalida"].add(mid)
+
+        for t in range(1, 201):
+            m = aleatorio.choice([None, 1, 2, 3])
+            estado = aleatorio.choice(["realizada", "cancelada"])
+            fecha = hoy + timedelta(days=aleatorio.randint(-5, 5))
+            c.execute(text("INSERT INTO tutorias_unach.tutorias VALUES (:t, :m, :e, :f)"),
+                      {"t": t, "m": m, "e": estado, "f": f"{fecha} 10:00:00"})
+            if m is None:
+                fallas["tutorias_huerfanas"].add(t)
+            if estado == "realizada" and fecha > hoy:
+                fallas["realizadas_futuras"].add(t)
+    return motor, fallas
+
+
+@pytest.fixture
+def servicio(monkeypatch):
+    servicio = DataQualityService()
+    # SQLite no tiene tabla_version: sin clave de caché
+    monkeypatch.setattr(servicio, "_version", lambda db: None)
+    return servicio
+
+
+def test_una_pasada_por_tabla_con_las_fallas_de_cada_regla(datos, servicio):
+    motor, fallas = datos
+    motor.sentencias.clear()
+    with Session(motor) as db:
+        metricas = servicio.get_metricas(db)
+
+    assert len(motor.sentencias) == 4
+    assert {r["regla"]: r["fallas"] for r in metricas["reglas"]} == {k: len(v) for k, v in fallas.items()}
+    for regla in metricas["reglas"]:
+        esperado = round((regla["evaluados"] - regla["fallas"]) / regla["evaluados"] * 100, 2)
+        assert regla["cumplimiento"] == esperado
+
+
+@pytest.mark.parametrize("regla", sorted(REGLAS_CALIDAD))
+def test_detalle_por_keyset_devuelve_todas_las_fallas(datos, servicio, regla):
+    motor, fallas = datos
+    ids, cursor = [], None
+    with Session(motor) as db:
+        while True:
+            pagina = servicio.get_detalle(db, regla, 7, cursor)
+            assert len(pagina["ids"]) <= 7
+            ids += pagina["ids"]
+            cursor = pagina["siguiente"]
+            if cursor is None:
+                break
+    assert ids == sorted(fallas[regla])
+
+
+def test_detalle_sin_funciones_de_ventana(datos, servicio):
+    motor, _ = datos
+    motor.sentencias.clear()
+    with Session(motor) as db:
+        servicio.get_detalle(db, "matriculas_duplicadas", 5, [100])
+    assert "OVER" not in motor.sentencias[-1].upper()
+    assert "x.id > " in motor.sentencias[-1]
+
+
+class SesionVersiones:
+    def __init__(self, versiones, hoy):
+        self.fila = SimpleNamespace(versiones=versiones, hoy=hoy)
+        self.consultas = 0
+
+    def execute(self, query, params=None):
+        self.consultas += 1
+        fila = self.fila
+        return SimpleNamespace(one=lambda: fila)
+
+
+def test_version_usa_la_fecha_de_la_base():
+    db = SesionVersiones("matriculas:3,notas:7", date(2030, 1, 2))
+    assert DataQualityService()._version(db) == "matriculas:3,notas:7|2030-01-02"
+    assert db.consultas == 1
+
+
+def test_cache_por_version(datos):
+    motor, _ = datos
+    servicio = DataQualityService()
+    versiones = iter(["v1", "v1", "v2"])
+    servicio._version = lambda db: next(versiones)
+    with Session(motor) as db:
+        primero = servicio.get_metricas(db)
+        motor.sentencias.clear()
+        assert servicio.get_metricas(db) is primero
+        assert motor.sentencias == []
+        servicio.get_metricas(db)
+        assert len(motor.sentencias) == 4
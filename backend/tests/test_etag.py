@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core import etag
+from tests.sqlite import motor_sqlite
+
+
+@pytest.fixture
+def pedir(modelo_de_prueba, monkeypatch):
+    """
+    tabla_version en SQLite con un CURRENT_DATE que mueven las pruebas (pedir.estado["hoy"]).
+    pedir(etag_previo, **opciones) corre la dependencia de etag_por_usuario("notas", **opciones)
+    y devuelve el ETag nuevo o 304 si coincide con etag_previo.
+    """
+    estado = {"hoy": "2026-03-02"}
+    motor = motor_sqlite(("tabla_version(tabla TEXT PRIMARY KEY, version INT)",))
+    with motor.begin() as c:
+        c.execute(text("INSERT INTO tutorias_unach.tabla_version VALUES ('notas', 1)"))
+
+    @event.listens_for(motor, "before_cursor_execute", retval=True)
+    def _hoy(conn, cursor, sql, params, contexto, varias):
+        return sql.replace("CURRENT_DATE", f"'{estado['hoy']}'"), params
+
+    monkeypatch.setattr(etag.periodo_service, "get_periodo_activo_id", lambda db: 7)
+
+    def _pedir(etag_previo=None, **opciones):
+        headers = [(b"if-none-match", etag_previo.encode())] if etag_previo else []
+        request = Request({"type": "http", "method": "GET", "path": "/x", "query_string": b"",
+                           "headers": headers})
+        response = Response()
+        with Session(motor) as db:
+            try:
+                etag.etag_por_usuario("notas", **opciones)(request, response, db, SimpleNamespace(id=1))
+            except etag.NotModified:
+                return 304
+        return response.headers["ETag"]
+
+    _pedir.estado = estado
+    return _pedir
+
+
+def test_cambio_de_modelo_invalida_el_etag(pedir, monkeypatch):
+    primero = pedir()
+    assert pedir(primero) == 304
+
+    monkeypatch.setattr(etag.prediction_service, "_model_version", "modelo-nuevo")
+
+    assert pedir(primero) not in (304, primero)
+
+
+def test_fecha_de_la_base_invalida_el_etag(pedir, monkeypatch):
+    primero = pedir(modelo=False, fecha=True)
+    # Con modelo=False la versión del modelo no entra en la clave
+    monkeypatch.setattr(etag.prediction_service, "_model_version", "modelo-nuevo")
+    assert pedir(primero, modelo=False, fecha=True) == 304
+
+    pedir.estado["hoy"] = "2026-03-03"
+
+    assert pedir(primero, modelo=False, fecha=True) not in (304, primero)
@@ -0,0 +1,58 @@
+import csv
+import io
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.services import export_service as modulo
+from app.services.export_service import COLUMNAS_REPORTE, export_service
+from app.services.periodo_service import TODOS_LOS_PERIODOS
+from app.services.report_service import report_service
+
+
+@pytest.fixture
+def exportar(reporte_coordinador, monkeypatch):
+    """Exporta contra el motor SQLite; devuelve también las filas que debe contener."""
+    motor, _ = reporte_coordinador
+    monkeypatch.setattr(modulo, "SessionLocal", sessionmaker(bind=motor))
+
+    def esperadas(periodo_id=TODOS_LOS_PERIODOS, carrera=None, tutor_id=None):
+        with Session(motor) as db:
+            grupos = report_service.get_coordinator_report(db, periodo_id, carrera, tutor_id, limit=1000)["grupos"]
+        return [[g[clave] for _, clave in COLUMNAS_REPORTE] for g in grupos]
+
+    return esperadas
+
+
+def test_csv_con_todas_las_filas_del_reporte(exportar):
+    datos = b"".join(export_service.reporte_coordinador("csv"))
+
+    assert datos.startswith("\ufeff".encode("utf-8"))
+    filas = list(csv.reader(io.StringIO(datos.decode("utf-8-sig"))))
+    assert filas[0] == [encabezado for encabezado, _ in COLUMNAS_REPORTE]
+    assert filas[1:] == [[str(v) for v in fila] for fila in exportar()]
+
+
+def test_csv_por_trozos_con_filtros(exportar, monkeypatch):
+    monkeypatch.setattr(modulo, "_FILAS_POR_TROZO", 7)
+    esperadas = exportar(2, "Civil")
+
+    trozos = list(export_service.reporte_coordinador("csv", 2, "Civil"))
+
+    assert len(trozos) == len(esperadas) // 7 + 1
+    filas = list(csv.reader(io.StringIO(b"".join(trozos).decode("utf-8-sig"))))
+    assert filas[1:] == [[str(v) for v in fila] for fila in esperadas]
+
+
+def test_xlsx_con_todas_las_filas_del_reporte(exportar, monkeypatch):
+    monkeypatch.setattr(modulo, "_BYTES_POR_TROZO", 1024)
+
+    trozos = list(export_service.reporte_coordinador("xlsx", TODOS_LOS_PERIODOS, None, 1))
+
+    assert len(trozos) > 1
+    hoja = load_workbook(io.BytesIO(b"".join(trozos))).active
+    assert hoja.title == "Reporte Tutorías"
+    filas = [list(fila) for fila in hoja.iter_rows(values_only=True)]
+    assert filas[0] == [encabezado for encabezado, _ in COLUMNAS_REPORTE]
+    assert filas[1:] == exportar(tutor_id=1)
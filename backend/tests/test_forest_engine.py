@@ -0,0 +1,77 @@
+# backend/tests/test_forest_engine.py
+
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.services import prediction_service as ps
+from app.services.forest_engine import FlatForest, LOTE_POR_ARBOL
+
+
+@pytest.fixture(scope="module")
+def bosque():
+    rng = np.random.default_rng(0)
+    p1 = np.round(rng.uniform(0, 10, 3000), 2)
+    tutorias = rng.integers(0, 16, 3000).astype(np.float64)
+    X = np.column_stack([p1, np.round(np.clip(p1 + rng.normal(0, 1, 3000), 0, 10), 2), tutorias])
+    y = (X[:, 0] + X[:, 1] + 0.2 * X[:, 2] + rng.normal(0, 1.5, 3000) > 13).astype(int)
+    return RandomForestClassifier(n_estimators=40, max_depth=8, min_samples_leaf=5, random_state=0).fit(X, y)
+
+
+def _lote(n, semilla=1):
+    rng = np.random.default_rng(semilla)
+    p1 = np.round(rng.uniform(0, 10, n), 2)
+    return np.column_stack([p1, p1, rng.integers(0, 16, n).astype(np.float64)])
+
+
+@pytest.mark.parametrize("n", [1, 100, LOTE_POR_ARBOL - 1, LOTE_POR_ARBOL, 6000])
+def test_predict_proba_igual_a_sklearn(bosque, n):
+    X = _lote(n)
+    np.testing.assert_allclose(FlatForest.from_sklearn(bosque).predict_proba(X), bosque.predict_proba(X),
+                               rtol=0, atol=1e-12)
+
+
+def test_guardar_y_cargar_conserva_predicciones(bosque, tmp_path):
+    ruta = str(tmp_path / "bosque.npz")
+    plano = FlatForest.from_sklearn(bosque)
+    plano.save(ruta)
+    cargado = FlatForest.load(ruta)
+
+    assert cargado.max_depth == plano.max_depth
+    np.testing.assert_array_equal(cargado._profundidades, [e.tree_.max_depth for e in bosque.estimators_])
+    X = _lote(LOTE_POR_ARBOL + 10)
+    np.testing.assert_array_equal(cargado.predict_proba(X), plano.predict_proba(X))
+
+
+def test_lotes_grandes_usan_el_joblib_del_bosque(bosque, tmp_path):
+    servicio = ps.PredictionService()
+    servicio.model_path = str(tmp_path / "modelo.joblib")
+    servicio.forest_path = str(tmp_path / "modelo_forest.npz")
+    joblib.dump(bosque, servicio.model_path)
+    FlatForest.from_sklearn(bosque).save(servicio.forest_path)
+    os.utime(servicio.forest_path, (os.path.getmtime(servicio.model_path) + 1,) * 2)
+    servicio._model = FlatForest.load(servicio.forest_path)
+
+    # Lote chico: no se carga el joblib
+    servicio._predict_proba_local(_lote(10))
+    assert not servicio._sklearn_cargado
+
+    X = _lote(ps.LOTE_SKLEARN)
+    np.testing.assert_allclose(servicio._predict_proba_local(X), bosque.predict_proba(X), rtol=0, atol=1e-12)
+    assert hasattr(servicio._sklearn, "estimators_")
+
+
+def test_joblib_mas_nuevo_que_el_bosque_no_se_usa(bosque, tmp_path):
+    servicio = ps.PredictionService()
+    servicio.model_path = str(tmp_path / "modelo.joblib")
+    servicio.forest_path = str(tmp_path / "modelo_forest.npz")
+    FlatForest.from_sklearn(bosque).save(servicio.forest_path)
+    joblib.dump(bosque, servicio.model_path)
+    os.utime(servicio.model_path, (os.path.getmtime(servicio.forest_path) + 1,) * 2)
+    servicio._model = FlatForest.load(servicio.forest_path)
+
+    servicio._predict_proba_local(_lote(ps.LOTE_SKLEARN))
+    assert servicio._sklearn_cargado and servicio._sklearn is None
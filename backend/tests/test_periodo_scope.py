@@ -0,0 +1,46 @@
+import pytest
+from fastapi import HTTPException
+
+from app import dependencies
+from app.dependencies import get_periodo_scope
+from app.services.periodo_service import TODOS_LOS_PERIODOS
+
+
+@pytest.fixture
+def periodo_activo(monkeypatch):
+    """Fija lo que devuelve periodo_service.get_periodo_activo_id (sin base de datos)."""
+    def fijar(valor):
+        monkeypatch.setattr(dependencies.periodo_service, "get_periodo_activo_id", lambda db: valor)
+    return fijar
+
+
+@pytest.mark.parametrize("valor", ["all", "ALL", "todos"])
+def test_todos_los_periodos_es_un_centinela_distinto(periodo_activo, valor):
+    periodo_activo(None)
+    assert get_periodo_scope(valor, db=None) == TODOS_LOS_PERIODOS
+    assert get_periodo_scope(valor, db=None) is not None
+
+
+def test_por_defecto_el_periodo_activo(periodo_activo):
+    periodo_activo(5)
+    assert get_periodo_scope(None, db=None) == 5
+
+
+def test_sin_periodos_registrados_responde_404(periodo_activo):
+    periodo_activo(None)
+    with pytest.raises(HTTPException) as error:
+        get_periodo_scope(None, db=None)
+    assert error.value.status_code == 404
+
+
+def test_periodo_explicito(periodo_activo):
+    periodo_activo(None)
+    assert get_periodo_scope("12", db=None) == 12
+
+
+@pytest.mark.parametrize("valor", ["abc", "-1", "0"])
+def test_periodo_invalido_responde_422(periodo_activo, valor):
+    periodo_activo(5)
+    with pytest.raises(HTTPException) as error:
+        get_periodo_scope(valor, db=None)
+    assert error.value.status_code == 422
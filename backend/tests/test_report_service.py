@@ -0,0 +1,212 @@
+import random
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.periodo_service import TODOS_LOS_PERIODOS
+from app.services.prediction_service import prediction_service
+from app.services.report_service import report_service
+from app.services.risk_score_service import RIESGO_PENDIENTE
+from tests.sqlite import motor_sqlite
+
+TABLAS_RIESGO = (
+    "asignaturas(id INTEGER PRIMARY KEY, nombre TEXT)",
+    "usuarios(id INTEGER PRIMARY KEY, nombre TEXT)",
+    "estudiantes(id INTEGER PRIMARY KEY, usuario_id INT, carrera TEXT)",
+    "matriculas(id INTEGER PRIMARY KEY, estudiante_id INT, asignatura_id INT, periodo_id INT)",
+    "notas(matricula_id INT, parcial1 REAL, parcial2 REAL, final REAL, situacion TEXT)",
+    "tutorias(id INTEGER PRIMARY KEY, matricula_id INT, estado TEXT)",
+    "riesgo_matricula(matricula_id INTEGER PRIMARY KEY, nivel TEXT, color TEXT, probabilidad REAL, "
+    "mensaje TEXT, version_modelo TEXT, parcial1 REAL, parcial2 REAL, final REAL, situacion TEXT, "
+    "num_tutorias INT, fecha_calculo TEXT)",
+)
+
+
+@pytest.fixture(scope="module")
+def riesgo(modelo_de_prueba):
+    """
+    60 estudiantes (un tercio sin carrera) con 4 matrículas cada uno y notas al azar;
+    la mitad de las que necesitan el modelo ya tienen un puntaje vigente guardado.
+    Devuelve el motor y, por matrícula, sus datos y el riesgo que debe leerse: el del
+    modelo si está guardado, si no RIESGO_PENDIENTE (o la regla de certeza).
+    """
+    motor = motor_sqlite(TABLAS_RIESGO)
+    aleatorio = random.Random(3)
+    version = prediction_service.model_version
+    esperado = {}
+    with motor.begin() as c:
+        c.execute(text("INSERT INTO tutorias_unach.asignaturas VALUES (1, 'Algebra'), (2, 'Calculo')"))
+        mid = 0
+        for e in range(1, 61):
+            carrera = ["Sistemas", "Civil", None][e % 3]
+            c.execute(text("INSERT INTO tutorias_unach.usuarios VALUES (:i, :n)"), {"i": e, "n": f"Est {e % 17:02d}"})
+            c.execute(text("INSERT INTO tutorias_unach.estudiantes VALUES (:i, :i, :c)"), {"i": e, "c": carrera})
+            for a in (1, 2):
+                for p in (1, 2):
+                    mid += 1
+                    c.execute(text("INSERT INTO tutorias_unach.matriculas VALUES (:m, :e, :a, :p)"),
+                              {"m": mid, "e": e, "a": a, "p": p})
+                    caso = aleatorio.random()
+                    feats = {"p1": None, "p2": None, "final": None, "situacion": None, "tutorias": 0}
+                    if caso >= 0.15:
+                        feats["situacion"] = aleatorio.choice(["APROBADO", "REPROBADO"]) if caso < 0.3 else None
+                        feats["p1"] = round(aleatorio.uniform(2, 10), 2) if caso > 0.35 else None
+                        feats["p2"] = round(aleatorio.uniform(2, 10), 2) if caso > 0.65 else None
+                        feats["tutorias"] = aleatorio.randint(0, 6)
+                        c.execute(text("INSERT INTO tutorias_unach.notas VALUES (:m, :p1, :p2, NULL, :s)"),
+                                  {"m": mid, "p1": feats["p1"], "p2": feats["p2"], "s": feats["situacion"]})
+                        for _ in range(feats["tutorias"]):
+                            c.execute(text("INSERT INTO tutorias_unach.tutorias (matricula_id, estado) "
+                                           "VALUES (:m, 'realizada')"), {"m": mid})
+                    r = prediction_service.calculate_risk_batch([feats])[0]
+                    usa_modelo = feats["p1"] is not None and feats["p2"] is None and feats["situacion"] is None
+                    if usa_modelo and aleatorio.random() < 0.5:
+                        c.execute(text("""
+                            INSERT INTO tutorias_unach.riesgo_matricula
+                            VALUES (:m, :n, :c, :p, :msg, :v, :p1, NULL, NULL, NULL, :t, NULL)
+                        """), {"m": mid, "n": r["riesgo_nivel"], "c": r["riesgo_color"],
+                               "p": r["probabilidad_riesgo"], "msg": r["mensaje_explicativo"], "v": version,
+                               "p1": feats["p1"], "t": feats["tutorias"]})
+                    elif usa_modelo:
+                        r = prediction_service._response(*RIESGO_PENDIENTE, feats)
+                    esperado[mid] = dict(estudiante=f"Est {e % 17:02d}", carrera=carrera or "Sin carrera",
+                                         asignatura_id=a, periodo_id=p, riesgo=r)
+    return motor, esperado
+
+
+@pytest.fixture
+def lotes_al_modelo(monkeypatch):
+    """Tamaño de cada llamada por lotes al modelo (las lecturas no deben hacer ninguna)."""
+    llamadas = []
+    original = prediction_service.calculate_risk_batch
+    monkeypatch.setattr(prediction_service, "calculate_risk_batch",
+                        lambda filas: llamadas.append(len(filas)) or original(filas))
+    return llamadas
+
+
+def _todas_las_paginas(db, lotes_al_modelo, **filtros):
+    estudiantes, cursor = [], None
+    while True:
+        lotes_al_modelo.clear()
+        pagina = report_service.get_students_at_risk(db, despues_de=cursor, **filtros)
+        assert lotes_al_modelo == []
+        assert len(pagina["estudiantes"]) <= filtros.get("limit", 100)
+        estudiantes += pagina["estudiantes"]
+        cursor = pagina["siguiente"]
+        if cursor is None:
+            return estudiantes
+
+
+@pytest.mark.parametrize("filtros", [
+    dict(limit=7),
+    dict(limit=1000),
+    dict(periodo_id=2, carrera="Civil", limit=5),
+    dict(periodo_id=1, limit=4),
+    dict(carrera="Sin carrera", limit=6),
+    dict(asignatura_id=1, niveles=("ALTO", "N/D"), limit=9),
+    dict(niveles=("PENDIENTE",), limit=8),
+])
+def test_alerta_temprana_igual_a_lo_guardado_en_todas_las_paginas(riesgo, lotes_al_modelo, filtros):
+    motor, esperado = riesgo
+    with Session(motor) as db:
+        obtenidos = _todas_las_paginas(db, lotes_al_modelo, **{"periodo_id": TODOS_LOS_PERIODOS, **filtros})
+        db.rollback()
+
+    niveles = filtros.get("niveles", report_service.NIVELES_EN_RIESGO)
+    filtro = {k: v for k, v in filtros.items() if k in ("periodo_id", "carrera", "asignatura_id")}
+    esperados = sorted(
+        (e["estudiante"], mid) for mid, e in esperado.items()
+        if e["riesgo"]["riesgo_nivel"] in niveles and all(e[k] == v for k, v in filtro.items())
+    )
+    assert [(g["estudiante"], g["matricula_id"]) for g in obtenidos] == esperados
+    for g in obtenidos:
+        e = esperado[g["matricula_id"]]
+        assert g["carrera"] == e["carrera"]
+        assert (g["riesgo"], g["probabilidad"], g["color"], g["mensaje"]) == (
+            e["riesgo"]["riesgo_nivel"], e["riesgo"]["probabilidad_riesgo"],
+            e["riesgo"]["riesgo_color"], e["riesgo"]["mensaje_explicativo"])
+
+
+def test_alerta_temprana_sin_carrera_como_el_reporte_del_coordinador(riesgo, lotes_al_modelo):
+    motor, esperado = riesgo
+    with Session(motor) as db:
+        obtenidos = _todas_las_paginas(db, lotes_al_modelo, periodo_id=TODOS_LOS_PERIODOS, carrera="Sin carrera",
+                                       niveles=("BAJO", "MEDIO", "ALTO", "N/D", "PENDIENTE"), limit=50)
+        db.rollback()
+    assert obtenidos
+    assert {g["carrera"] for g in obtenidos} == {"Sin carrera"}
+    assert len(obtenidos) == sum(1 for e in esperado.values() if e["carrera"] == "Sin carrera")
+
+
+def test_alerta_temprana_no_infiere_ni_escribe(modelo_de_prueba, lotes_al_modelo):
+    motor = motor_sqlite(TABLAS_RIESGO)
+    with motor.begin() as c:
+        c.execute(text("INSERT INTO tutorias_unach.asignaturas VALUES (1, 'Algebra')"))
+        c.execute(text("INSERT INTO tutorias_unach.usuarios VALUES (1, 'Ana')"))
+        c.execute(text("INSERT INTO tutorias_unach.estudiantes VALUES (1, 1, 'Civil')"))
+        c.execute(text("INSERT INTO tutorias_unach.matriculas VALUES (1, 1, 1, 1), (2, 1, 1, 2)"))
+        c.execute(text("INSERT INTO tutorias_unach.notas VALUES (1, 4.0, NULL, NULL, NULL), "
+                       "(2, 9.5, NULL, NULL, NULL)"))
+        # Puntaje de otro modelo: ya no está vigente
+        c.execute(text("INSERT INTO tutorias_unach.riesgo_matricula VALUES "
+                       "(2, 'ALTO', 'green', 90, 'viejo', 'modelo-anterior', 9.5, NULL, NULL, NULL, 0, NULL)"))
+
+    motor.sentencias.clear()
+    with Session(motor) as db:
+        reporte = report_service.get_students_at_risk(db, TODOS_LOS_PERIODOS, niveles=("PENDIENTE",))
+        guardados = db.execute(text("SELECT matricula_id, version_modelo FROM tutorias_unach.riesgo_matricula")).all()
+
+    assert [e["matricula_id"] for e in reporte["estudiantes"]] == [1, 2]
+    assert lotes_al_modelo == []
+    assert guardados == [(2, "modelo-anterior")]
+    assert not any("INSERT" in sql for sql in motor.sentencias)
+
+
+PERIODOS = {"2024-2025": 1, "2025-2026": 2}
+
+
+def _reporte_por_paginas(db, limit, **filtros):
+    grupos, cursor = [], None
+    while True:
+        pagina = report_service.get_coordinator_report(db, limit=limit, despues_de=cursor, **filtros)
+        assert len(pagina["grupos"]) <= limit
+        grupos += pagina["grupos"]
+        cursor = pagina["siguiente"]
+        if cursor is None:
+            return grupos
+
+
+def test_reporte_coordinador_cuenta_cada_grupo(reporte_coordinador):
+    motor, esperado = reporte_coordinador
+    with Session(motor) as db:
+        reporte = report_service.get_coordinator_report(db, TODOS_LOS_PERIODOS, limit=1000)
+
+    assert reporte["siguiente"] is None
+    assert len(reporte["grupos"]) == len(esperado)
+    for g in reporte["grupos"]:
+        e = esperado[(PERIODOS[g["periodo"]], g["carrera"], g["tutor_id"], g["asignatura_id"])]
+        assert (g["total_estudiantes"], g["total_aprobados"], g["total_tutorias_registradas"],
+                g["tutorias_realizadas"]) == (e["estudiantes"], e["aprobados"], e["registradas"], e["realizadas"])
+        # SQLite divide enteros aunque se castee a NUMERIC
+        assert g["satisfaccion_promedio"] == (e["estrellas"] // e["evaluaciones"] if e["evaluaciones"] else 0)
+
+
+@pytest.mark.parametrize("filtros", [
+    dict(periodo_id=TODOS_LOS_PERIODOS),
+    dict(periodo_id=2),
+    dict(periodo_id=TODOS_LOS_PERIODOS, carrera="Sin carrera"),
+    dict(periodo_id=1, carrera="Civil", tutor_id=3),
+])
+def test_reporte_coordinador_por_keyset_igual_al_completo(reporte_coordinador, filtros):
+    motor, _ = reporte_coordinador
+    with Session(motor) as db:
+        completo = report_service.get_coordinator_report(db, limit=1000, **filtros)["grupos"]
+        assert _reporte_por_paginas(db, 7, **filtros) == completo
+        assert list(report_service.iter_coordinator_report(db, **filtros)) == completo
+
+    assert completo
+    if filtros["periodo_id"] != TODOS_LOS_PERIODOS:
+        assert {PERIODOS[g["periodo"]] for g in completo} == {filtros["periodo_id"]}
+    assert all(g["carrera"] == filtros.get("carrera", g["carrera"]) for g in completo)
+    assert all(g["tutor_id"] == filtros.get("tutor_id", g["tutor_id"]) for g in completo)
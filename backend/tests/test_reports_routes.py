@@ -0,0 +1,170 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import app.routes.reports as reports
+from app.main import app
+from app.core.paginacion import codificar_cursor, decodificar_cursor
+from app.db.database import get_db
+from app.dependencies import get_current_user
+from app.services.export_service import TIPOS_CONTENIDO
+from app.services.periodo_service import TODOS_LOS_PERIODOS
+from tests.asgi import request
+
+
+class SesionSinTablas:
+    """Sin tabla_version: los endpoints responden sin ETag."""
+
+    def execute(self, query, params=None):
+        raise RuntimeError("sin tabla")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def usuario():
+    usuario = SimpleNamespace(id=9, rol="coordinador", correo="c@unach.edu.ec", nombre="C")
+    app.dependency_overrides[get_db] = lambda: SesionSinTablas()
+    app.dependency_overrides[get_current_user] = lambda: usuario
+    yield usuario
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def llamadas_reporte(monkeypatch):
+    llamadas = []
+
+    def reporte(db, periodo_id, carrera, tutor_id, limit, despues_de):
+        llamadas.append((periodo_id, carrera, tutor_id, limit, despues_de))
+        return {"grupos": [], "limit": limit, "siguiente": ["2025-2026", "Civil", "Ana", 1, "Algebra", 1]}
+
+    monkeypatch.setattr(reports.report_service, "get_coordinator_report", reporte)
+    return llamadas
+
+
+def test_reporte_coordinador_pasa_filtros_y_cursor(usuario, llamadas_reporte):
+    cursor = codificar_cursor(["2025-2026", "Sistemas", "Ana", 0, "Fisica", 3])
+    r = request(app, "GET", "/reports/coordinator", query=f"periodo_id=2&carrera=Civil&tutor_id=1&limit=7&cursor={cursor}")
+
+    assert r["status"] == 200
+    assert llamadas_reporte == [(2, "Civil", 1, 7, ["2025-2026", "Sistemas", "Ana", 0, "Fisica", 3])]
+    assert decodificar_cursor(json.loads(r["body"])["siguiente"], 6) == ["2025-2026", "Civil", "Ana", 1, "Algebra", 1]
+
+
+@pytest.mark.parametrize("query", ["cursor=xx", f"cursor={codificar_cursor([1, 2])}", "limit=0"])
+def test_reporte_coordinador_parametros_invalidos(usuario, llamadas_reporte, query):
+    assert request(app, "GET", "/reports/coordinator", query=f"periodo_id=all&{query}")["status"] in (400, 422)
+    assert llamadas_reporte == []
+
+
+@pytest.fixture
+def llamadas_exportacion(monkeypatch):
+    llamadas = []
+
+    def exportar(formato, periodo_id, carrera, tutor_id):
+        llamadas.append((formato, periodo_id, carrera, tutor_id))
+        return iter([b"uno;", b"dos"])
+
+    monkeypatch.setattr(reports.export_service, "reporte_coordinador", exportar)
+    return llamadas
+
+
+@pytest.mark.parametrize("query, formato, periodo_id, carrera", [
+    ("periodo_id=all", "csv", TODOS_LOS_PERIODOS, None),
+    ("format=xlsx&periodo_id=3&carrera=Civil", "xlsx", 3, "Civil"),
+])
+def test_exportacion_envia_el_archivo(usuario, llamadas_exportacion, query, formato, periodo_id, carrera):
+    r = request(app, "GET", "/reports/coordinator/export", query=query)
+
+    assert r["status"] == 200
+    assert r["body"] == b"uno;dos"
+    assert r["headers"]["content-type"].startswith(TIPOS_CONTENIDO[formato].split(";")[0])
+    assert r["headers"]["content-disposition"].endswith(f'.{formato}"')
+    assert llamadas_exportacion == [(formato, periodo_id, carrera, None)]
+
+
+def test_exportacion_formato_desconocido(usuario, llamadas_exportacion):
+    assert request(app, "GET", "/reports/coordinator/export", query="format=pdf&periodo_id=1")["status"] == 422
+    assert llamadas_exportacion == []
+
+
+def test_exportacion_solo_coordinador(usuario, llamadas_exportacion):
+    usuario.rol = "tutor"
+    assert request(app, "GET", "/reports/coordinator/export", query="periodo_id=1")["status"] == 403
+    assert llamadas_exportacion == []
+
+
+@pytest.fixture
+def llamadas_alerta(monkeypatch):
+    llamadas = []
+
+    def alerta(db, periodo_id, carrera, asignatura_id, niveles, limit, despues_de):
+        llamadas.append((periodo_id, carrera, asignatura_id, list(niveles), limit, despues_de))
+        return {"estudiantes": [], "limit": limit, "siguiente": ["Ana", 12]}
+
+    monkeypatch.setattr(reports.report_service, "get_students_at_risk", alerta)
+    return llamadas
+
+
+def test_alerta_temprana_pasa_filtros_y_cursor(usuario, llamadas_alerta):
+    cursor = codificar_cursor(["Beto", 3])
+    r = request(app, "GET", "/reports/at-risk",
+                query=f"periodo_id=all&carrera=Sin%20carrera&asignatura_id=2&nivel=ALTO&nivel=N/D&limit=5&cursor={cursor}")
+
+    assert r["status"] == 200
+    assert llamadas_alerta == [(TODOS_LOS_PERIODOS, "Sin carrera", 2, ["ALTO", "N/D"], 5, ["Beto", 3])]
+    assert decodificar_cursor(json.loads(r["body"])["siguiente"], 2) == ["Ana", 12]
+
+
+def test_alerta_temprana_niveles_por_defecto(usuario, llamadas_alerta):
+    assert request(app, "GET", "/reports/at-risk", query="periodo_id=3")["status"] == 200
+    assert llamadas_alerta[0][0] == 3
+    assert llamadas_alerta[0][3] == ["BAJO", "MEDIO"]
+
+
+@pytest.mark.parametrize("query", ["periodo_id=1&nivel=RARO", "periodo_id=1&cursor=xx", "periodo_id=1&limit=0"])
+def test_alerta_temprana_parametros_invalidos(usuario, llamadas_alerta, query):
+    assert request(app, "GET", "/reports/at-risk", query=query)["status"] in (400, 422)
+    assert llamadas_alerta == []
+
+
+def test_alerta_temprana_solo_coordinador(usuario, llamadas_alerta):
+    usuario.rol = "tutor"
+    assert request(app, "GET", "/reports/at-risk", query="periodo_id=1")["status"] == 403
+
+
+@pytest.fixture
+def llamadas_detalle(monkeypatch):
+    llamadas = []
+
+    def detalle(db, regla, limit, despues_de):
+        llamadas.append((regla, limit, despues_de))
+        return {"regla": regla, "tabla": "tutorias", "ids": [1], "limit": limit, "siguiente": [42]}
+
+    monkeypatch.setattr(reports.data_quality_service, "get_detalle", detalle)
+    return llamadas
+
+
+def test_detalle_de_calidad_con_cursor(usuario, llamadas_detalle):
+    r = request(app, "GET", "/reports/data-quality/tutorias_huerfanas",
+                query=f"limit=3&cursor={codificar_cursor([5])}")
+
+    assert r["status"] == 200
+    assert llamadas_detalle == [("tutorias_huerfanas", 3, [5])]
+    assert decodificar_cursor(json.loads(r["body"])["siguiente"], 1) == [42]
+
+
+def test_detalle_de_calidad_regla_desconocida(usuario, llamadas_detalle):
+    assert request(app, "GET", "/reports/data-quality/nada")["status"] == 404
+    assert request(app, "GET", "/reports/data-quality/tutorias_huerfanas", query="cursor=zz")["status"] in (400, 422)
+    assert llamadas_detalle == []
+
+
+def test_detalle_de_calidad_solo_coordinador(usuario, llamadas_detalle):
+    usuario.rol = "tutor"
+    assert request(app, "GET", "/reports/data-quality/tutorias_huerfanas")["status"] == 403
@@ -0,0 +1,140 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services import risk_score_service as modulo
+from app.services.risk_score_service import risk_score_service, VIGENTE_SQL
+from tests.sqlite import motor_sqlite
+
+TABLAS = (
+    "matriculas(id INTEGER PRIMARY KEY)",
+    "notas(matricula_id INT, parcial1 REAL, parcial2 REAL, final REAL, situacion TEXT)",
+    "tutorias(id INTEGER PRIMARY KEY, matricula_id INT, estado TEXT)",
+    "riesgo_matricula(matricula_id INTEGER PRIMARY KEY, nivel TEXT, color TEXT, probabilidad REAL, "
+    "mensaje TEXT, version_modelo TEXT, parcial1 REAL, parcial2 REAL, final REAL, situacion TEXT, "
+    "num_tutorias INT, fecha_calculo TEXT)",
+)
+
+
+def _fila(matricula_id, vigente, **extra):
+    fila = {
+        "matricula_id": matricula_id, "parcial1": 6.0, "parcial2": None, "final": None,
+        "situacion": None, "num_tutorias": 1, "regla": None, "nivel": "MEDIO", "color": "yellow",
+        "probabilidad": 55.0, "mensaje": "guardado", "vigente": vigente,
+    }
+    fila.update(extra)
+    return fila
+
+
+@pytest.fixture
+def sin_modelo_ni_escrituras(monkeypatch):
+    def prohibido(*args, **kwargs):
+        raise AssertionError("una lectura no debe inferir ni escribir")
+
+    monkeypatch.setattr(modulo.prediction_service, "calculate_risk_batch", prohibido)
+    monkeypatch.setattr(risk_score_service, "save_scores", prohibido)
+
+
+def test_vigente_depende_de_la_version_del_modelo():
+    assert ":version_modelo" in VIGENTE_SQL
+
+
+def test_error_guardado_no_es_vigente(modelo_de_prueba):
+    motor = motor_sqlite(TABLAS)
+    with motor.begin() as c:
+        c.execute(text("INSERT INTO tutorias_unach.matriculas VALUES (1), (2)"))
+        c.execute(text("INSERT INTO tutorias_unach.notas VALUES (1, 6.0, NULL, NULL, NULL), (2, 6.0, NULL, NULL, NULL)"))
+        c.execute(text("INSERT INTO tutorias_unach.riesgo_matricula VALUES "
+                       "(1, 'ERROR', 'gray', 0, 'Fallo predicción.', 'modelo-prueba', 6.0, NULL, NULL, NULL, 0, NULL), "
+                       "(2, 'MEDIO', 'yellow', 55, 'guardado', 'modelo-prueba', 6.0, NULL, NULL, NULL, 0, NULL)"))
+
+    with Session(motor) as db:
+        pendientes = [f["matricula_id"] for lote in risk_score_service.iter_pending(db, False, "modelo-prueba")
+                      for f in lote]
+    assert pendientes == [1]
+
+
+def test_resolver_regla_guardado_o_pendiente(sin_modelo_ni_escrituras):
+    riesgos = risk_score_service.resolver([
+        _fila(1, False, situacion="APROBADO", regla="aprobado"),
+        _fila(2, True),
+        _fila(3, False),
+    ])
+
+    assert riesgos[1]["riesgo_nivel"] == "ALTO"
+    assert (riesgos[2]["riesgo_nivel"], riesgos[2]["probabilidad_riesgo"]) == ("MEDIO", 55.0)
+    assert (riesgos[3]["riesgo_nivel"], riesgos[3]["riesgo_color"]) == ("PENDIENTE", "gray")
+    assert riesgos[3]["tutorias_acumuladas"] == 1
+
+
+def test_mapa_de_riesgo_solo_lee(modelo_de_prueba, sin_modelo_ni_escrituras):
+    motor = motor_sqlite(TABLAS)
+    with motor.begin() as c:
+        c.execute(text("INSERT INTO tutorias_unach.matriculas VALUES (1), (2), (3), (4)"))
+        c.execute(text("INSERT INTO tutorias_unach.notas VALUES (1, 8.0, 9.0, NULL, NULL), "
+                       "(2, 6.0, NULL, NULL, NULL), (3, 6.0, NULL, NULL, NULL), (4, 6.0, NULL, NULL, NULL)"))
+        # 2 vigente; 4 calculada con otro modelo; 3 sin puntaje
+        c.execute(text("INSERT INTO tutorias_unach.riesgo_matricula VALUES "
+                       "(2, 'MEDIO', 'yellow', 55, 'guardado', 'modelo-prueba', 6.0, NULL, NULL, NULL, 0, NULL), "
+                       "(4, 'ALTO', 'green', 90, 'viejo', 'modelo-anterior', 6.0, NULL, NULL, NULL, 0, NULL)"))
+    motor.sentencias.clear()
+
+    with Session(motor) as db:
+        riesgos = risk_score_service.get_risk_map(db, [1, 2, 3, 4])
+
+    assert {mid: r["riesgo_nivel"] for mid, r in riesgos.items()} == {
+        1: "ALTO", 2: "MEDIO", 3: "PENDIENTE", 4: "PENDIENTE"
+    }
+    assert len(motor.sentencias) == 1
+
+
+class SesionEscritura:
+    def __init__(self):
+        self.lotes = []
+        self.commits = 0
+
+    def execute(self, query, params=None):
+        self.lotes.append(params)
+
+    def commit(self):
+        self.commits += 1
+
+
+def _feats(matricula_id):
+    return {"matricula_id": matricula_id, "p1": 6.0, "p2": None, "final": None, "situacion": None, "tutorias": 0}
+
+
+def _prediccion(nivel):
+    return {"riesgo_nivel": nivel, "riesgo_color": "gray", "probabilidad_riesgo": 0.0,
+            "mensaje_explicativo": "Fallo predicción." if nivel == "ERROR" else "modelo"}
+
+
+def test_no_se_guardan_los_errores_del_modelo():
+    db = SesionEscritura()
+
+    guardados = risk_score_service.save_scores(
+        db, [_feats(1), _feats(2), _feats(3)], [_prediccion("BAJO"), _prediccion("ERROR"), _prediccion("ALTO")], "v1"
+    )
+
+    assert guardados == 2
+    assert [p["matricula_id"] for p in db.lotes[0]] == [1, 3]
+    assert db.commits == 1
+
+
+def test_lote_de_solo_errores_no_escribe():
+    db = SesionEscritura()
+    assert risk_score_service.save_scores(db, [_feats(1)], [_prediccion("ERROR")], "v1") == 0
+    assert db.lotes == [] and db.commits == 0
+
+
+def test_recalculo_cuenta_solo_lo_guardado(monkeypatch):
+    monkeypatch.setattr(risk_score_service, "iter_pending",
+                        lambda db, completo, version, tamano_lote: iter([[_feats(1), _feats(2)], [_feats(3)]]))
+    monkeypatch.setattr(modulo.prediction_service, "calculate_risk_batch",
+                        lambda filas: [_prediccion("ERROR" if f["matricula_id"] == 2 else "MEDIO") for f in filas])
+    monkeypatch.setattr(type(modulo.prediction_service), "model_version", property(lambda self: "v-test"))
+    escritura = SesionEscritura()
+
+    assert risk_score_service.refresh_pending(None, escritura) == 2
+    assert [[p["matricula_id"] for p in lote] for lote in escritura.lotes] == [[1], [3]]
+    assert {p["version_modelo"] for lote in escritura.lotes for p in lote} == {"v-test"}
@@ -0,0 +1,61 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.main import app
+from app.db.database import get_db
+from app.dependencies import get_current_user
+from app.services import auth_service
+from tests.asgi import request
+
+
+class SesionFalsa:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def overrides():
+    app.dependency_overrides[get_db] = lambda: SesionFalsa()
+    yield app.dependency_overrides
+    app.dependency_overrides.clear()
+
+
+def test_emite_ticket_para_el_usuario_autenticado(overrides, monkeypatch):
+    usuario = SimpleNamespace(id=7, correo="tutor@unach.edu.ec", rol="tutor")
+    overrides[get_current_user] = lambda: usuario
+    emitidos = []
+    monkeypatch.setattr(auth_service, "crear_ticket_stream",
+                        lambda db, u: emitidos.append(u) or "ticket-1")
+
+    r = request(app, "POST", "/auth/stream-ticket")
+
+    assert r["status"] == 200
+    assert json.loads(r["body"])["ticket"] == "ticket-1"
+    assert emitidos == [usuario]
+
+
+def test_stream_rechaza_ticket_invalido_o_usado(overrides, monkeypatch):
+    canjeados = []
+    monkeypatch.setattr(auth_service, "consumir_ticket_stream",
+                        lambda db, ticket: canjeados.append(ticket) or None)
+
+    r = request(app, "GET", "/tutorias/eventos", query="ticket=usado")
+
+    assert r["status"] == 401
+    assert canjeados == ["usado"]
+
+
+def test_stream_ya_no_acepta_el_jwt_en_la_query(overrides):
+    r = request(app, "GET", "/tutorias/eventos", query="token=jwt")
+    assert r["status"] == 422
+
+
+def test_stream_solo_para_tutores(overrides, monkeypatch):
+    monkeypatch.setattr(auth_service, "consumir_ticket_stream",
+                        lambda db, ticket: SimpleNamespace(id=1, correo="e@unach.edu.ec", rol="estudiante"))
+
+    r = request(app, "GET", "/tutorias/eventos", query="ticket=valido")
+
+    assert r["status"] == 403
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services import risk_score_service as riesgo
+from app.services.periodo_service import TODOS_LOS_PERIODOS
+from app.services.tutor_dashboard_service import tutor_dashboard_service
+from tests.sqlite import motor_sqlite
+
+
+@pytest.fixture
+def tutor(modelo_de_prueba, monkeypatch):
+    """
+    Un tutor (usuario 1) con un curso de seis matrículas en curso o cerradas:
+    1 aprobada, 2 con promedio insuficiente, 3 con puntaje vigente BAJO,
+    4 con un puntaje de otro modelo, 5 sin puntaje y 6 con puntaje vigente ALTO
+    (3-6 necesitan el modelo).
+    """
+    def prohibido(*args, **kwargs):
+        raise AssertionError("una lectura no debe inferir ni escribir")
+
+    monkeypatch.setattr(riesgo.prediction_service, "calculate_risk_batch", prohibido)
+    monkeypatch.setattr(riesgo.risk_score_service, "save_scores", prohibido)
+
+    motor = motor_sqlite((
+        "usuarios(id INTEGER PRIMARY KEY, nombre TEXT)",
+        "tutores(id INTEGER PRIMARY KEY, usuario_id INT)",
+        "estudiantes(id INTEGER PRIMARY KEY, usuario_id INT)",
+        "asignaturas(id INTEGER PRIMARY KEY, nombre TEXT)",
+        "periodos_academicos(id INTEGER PRIMARY KEY, nombre TEXT)",
+        "matriculas(id INTEGER PRIMARY KEY, estudiante_id INT, asignatura_id INT, periodo_id INT, tutor_id INT)",
+        "notas(matricula_id INT, parcial1 REAL, parcial2 REAL, final REAL, situacion TEXT)",
+        "tutorias(id INTEGER PRIMARY KEY, matricula_id INT, estado TEXT, fecha TEXT, tema TEXT)",
+        "evaluaciones(id INTEGER PRIMARY KEY, tutoria_id INT, estrellas INT)",
+        "riesgo_matricula(matricula_id INTEGER PRIMARY KEY, nivel TEXT, color TEXT, probabilidad REAL, "
+        "mensaje TEXT, version_modelo TEXT, parcial1 REAL, parcial2 REAL, final REAL, situacion TEXT, "
+        "num_tutorias INT, fecha_calculo TEXT)",
+    ))
+    with motor.begin() as c:
+        c.execute(text("INSERT INTO tutorias_unach.usuarios VALUES (1, 'Tutor'), (2, 'Ana'), (3, 'Beto'), "
+                       "(4, 'Carla'), (5, 'Dario'), (6, 'Elena'), (7, 'Fabian')"))
+        c.execute(text("INSERT INTO tutorias_unach.tutores VALUES (1, 1)"))
+        c.execute(text("INSERT INTO tutorias_unach.estudiantes VALUES (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7)"))
+        c.execute(text("INSERT INTO tutorias_unach.asignaturas VALUES (1, 'Algebra')"))
+        c.execute(text("INSERT INTO tutorias_unach.periodos_academicos VALUES (1, '2025-2026')"))
+        c.execute(text("INSERT INTO tutorias_unach.matriculas VALUES (1, 1, 1, 1, 1), (2, 2, 1, 1, 1), "
+                       "(3, 3, 1, 1, 1), (4, 4, 1, 1, 1), (5, 5, 1, 1, 1), (6, 6, 1, 1, 1)"))
+        c.execute(text("INSERT INTO tutorias_unach.notas VALUES (1, 8, 9, 8.5, 'APROBADO'), "
+                       "(2, 5, 6, NULL, NULL), (3, 4, NULL, NULL, NULL), (4, 9, NULL, NULL, NULL), "
+                       "(5, 3, NULL, NULL, NULL), (6, 9, NULL, NULL, NULL)"))
+        c.execute(text("INSERT INTO tutorias_unach.riesgo_matricula VALUES "
+                       "(3, 'BAJO', 'red', 20, 'guardado', 'modelo-prueba', 4, NULL, NULL, NULL, 0, NULL), "
+                       "(4, 'ALTO', 'green', 90, 'viejo', 'modelo-anterior', 9, NULL, NULL, NULL, 0, NULL), "
+                       "(6, 'ALTO', 'green', 90, 'guardado', 'modelo-prueba', 9, NULL, NULL, NULL, 0, NULL)"))
+    return motor
+
+
+def _roster(motor, **filtros):
+    with Session(motor) as db:
+        roster = tutor_dashboard_service.get_course_roster(db, 1, periodo_id=TODOS_LOS_PERIODOS, **filtros)
+    return {e["matricula_id"]: e for e in roster["estudiantes"]}, roster["total"]
+
+
+def test_roster_sin_ia_ni_escrituras(tutor):
+    tutor.sentencias.clear()
+    estudiantes, total = _roster(tutor)
+
+    assert total == 6
+    assert {mid: e["riesgo_nivel"] for mid, e in estudiantes.items()} == {
+        1: "ALTO", 2: "BAJO", 3: "BAJO", 4: "PENDIENTE", 5: "PENDIENTE", 6: "ALTO"
+    }
+    assert estudiantes[3]["probabilidad_riesgo"] == 20.0
+    assert not any(k in estudiantes[3] for k in ("regla", "vigente", "nivel"))
+    assert not any("INSERT" in sql for sql in tutor.sentencias)
+
+
+def test_resumen_no_cuenta_lo_no_calculado_como_buen_pronostico(tutor):
+    with Session(tutor) as db:
+        curso, = tutor_dashboard_service.get_tutor_dashboard_data(db, 1)["cursos"]
+
+    # En riesgo: 2 por la regla y 3 por su puntaje vigente; 4 y 5 esperan el recálculo
+    assert (curso["en_curso"], curso["en_riesgo"], curso["sin_calcular"]) == (5, 2, 2)
+
+
+@pytest.mark.parametrize("grupo, esperadas", [
+    ("prioritario", {2, 3}),
+    ("normal", {6}),
+    ("sin_calcular", {4, 5}),
+])
+def test_grupos_de_riesgo_del_roster(tutor, grupo, esperadas):
+    estudiantes, total = _roster(tutor, riesgo=grupo)
+
+    assert set(estudiantes) == esperadas
+    assert total == len(esperadas)
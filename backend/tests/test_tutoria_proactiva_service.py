@@ -0,0 +1,48 @@
+from app.services.risk_score_service import risk_score_service
+from app.services.tutoria_proactiva_service import tutoria_proactiva_service
+
+
+class Resultado:
+    def __init__(self, valor):
+        self.valor = valor
+
+    def scalar(self):
+        return self.valor
+
+
+class SesionFalsa:
+    def __init__(self, lock_libre):
+        self.lock_libre = lock_libre
+        self.sql = []
+        self.rollbacks = 0
+
+    def execute(self, query, params=None):
+        self.sql.append((str(query), params))
+        return Resultado(self.lock_libre)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_recalcular_se_salta_si_otro_worker_tiene_el_lock(monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(risk_score_service, "refresh_pending", lambda l, e: llamadas.append(1) or 5)
+    lectura = SesionFalsa(lock_libre=False)
+
+    assert tutoria_proactiva_service.recalcular(lectura, SesionFalsa(True)) == 0
+    assert llamadas == []
+    assert "pg_try_advisory_xact_lock" in lectura.sql[0][0]
+    assert lectura.rollbacks == 1
+
+
+def test_recalcular_toma_el_lock_en_la_sesion_de_lectura(monkeypatch):
+    sesiones = []
+    monkeypatch.setattr(risk_score_service, "refresh_pending",
+                        lambda l, e: sesiones.append((l, e)) or 5)
+    lectura, escritura = SesionFalsa(lock_libre=True), SesionFalsa(lock_libre=True)
+
+    assert tutoria_proactiva_service.recalcular(lectura, escritura) == 5
+    assert sesiones == [(lectura, escritura)]
+    assert len(lectura.sql) == 1 and escritura.sql == []
+    # El rollback final libera el lock de transacción
+    assert lectura.rollbacks == 1
@@ -1,7 +1,7 @@
 // frontend/src/pages/DashboardCoordinador.tsx
 
 import React, { useEffect, useState, useCallback } from 'react';
-import { getCoordinatorDashboard, CoordinatorDashboard } from '../services/cmiService';
+import { getCoordinatorDashboard, getCMITendencia, CoordinatorDashboard, PuntoTendenciaCMI } from '../services/cmiService';
 import axiosClient from '../api/axiosClient'; 
 import { 
   PieChart, 
@@ -9,7 +9,12 @@ import {
   Cell,
   Tooltip, 
   Legend, 
-  ResponsiveContainer 
+  ResponsiveContainer,
+  LineChart,
+  Line,
+  XAxis,
+  YAxis,
+  CartesianGrid
 } from 'recharts';
 import { 
   LayoutDashboard, 
@@ -32,6 +37,8 @@ const DashboardCoordinador: React.FC = () => {
   const [dashboardData, setDashboardData] = useState<CoordinatorDashboard | null>(null);
   // Estado para datos de calidad (ISO/IEC 25012)
   const [calidadData, setCalidadData] = useState<any>(null); 
+  // Histórico diario del CMI (cmi_snapshots)
+  const [tendencia, setTendencia] = useState<PuntoTendenciaCMI[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -51,6 +58,14 @@ const DashboardCoordinador: React.FC = () => {
         console.warn("No se pudo cargar calidad de datos, continuando...", err);
       }
 
+      // 3. Tendencia de los últimos 90 días
+      try {
+        const resTendencia = await getCMITendencia();
+        setTendencia(resTendencia.serie);
+      } catch (err) {
+        console.warn("No se pudo cargar la tendencia del CMI, continuando...", err);
+      }
+
       setError(null);
     } catch (err: any) {
       console.error('❌ Error CMI:', err);
@@ -71,7 +86,7 @@ const DashboardCoordinador: React.FC = () => {
 
   if (error || !dashboardData) return <div className="text-center text-unach-red p-12 font-bold border border-red-100 bg-red-50 rounded-xl mt-10">{error}</div>;
 
-  const { nombre, cmi } = dashboardData;
+  const { nombre, cmi, periodo, carrera } = dashboardData;
   const dataPastel = cmi.perspectiva_procesos.distribucion_estados;
 
   return (
@@ -84,7 +99,7 @@ const DashboardCoordinador: React.FC = () => {
                   Panel de Control CMI <span className="text-2xl">📊</span>
               </h1>
               <p className="text-gray-500 mt-1 ml-1 text-sm">
-                  Bienvenido, Coordinador {nombre}. Visión estratégica del periodo.
+                  Bienvenido, Coordinador {nombre}. Visión estratégica del periodo{carrera ? ` · ${carrera}` : ' · Todas las carreras'}.
               </p>
           </div>
           <div className="hidden md:block text-right">
@@ -94,7 +109,7 @@ const DashboardCoordinador: React.FC = () => {
                 </div>
                 <div className="text-left">
                     <p className="text-[10px] font-bold text-gray-400 uppercase tracking-wider">Periodo Académico</p>
-                    <p className="text-sm font-bold text-unach-blue">2025 - 2026</p>
+                    <p className="text-sm font-bold text-unach-blue">{periodo ?? 'Todos'}</p>
                 </div>
              </div>
           </div>
@@ -134,6 +149,14 @@ const DashboardCoordinador: React.FC = () => {
                     <p className="text-2xl font-bold text-gray-700">{calidadData.metricas.completitud}%</p>
                     <p className="text-[10px] font-bold text-gray-400 uppercase">Completitud</p>
                 </div>
+                <div className="text-center">
+                    <p className="text-2xl font-bold text-gray-700">{calidadData.metricas.exactitud}%</p>
+                    <p className="text-[10px] font-bold text-gray-400 uppercase">Exactitud</p>
+                </div>
+                <div className="text-center">
+                    <p className="text-2xl font-bold text-gray-700">{calidadData.metricas.consistencia}%</p>
+                    <p className="text-[10px] font-bold text-gray-400 uppercase">Consistencia</p>
+                </div>
                 <div className="text-center hidden sm:block">
                     <p className="text-2xl font-bold text-gray-700">{calidadData.metricas.registros_auditados}</p>
                     <p className="text-[10px] font-bold text-gray-400 uppercase">Auditados</p>
@@ -346,6 +369,38 @@ const DashboardCoordinador: React.FC = () => {
         </div>
       </div>
 
+      {/* 7. TENDENCIA (HISTÓRICO DIARIO) */}
+      {tendencia.length > 1 && (
+      <div>
+        <h2 className="text-sm font-bold text-gray-400 uppercase tracking-widest mb-4 flex items-center gap-2 mt-8">
+            <TrendingUp size={16} className="text-unach-red" /> Tendencia (últimos 90 días)
+        </h2>
+        <div className="bg-white p-6 rounded-xl border border-gray-200 shadow-sm hover:shadow-md transition-all">
+            <div className="h-64 w-full">
+                <ResponsiveContainer width="100%" height="100%">
+                    <LineChart data={tendencia}>
+                        <CartesianGrid strokeDasharray="3 3" stroke="#F3F4F6" />
+                        <XAxis dataKey="fecha" tick={{ fontSize: 11, fill: '#9CA3AF' }} />
+                        <YAxis domain={[0, 100]} tick={{ fontSize: 11, fill: '#9CA3AF' }} unit="%" />
+                        <Tooltip 
+                            contentStyle={{ 
+                                borderRadius: '12px', 
+                                border: 'none', 
+                                boxShadow: '0 10px 15px -3px rgb(0 0 0 / 0.1)',
+                                padding: '12px'
+                            }}
+                            itemStyle={{ fontWeight: 'bold', fontSize: '12px' }}
+                        />
+                        <Legend iconType="circle" wrapperStyle={{ fontSize: '12px', fontWeight: 500, color: '#6B7280' }} />
+                        <Line type="monotone" dataKey="tasa_asistencia" name="Asistencia" stroke={COLORS[0]} strokeWidth={2} dot={false} />
+                        <Line type="monotone" dataKey="tasa_adherencia_tutores" name="Adherencia de tutores" stroke={COLORS[3]} strokeWidth={2} dot={false} />
+                    </LineChart>
+                </ResponsiveContainer>
+            </div>
+        </div>
+      </div>
+      )}
+
     </div>
   );
 };
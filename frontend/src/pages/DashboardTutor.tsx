@@ -1,7 +1,10 @@
 // frontend/src/pages/DashboardTutor.tsx
 
 import React, { useEffect, useState, useCallback } from 'react';
-import { getTutorDashboard, TutorDashboard, CursoTutor } from '../services/tutorDashboardService'; 
+import { 
+  getTutorDashboard, getTutorRoster, getTutorRosterCompleto, suscribirEventosTutor,
+  TutorDashboard, CursoTutor, CursoResumen, RosterParams, EventoTutoria 
+} from '../services/tutorDashboardService'; 
 import AgendarCitaModal from '../components/AgendarCitaModal'; 
 import DashboardSkeleton from '../components/DashboardSkeleton';
 import { Link } from 'react-router-dom';
@@ -14,10 +17,20 @@ import {
 
 // ELIMINADO: const CACHE_KEY = 'tutor_dashboard_v1'; (Causante del bug de "Castro")
 
-const safeParseFloat = (value: number | null | undefined): number => {
-    if (value === null || value === undefined) return 0;
-    const num = Number(value);
-    return isNaN(num) ? 0 : num;
+// Los estudiantes se piden por páginas al abrir un curso o un grupo
+const TAMANO_PAGINA = 50;
+
+interface RosterCargado {
+    estudiantes: CursoTutor[];
+    total: number;
+    cargando: boolean;
+}
+
+const claveCurso = (curso: CursoResumen) => `${curso.periodo_id}-${curso.asignatura_id}`;
+const paramsCurso = (curso: CursoResumen): RosterParams => ({ asignatura_id: curso.asignatura_id, periodo_id: curso.periodo_id });
+const PARAMS_GRUPO: Record<'critical' | 'normal', RosterParams> = {
+    critical: { riesgo: 'prioritario' },
+    normal: { riesgo: 'normal' }
 };
 
 // Componente Circular (Visual)
@@ -63,12 +76,16 @@ const DashboardTutor: React.FC = () => {
       normal: false   
   });
 
+  // Estudiantes ya cargados por curso ("periodo-asignatura") o grupo ("critical"/"normal")
+  const [rosters, setRosters] = useState<Record<string, RosterCargado>>({});
+
   // CORRECCIÓN 2: Dependencias vacías [] para que la función sea estable y no dependa de dashboardData.
   const fetchDashboardData = useCallback(async () => {
     try {
       setLoading(true); // Asegurar loading visual
       const data = await getTutorDashboard();
       setDashboardData(data);
+      setRosters({}); // Se vuelven a pedir los cursos/grupos abiertos
       // ELIMINADO: localStorage.setItem... para evitar datos estancados.
       setError(null);
     } catch (err) {
@@ -86,10 +103,80 @@ const DashboardTutor: React.FC = () => {
       fetchDashboardData(); 
   }, [fetchDashboardData]);
 
+  // Solicitudes pendientes en vivo: se aplican los cambios que llegan por SSE sin recargar el dashboard
+  useEffect(() => {
+    const aplicarEvento = async (evento: EventoTutoria) => {
+      if (evento.evento === 'recargar') {
+        try {
+          const data = await getTutorDashboard();
+          setDashboardData(prev => prev ? { ...prev, tutorias_pendientes: data.tutorias_pendientes } : prev);
+        } catch (err) {
+          console.error("Error recargando pendientes:", err);
+        }
+        return;
+      }
+      setDashboardData(prev => {
+        if (!prev) return prev;
+        const resto = prev.tutorias_pendientes.filter(t => t.id !== evento.id);
+        if (evento.estado !== 'solicitada') return { ...prev, tutorias_pendientes: resto };
+        return {
+          ...prev,
+          tutorias_pendientes: [...resto, {
+            id: evento.id as number,
+            estudiante: evento.estudiante || '',
+            fecha_solicitada: evento.fecha_solicitada || '',
+            tema: evento.tema || ''
+          }]
+        };
+      });
+    };
+    return suscribirEventosTutor(aplicarEvento);
+  }, []);
+
+  /**
+   * Pide la siguiente página de estudiantes de un curso o grupo y la agrega a la ya cargada.
+   */
+  const cargarRoster = useCallback(async (key: string, params: RosterParams, offset: number = 0) => {
+    setRosters(prev => ({ ...prev, [key]: { estudiantes: prev[key]?.estudiantes || [], total: prev[key]?.total || 0, cargando: true } }));
+    try {
+      const pagina = await getTutorRoster({ ...params, limit: TAMANO_PAGINA, offset });
+      setRosters(prev => ({
+          ...prev,
+          [key]: {
+              estudiantes: offset === 0 ? pagina.estudiantes : [...(prev[key]?.estudiantes || []), ...pagina.estudiantes],
+              total: pagina.total,
+              cargando: false
+          }
+      }));
+    } catch (err) {
+      console.error("Error roster:", err);
+      setRosters(prev => ({ ...prev, [key]: { estudiantes: prev[key]?.estudiantes || [], total: prev[key]?.total || 0, cargando: false } }));
+    }
+  }, []);
+
+  // Carga perezosa: solo se piden los estudiantes de lo que está abierto
+  useEffect(() => {
+    if (!dashboardData) return;
+    (['critical', 'normal'] as const).forEach(grupo => {
+        if (groupsOpen[grupo] && !rosters[grupo]) cargarRoster(grupo, PARAMS_GRUPO[grupo]);
+    });
+    dashboardData.cursos.forEach(curso => {
+        const key = claveCurso(curso);
+        if (expandedCourses[key] && !rosters[key]) cargarRoster(key, paramsCurso(curso));
+    });
+  }, [dashboardData, groupsOpen, expandedCourses, rosters, cargarRoster]);
+
   /**
    * FUNCIÓN GENERICA PARA EXPORTAR EXCEL
    */
-  const exportarExcel = (cursosData: CursoTutor[], nombreArchivo: string) => {
+  const exportarExcel = async (params: RosterParams, nombreArchivo: string) => {
+    let cursosData: CursoTutor[];
+    try {
+      cursosData = await getTutorRosterCompleto(params);
+    } catch (err) {
+      console.error("Error exportando reporte:", err);
+      return;
+    }
     if (!cursosData || cursosData.length === 0) return;
 
     const filas = cursosData.map(curso => ({
@@ -143,26 +230,28 @@ const DashboardTutor: React.FC = () => {
 
   const { nombre, cursos, tutorias_pendientes, average_rating = 0.0 } = dashboardData;
 
-  const estudiantesActivos = cursos.filter(c => c.situacion !== 'APROBADO' && c.situacion !== 'REPROBADO');
-  const grupoPrioritario = estudiantesActivos.filter(c => (c.probabilidad_riesgo || 0) < 70)
-      .sort((a, b) => (a.probabilidad_riesgo || 0) - (b.probabilidad_riesgo || 0));
-  const grupoNormal = estudiantesActivos.filter(c => (c.probabilidad_riesgo || 0) >= 70);
-
-  const cursosAgrupados = cursos.reduce((acc: any, curso: CursoTutor) => {
-    const key = `${curso.periodo} - ${curso.asignatura}`;
-    if (!acc[key]) acc[key] = { periodo: curso.periodo, asignatura: curso.asignatura, estudiantes: [] };
-    acc[key].estudiantes.push(curso);
-    return acc;
-  }, {});
-
-  const calcularEstadisticas = (estudiantes: CursoTutor[]) => {
-    const notasValidas = estudiantes.filter(e => e.final !== null).map(e => safeParseFloat(e.final));
-    const aprobados = estudiantes.filter(e => e.situacion === 'APROBADO').length;
-    const reprobados = estudiantes.filter(e => e.situacion === 'REPROBADO').length;
-    const promedioFinal = notasValidas.length > 0
-        ? (notasValidas.reduce((sum: number, n: number) => sum + n, 0) / notasValidas.length).toFixed(2)
-        : 'N/A';
-    return { total: estudiantes.length, aprobados, reprobados, promedioFinal };
+  // Los totales vienen resumidos por curso desde el servidor
+  const totalPrioritario = cursos.reduce((sum, c) => sum + c.en_riesgo, 0);
+  const totalSinCalcular = cursos.reduce((sum, c) => sum + c.sin_calcular, 0);
+  const totalNormal = cursos.reduce((sum, c) => sum + (c.en_curso - c.en_riesgo - c.sin_calcular), 0);
+
+  const CargarMas = ({ rosterKey, params }: { rosterKey: string, params: RosterParams }) => {
+      const roster = rosters[rosterKey];
+      if (!roster) return null;
+      if (roster.cargando) return (
+          <p className="p-4 text-center text-xs font-bold text-gray-400">Cargando estudiantes...</p>
+      );
+      if (roster.estudiantes.length >= roster.total) return null;
+      return (
+          <div className="p-3 text-center border-t border-gray-100">
+              <button
+                  onClick={(e) => { e.stopPropagation(); cargarRoster(rosterKey, params, roster.estudiantes.length); }}
+                  className="px-3 py-1.5 text-xs font-bold text-unach-blue bg-blue-50 border border-blue-100 rounded-lg hover:bg-blue-100 transition-colors"
+              >
+                  Cargar más ({roster.estudiantes.length} de {roster.total})
+              </button>
+          </div>
+      );
   };
 
   const RenderGroupList = ({ students }: { students: CursoTutor[] }) => (
@@ -260,8 +349,13 @@ const DashboardTutor: React.FC = () => {
                     <div>
                         <h3 className="text-lg font-bold text-gray-800">Atención Prioritaria (IA)</h3>
                         <p className="text-xs text-rose-600 font-bold mt-0.5">
-                            {grupoPrioritario.length} estudiantes con probabilidad baja de aprobación
+                            {totalPrioritario} estudiantes con probabilidad baja de aprobación
                         </p>
+                        {totalSinCalcular > 0 && (
+                            <p className="text-[11px] text-gray-400 font-medium mt-0.5">
+                                {totalSinCalcular} estudiantes con riesgo pendiente de cálculo
+                            </p>
+                        )}
                     </div>
                 </div>
                 <div className={`p-2 rounded-full transition-colors ${groupsOpen.critical ? 'bg-rose-100 text-rose-600' : 'bg-gray-50 text-gray-400'}`}>
@@ -270,7 +364,8 @@ const DashboardTutor: React.FC = () => {
             </div>
             {groupsOpen.critical && (
                 <div className="border-t border-rose-100 bg-white">
-                    <RenderGroupList students={grupoPrioritario} />
+                    <RenderGroupList students={rosters.critical?.estudiantes || []} />
+                    <CargarMas rosterKey="critical" params={PARAMS_GRUPO.critical} />
                 </div>
             )}
         </div>
@@ -284,7 +379,7 @@ const DashboardTutor: React.FC = () => {
                     <div>
                         <h3 className="text-lg font-bold text-gray-800">Buen Pronóstico</h3>
                         <p className="text-xs text-emerald-600 font-bold mt-0.5">
-                            {grupoNormal.length} estudiantes con buen rendimiento
+                            {totalNormal} estudiantes con buen rendimiento
                         </p>
                     </div>
                 </div>
@@ -294,7 +389,8 @@ const DashboardTutor: React.FC = () => {
             </div>
             {groupsOpen.normal && (
                 <div className="border-t border-gray-100 bg-white">
-                    <RenderGroupList students={grupoNormal} />
+                    <RenderGroupList students={rosters.normal?.estudiantes || []} />
+                    <CargarMas rosterKey="normal" params={PARAMS_GRUPO.normal} />
                 </div>
             )}
         </div>
@@ -359,14 +455,16 @@ const DashboardTutor: React.FC = () => {
                 <h2 className="text-xl font-bold text-gray-800">Mis Asignaturas</h2>
             </div>
              <button 
-                onClick={() => exportarExcel(cursos, 'Reporte_Global_Docente')}
+                onClick={() => exportarExcel({}, 'Reporte_Global_Docente')}
                 className="hidden md:flex items-center gap-2 px-3 py-1.5 text-xs font-bold text-emerald-600 bg-emerald-50 border border-emerald-100 rounded-lg hover:bg-emerald-100 transition-colors"
             >
                 <FileSpreadsheet size={14} /> Reporte Global
             </button>
         </div>
         
-        {Object.entries(cursosAgrupados).map(([key, data]: any) => (
+        {cursos.map((data: CursoResumen) => {
+            const key = claveCurso(data);
+            return (
             <div key={key} className={`bg-white border rounded-2xl transition-all duration-300 ${expandedCourses[key] ? 'border-blue-100 shadow-md ring-1 ring-blue-50' : 'border-gray-200 shadow-sm hover:border-blue-200'}`}>
                 <div onClick={() => toggleCourse(key)} className="p-5 cursor-pointer select-none flex flex-col md:flex-row md:items-center justify-between gap-4">
                   
@@ -378,7 +476,7 @@ const DashboardTutor: React.FC = () => {
                         <button 
                             onClick={(e) => {
                                 e.stopPropagation(); 
-                                exportarExcel(data.estudiantes, `Reporte_${data.asignatura}_${data.periodo}`);
+                                exportarExcel(paramsCurso(data), `Reporte_${data.asignatura}_${data.periodo}`);
                             }}
                             className="flex items-center gap-1.5 px-3 py-1 bg-emerald-100 text-emerald-700 rounded-full text-[10px] font-bold uppercase tracking-wide hover:bg-emerald-200 hover:shadow-sm transition-all border border-emerald-200"
                             title="Descargar reporte solo de esta materia"
@@ -392,7 +490,10 @@ const DashboardTutor: React.FC = () => {
                              <Calendar size={10} /> {data.periodo}
                         </span>
                         <span className="px-2 py-0.5 bg-gray-50 border border-gray-100 rounded text-[10px] font-bold text-gray-500 uppercase flex items-center gap-1">
-                             <Users size={10} /> {data.estudiantes.length} Estudiantes
+                             <Users size={10} /> {data.total_estudiantes} Estudiantes
+                        </span>
+                        <span className="px-2 py-0.5 bg-gray-50 border border-gray-100 rounded text-[10px] font-bold text-gray-500 uppercase flex items-center gap-1">
+                             <Activity size={10} /> {data.tutorias_realizadas} Tutorías
                         </span>
                     </div>
                   </div>
@@ -400,16 +501,16 @@ const DashboardTutor: React.FC = () => {
                   <div className="flex items-center gap-6 text-sm">
                         <div className="text-center">
                             <p className="text-[10px] font-bold text-gray-400 uppercase">Promedio</p>
-                            <p className="font-black text-gray-800">{calcularEstadisticas(data.estudiantes).promedioFinal}</p>
+                            <p className="font-black text-gray-800">{data.promedio_final !== null ? Number(data.promedio_final).toFixed(2) : 'N/A'}</p>
                         </div>
                         <div className="h-8 w-px bg-gray-100"></div>
                         <div className="text-center">
                             <p className="text-[10px] font-bold text-gray-400 uppercase">Aprob.</p>
-                            <p className="font-bold text-emerald-600">{calcularEstadisticas(data.estudiantes).aprobados}</p>
+                            <p className="font-bold text-emerald-600">{data.aprobados}</p>
                         </div>
                         <div className="text-center">
                             <p className="text-[10px] font-bold text-gray-400 uppercase">Reprob.</p>
-                            <p className="font-bold text-rose-600">{calcularEstadisticas(data.estudiantes).reprobados}</p>
+                            <p className="font-bold text-rose-600">{data.reprobados}</p>
                         </div>
                         <div className={`p-1 rounded-full ml-2 transition-colors ${expandedCourses[key] ? 'bg-blue-50 text-unach-blue' : 'bg-gray-50 text-gray-400'}`}>
                             {expandedCourses[key] ? <ChevronUp size={16} /> : <ChevronDown size={16} />}
@@ -433,7 +534,7 @@ const DashboardTutor: React.FC = () => {
                             </tr>
                             </thead>
                             <tbody className="bg-white divide-y divide-gray-50">
-                            {data.estudiantes.map((est: any, idx: number) => {
+                            {(rosters[key]?.estudiantes || []).map((est: CursoTutor, idx: number) => {
                                 const isBlocked = est.situacion === 'APROBADO' || est.situacion === 'REPROBADO';
                                 return (
                                 <tr key={idx} className="group hover:bg-blue-50/10 transition-colors">
@@ -485,10 +586,11 @@ const DashboardTutor: React.FC = () => {
                             </tbody>
                         </table>
                         </div>
+                        <CargarMas rosterKey={key} params={paramsCurso(data)} />
                     </div>
                 )}
             </div>
-        ))}
+        )})}
       </div>
     </div>
     
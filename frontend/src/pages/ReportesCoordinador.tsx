@@ -1,8 +1,7 @@
 // frontend/src/pages/ReportesCoordinador.tsx
 
 import React, { useEffect, useState, useMemo, useDeferredValue } from 'react';
-import { getCoordinatorReport, ReportData } from '../services/reportService';
-import * as XLSX from 'xlsx'; // Importamos librería de Excel
+import { getCoordinatorReport, descargarCoordinatorReport, ReportData } from '../services/reportService';
 import { 
   FileText, Filter, Download, Search, Users, BookOpen, 
   Star, ChevronLeft, ChevronRight, BarChart3, PieChart as PieChartIcon 
@@ -42,6 +41,7 @@ const ReportesCoordinador: React.FC = () => {
   const [data, setData] = useState<ReportData[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [exportando, setExportando] = useState(false);
 
   // Estados para filtros
   const [filtroPeriodo, setFiltroPeriodo] = useState<string>('');
@@ -123,18 +123,21 @@ const ReportesCoordinador: React.FC = () => {
   }, [datosFiltrados]);
 
   // --- FUNCIÓN DE EXPORTACIÓN A EXCEL ---
-  const handleExportExcel = () => {
-    const headers = ["Periodo", "Carrera", "Tutor", "Asignatura", "Estudiantes", "Aprobados", "Reprobados", "Tutorías Realizadas", "Satisfacción"];
-    const rows = datosFiltrados.map(item => [
-      item.periodo, item.carrera, item.tutor_nombre, item.asignatura, 
-      item.total_estudiantes, item.total_aprobados, item.total_reprobados, 
-      item.tutorias_realizadas, item.satisfaccion_promedio
-    ]);
-
-    const worksheet = XLSX.utils.aoa_to_sheet([headers, ...rows]);
-    const workbook = XLSX.utils.book_new();
-    XLSX.utils.book_append_sheet(workbook, worksheet, "Reporte Tutorías");
-    XLSX.writeFile(workbook, `Reporte_Coordinador_${new Date().toISOString().split('T')[0]}.xlsx`);
+  // El servidor arma el archivo completo (con los filtros de carrera y tutor)
+  const handleExportExcel = async () => {
+    const idsTutor = [...new Set(data.filter(i => i.tutor_nombre === filtroTutor).map(i => i.tutor_id))];
+    try {
+      setExportando(true);
+      await descargarCoordinatorReport('xlsx', {
+        carrera: filtroCarrera || undefined,
+        tutor_id: filtroTutor && idsTutor.length === 1 && idsTutor[0] !== null ? idsTutor[0] : undefined,
+      });
+    } catch (err) {
+      console.error("Error al exportar reporte:", err);
+      alert('No se pudo exportar el reporte.');
+    } finally {
+      setExportando(false);
+    }
   };
 
   // Paginación
@@ -159,9 +162,10 @@ const ReportesCoordinador: React.FC = () => {
         </div>
         <button 
             onClick={handleExportExcel}
-            className="flex items-center gap-2 px-5 py-2.5 bg-green-600 text-white font-bold rounded-lg hover:bg-green-700 transition-colors shadow-md hover:shadow-lg transform active:scale-95"
+            disabled={exportando}
+            className="disabled:opacity-60 flex items-center gap-2 px-5 py-2.5 bg-green-600 text-white font-bold rounded-lg hover:bg-green-700 transition-colors shadow-md hover:shadow-lg transform active:scale-95"
         >
-            <Download size={18} /> Exportar Excel
+            <Download size={18} /> {exportando ? 'Exportando...' : 'Exportar Excel'}
         </button>
       </div>
 
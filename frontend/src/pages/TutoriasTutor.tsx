@@ -3,7 +3,7 @@
 import React, { useEffect, useState, useCallback } from 'react';
 import axiosClient from '../api/axiosClient';
 import { useAuth } from '../context/AuthContext';
-import { actualizarEstadoTutoria } from '../services/tutorDashboardService';
+import { actualizarEstadoTutoria, suscribirEventosTutor } from '../services/tutorDashboardService';
 import EnlaceZoomModal from '../components/EnlaceZoomModal'; 
 import { 
   Calendar, 
@@ -68,10 +68,10 @@ const TutoriasTutor: React.FC = () => {
     const [isZoomModalOpen, setIsZoomModalOpen] = useState(false);
     const [tutoriaSeleccionada, setTutoriaSeleccionada] = useState<TutoriaTutor | null>(null);
 
-    const fetchTutorias = useCallback(async () => {
+    const fetchTutorias = useCallback(async (silencioso: boolean = false) => {
         if (user?.rol !== 'tutor') return;
         try {
-            setLoading(true);
+            if (!silencioso) setLoading(true);
             const data = await getMisTutoriasTutor();
             setTutorias(data.sort((a, b) => new Date(a.fecha).getTime() - new Date(b.fecha).getTime()));
             setError(null);
@@ -84,6 +84,12 @@ const TutoriasTutor: React.FC = () => {
 
     useEffect(() => { fetchTutorias(); }, [fetchTutorias]);
 
+    // Nuevas solicitudes o cambios llegan en vivo (SSE): se refresca la lista sin parpadeo
+    useEffect(() => {
+        if (user?.rol !== 'tutor') return;
+        return suscribirEventosTutor(() => { fetchTutorias(true); });
+    }, [user, fetchTutorias]);
+
     // Resetear página al cambiar de pestaña
     useEffect(() => {
         setCurrentPage(1);
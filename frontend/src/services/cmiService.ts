@@ -34,12 +34,45 @@ export interface CMI {
 
 export interface CoordinatorDashboard {
     nombre: string;
+    periodo_id: number | null; // null = todos los períodos
+    periodo: string | null;
+    carrera: string | null;    // null = todas las carreras
     cmi: CMI;
 }
 
+// Un punto por día del histórico (cmi_snapshots)
+export interface PuntoTendenciaCMI {
+    fecha: string;
+    tasa_asistencia: number;
+    satisfaccion_promedio: number;
+    total_sesiones_realizadas: number;
+    ratio_tutor_estudiante: number;
+    tasa_adherencia_tutores: number;
+    tutores_activos: number;
+    total_estudiantes: number;
+}
+
+export interface TendenciaCMI {
+    periodo_id: number | null;
+    carrera: string | null;
+    desde: string;
+    hasta: string;
+    serie: PuntoTendenciaCMI[];
+}
+
 // 2. Servicio para obtener los datos
-export const getCoordinatorDashboard = async (): Promise<CoordinatorDashboard> => {
-    // Ajusta la URL si tu endpoint es diferente (ej. /dashboard/coordinator)
-    const response = await axiosClient.get('/dashboard/coordinator');
+// Por defecto: la carrera del coordinador en el período activo
+export const getCoordinatorDashboard = async (
+    params: { alcance?: 'carrera' | 'global'; periodo_id?: number | 'all' } = {}
+): Promise<CoordinatorDashboard> => {
+    const response = await axiosClient.get('/dashboard/coordinator', { params });
+    return response.data;
+};
+
+// Serie diaria del CMI (por defecto, los últimos 90 días)
+export const getCMITendencia = async (
+    params: { desde?: string; hasta?: string; alcance?: 'carrera' | 'global'; periodo_id?: number | 'all' } = {}
+): Promise<TendenciaCMI> => {
+    const response = await axiosClient.get('/dashboard/coordinator/tendencia', { params });
     return response.data;
 };
\ No newline at end of file
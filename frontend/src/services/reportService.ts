@@ -5,7 +5,9 @@ export interface ReportData {
   periodo: string;
   // ✅ CAMBIADO: de 'departamento' a 'carrera'
   carrera: string;
+  tutor_id: number | null;
   tutor_nombre: string;
+  asignatura_id: number;
   asignatura: string;
   total_estudiantes: number;
   total_aprobados: number;
@@ -17,16 +19,60 @@ export interface ReportData {
   satisfaccion_promedio: number;
 }
 
+export interface ReportFiltros {
+  periodo_id?: number | 'all';
+  carrera?: string;
+  tutor_id?: number;
+}
+
+// Una página del reporte: 'siguiente' es el cursor de la próxima (null en la última)
+export interface ReportPage {
+  grupos: ReportData[];
+  limit: number;
+  siguiente: string | null;
+}
+
+export const getCoordinatorReportPage = async (
+  filtros: ReportFiltros = {}, cursor?: string, limit = 500
+): Promise<ReportPage> => {
+  const response = await axiosClient.get('/reports/coordinator', { params: { ...filtros, cursor, limit } });
+  return response.data;
+};
+
+/**
+ * Descarga el reporte completo generado en el servidor (CSV o Excel).
+ */
+export const descargarCoordinatorReport = async (
+  formato: 'csv' | 'xlsx', filtros: ReportFiltros = {}
+): Promise<void> => {
+  const response = await axiosClient.get('/reports/coordinator/export', {
+    params: { ...filtros, format: formato },
+    responseType: 'blob',
+  });
+  const url = URL.createObjectURL(response.data);
+  const enlace = document.createElement('a');
+  enlace.href = url;
+  enlace.download = `Reporte_Coordinador_${new Date().toISOString().split('T')[0]}.${formato}`;
+  enlace.click();
+  URL.revokeObjectURL(url);
+};
+
 /**
  * Llama al endpoint del backend para obtener el reporte detallado
- * para el coordinador.
+ * para el coordinador (recorre todas las páginas).
  */
-export const getCoordinatorReport = async (): Promise<ReportData[]> => {
+export const getCoordinatorReport = async (filtros: ReportFiltros = {}): Promise<ReportData[]> => {
   try {
-    const response = await axiosClient.get('/reports/coordinator');
-    return response.data;
+    const grupos: ReportData[] = [];
+    let cursor: string | undefined;
+    do {
+      const pagina = await getCoordinatorReportPage(filtros, cursor);
+      grupos.push(...pagina.grupos);
+      cursor = pagina.siguiente ?? undefined;
+    } while (cursor);
+    return grupos;
   } catch (error) {
     console.error("Error al obtener el reporte del coordinador:", error);
     throw error;
   }
-};
\ No newline at end of file
+};
@@ -24,6 +24,38 @@ export interface CursoTutor {
   tutorias_acumuladas: number | null;
 }
 
+// Resumen de un curso (asignatura + periodo) calculado en el servidor
+export interface CursoResumen {
+  asignatura_id: number;
+  asignatura: string;
+  periodo_id: number;
+  periodo: string;
+  total_estudiantes: number;
+  aprobados: number;
+  reprobados: number;
+  en_curso: number;
+  en_riesgo: number; // Según la regla de certeza o el riesgo guardado vigente
+  sin_calcular: number; // En curso, a la espera del próximo recálculo del riesgo
+  promedio_final: number | null;
+  tutorias_realizadas: number;
+}
+
+// Página de estudiantes con detalle de riesgo
+export interface RosterTutor {
+  total: number;
+  limit: number;
+  offset: number;
+  estudiantes: CursoTutor[];
+}
+
+export interface RosterParams {
+  asignatura_id?: number;
+  periodo_id?: number;
+  riesgo?: 'prioritario' | 'normal' | 'sin_calcular';
+  limit?: number;
+  offset?: number;
+}
+
 export interface TutoriaPendiente {
   id: number;
   fecha_solicitada: string;
@@ -31,9 +63,20 @@ export interface TutoriaPendiente {
   estudiante: string; 
 }
 
+// Evento en vivo del stream /tutorias/eventos ('recargar' = volver a pedir la lista)
+export interface EventoTutoria {
+  evento: 'creada' | 'actualizada' | 'recargar';
+  id?: number;
+  tutor_id?: number;
+  estado?: string;
+  estudiante?: string | null;
+  fecha_solicitada?: string;
+  tema?: string | null;
+}
+
 export interface TutorDashboard {
   nombre: string;
-  cursos: CursoTutor[];
+  cursos: CursoResumen[];
   tutorias_pendientes: TutoriaPendiente[];
   average_rating: number;
 }
@@ -53,6 +96,85 @@ export const getTutorDashboard = async (): Promise<TutorDashboard> => {
   }
 };
 
+/**
+ * Obtiene una página de estudiantes del tutor (de un curso o de un grupo de riesgo).
+ */
+export const getTutorRoster = async (params: RosterParams): Promise<RosterTutor> => {
+  try {
+    const response = await axiosClient.get('/dashboard/tutor/estudiantes', { params });
+    return response.data;
+  } catch (error) {
+    console.error("Error al obtener los estudiantes del tutor:", error);
+    throw error;
+  }
+};
+
+/**
+ * Recorre todas las páginas del roster (para exportar a Excel).
+ */
+export const getTutorRosterCompleto = async (params: RosterParams): Promise<CursoTutor[]> => {
+  const limit = 500;
+  const estudiantes: CursoTutor[] = [];
+  let total = 0;
+  do {
+    const pagina = await getTutorRoster({ ...params, limit, offset: estudiantes.length });
+    estudiantes.push(...pagina.estudiantes);
+    total = pagina.total;
+    if (pagina.estudiantes.length === 0) break;
+  } while (estudiantes.length < total);
+  return estudiantes;
+};
+
+/**
+ * Se suscribe a los cambios en vivo de las tutorías del tutor (Server-Sent Events).
+ * Devuelve la función para cerrar la conexión.
+ */
+export const suscribirEventosTutor = (onEvento: (evento: EventoTutoria) => void): (() => void) => {
+  if (!localStorage.getItem('accessToken')) return () => {};
+
+  let fuente: EventSource | null = null;
+  let reintento: ReturnType<typeof setTimeout> | undefined;
+  let cerrado = false;
+
+  const reabrir = () => {
+    if (!cerrado) reintento = setTimeout(abrir, 5000);
+  };
+
+  const abrir = async () => {
+    try {
+      // EventSource no permite cabeceras: con el JWT (axios) se pide un ticket de un solo uso
+      const { data } = await axiosClient.post<{ ticket: string }>('/auth/stream-ticket');
+      if (cerrado) return;
+      fuente = new EventSource(
+        `${axiosClient.defaults.baseURL}/tutorias/eventos?ticket=${encodeURIComponent(data.ticket)}`
+      );
+      fuente.addEventListener('tutoria', (e) => {
+        try {
+          onEvento(JSON.parse((e as MessageEvent).data));
+        } catch (error) {
+          console.error("Evento de tutoría inválido:", error);
+        }
+      });
+      // El ticket ya se gastó: si se cae la conexión, se vuelve a abrir con uno nuevo
+      fuente.onerror = () => {
+        fuente?.close();
+        fuente = null;
+        reabrir();
+      };
+    } catch (error) {
+      console.error("No se pudo abrir el stream de tutorías:", error);
+      reabrir();
+    }
+  };
+
+  abrir();
+  return () => {
+    cerrado = true;
+    clearTimeout(reintento);
+    fuente?.close();
+  };
+};
+
 /**
  * Actualiza el estado de una tutoría a 'programada' (aceptar) o 'cancelada' (rechazar).
  */